@@ -0,0 +1,58 @@
+"""move profile pictures to object storage
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import base64
+import binascii
+import io
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('profile_picture_key', sa.String(255), nullable=True))
+
+    # Backfill: move inline data: URLs into object storage. Rows are loaded one
+    # at a time so multi-megabyte images are never all held in memory.
+    from app.services.profile_pictures import profile_picture_service, ProfilePictureError
+
+    conn = op.get_bind()
+    user_ids = [
+        row[0] for row in conn.execute(sa.text(
+            "SELECT id FROM users WHERE profile_picture_url LIKE 'data:%'"
+        ))
+    ]
+
+    for user_id in user_ids:
+        data_url = conn.execute(
+            sa.text("SELECT profile_picture_url FROM users WHERE id = :id"),
+            {"id": user_id}
+        ).scalar()
+
+        key = None
+        try:
+            _, encoded = data_url.split(",", 1)
+            key = profile_picture_service.store_sync(str(user_id), io.BytesIO(base64.b64decode(encoded)))
+        except (ValueError, binascii.Error, ProfilePictureError) as e:
+            # Unreadable image - drop it rather than keep megabytes on the row
+            print(f"Skipping profile picture for user {user_id}: {e}")
+
+        conn.execute(
+            sa.text("UPDATE users SET profile_picture_key = :key, profile_picture_url = NULL WHERE id = :id"),
+            {"key": key, "id": user_id}
+        )
+
+
+def downgrade():
+    # Stored images are left in object storage; rows lose the reference
+    op.drop_column('users', 'profile_picture_key')
@@ -0,0 +1,56 @@
+"""add supplier metrics tracking
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'rfq_distributions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('rfq_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('company_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('channel', sa.String(50), server_default='invited'),
+        sa.Column('distributed_at', sa.DateTime(), server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['rfq_id'], ['rfqs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('rfq_id', 'company_id', name='uq_rfq_distributions_rfq_company')
+    )
+    op.create_index('ix_rfq_distributions_rfq_id', 'rfq_distributions', ['rfq_id'])
+    op.create_index('ix_rfq_distributions_company_id', 'rfq_distributions', ['company_id'])
+
+    op.add_column('companies', sa.Column('total_response_hours', sa.Float(), server_default='0'))
+    op.add_column('pocs', sa.Column('total_response_hours', sa.Float(), server_default='0'))
+
+    # Every company that already responded has received that RFQ
+    op.execute("""
+        INSERT INTO rfq_distributions (rfq_id, company_id, channel, distributed_at)
+        SELECT r.rfq_id, r.supplier_company_id, 'direct', min(r.created_at)
+        FROM rfq_responses r
+        GROUP BY r.rfq_id, r.supplier_company_id
+        ON CONFLICT DO NOTHING
+    """)
+
+    # Initialise the counters from history
+    from app.services.supplier_metrics import RECONCILE_COMPANIES_SQL, RECONCILE_POCS_SQL
+    op.execute(RECONCILE_COMPANIES_SQL)
+    op.execute(RECONCILE_POCS_SQL)
+
+
+def downgrade():
+    op.drop_column('pocs', 'total_response_hours')
+    op.drop_column('companies', 'total_response_hours')
+    op.drop_table('rfq_distributions')
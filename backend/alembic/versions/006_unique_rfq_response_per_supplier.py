@@ -0,0 +1,54 @@
+"""unique rfq response per supplier
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicates left by the old check-then-insert race (keep the first response)
+    op.execute("""
+        DELETE FROM rfq_responses r
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY rfq_id, supplier_company_id ORDER BY created_at, id
+            ) AS rn
+            FROM rfq_responses
+        ) d
+        WHERE r.id = d.id AND d.rn > 1
+    """)
+
+    op.create_unique_constraint(
+        'uq_rfq_responses_rfq_supplier',
+        'rfq_responses',
+        ['rfq_id', 'supplier_company_id']
+    )
+
+    # Repair counters that lost increments
+    op.execute("""
+        UPDATE rfqs q
+        SET response_count = coalesce(c.n, 0)
+        FROM rfqs q2
+        LEFT JOIN (SELECT rfq_id, count(*) AS n FROM rfq_responses GROUP BY rfq_id) c ON c.rfq_id = q2.id
+        WHERE q.id = q2.id AND q.response_count IS DISTINCT FROM coalesce(c.n, 0)
+    """)
+
+    # 005 computed the supplier metrics with the duplicates still present;
+    # recompute them from the deduplicated responses
+    from app.services.supplier_metrics import RECONCILE_COMPANIES_SQL, RECONCILE_POCS_SQL
+    op.execute(RECONCILE_COMPANIES_SQL)
+    op.execute(RECONCILE_POCS_SQL)
+
+
+def downgrade():
+    op.drop_constraint('uq_rfq_responses_rfq_supplier', 'rfq_responses', type_='unique')
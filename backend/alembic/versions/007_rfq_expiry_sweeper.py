@@ -0,0 +1,40 @@
+"""rfq expiry sweeper
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('rfqs', sa.Column('expiry_notified_at', sa.DateTime(), nullable=True))
+
+    # The sweeper only ever scans active RFQs by expiry; expired/closed rows stay out of the index
+    op.create_index(
+        'ix_rfqs_active_expires_at',
+        'rfqs',
+        ['expires_at'],
+        postgresql_where=sa.text("status = 'active'")
+    )
+
+    # Listings now trust status alone - expire what the read-time filter used to hide
+    op.execute("""
+        UPDATE rfqs
+        SET status = 'expired', updated_at = timezone('utc', now())
+        WHERE status = 'active' AND expires_at <= timezone('utc', now())
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_rfqs_active_expires_at', table_name='rfqs')
+    op.drop_column('rfqs', 'expiry_notified_at')
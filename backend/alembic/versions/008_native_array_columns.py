@@ -0,0 +1,101 @@
+"""native array/jsonb columns for capabilities and requirements
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+COMPANY_ARRAY_COLUMNS = [
+    'certifications',
+    'capabilities',
+    'materials',
+    'naics_codes',
+    'business_categories',
+    'raw_materials_focus',
+]
+
+RFQ_ARRAY_COLUMNS = [
+    'required_certifications',
+    'preferred_suppliers',
+]
+
+
+def upgrade():
+    # Existing values are JSON arrays, JSON strings or free text
+    # ("ISO 9001, AS9100" typed into a form) - normalize all of them
+    op.execute("""
+        CREATE FUNCTION pg_temp.to_text_array(value text) RETURNS text[] AS $$
+        DECLARE
+            parsed jsonb;
+        BEGIN
+            IF value IS NULL OR btrim(value) = '' THEN
+                RETURN NULL;
+            END IF;
+            BEGIN
+                parsed := value::jsonb;
+            EXCEPTION WHEN others THEN
+                parsed := NULL;
+            END;
+            IF jsonb_typeof(parsed) = 'array' THEN
+                RETURN ARRAY(
+                    SELECT btrim(e) FROM jsonb_array_elements_text(parsed) e WHERE btrim(e) <> ''
+                );
+            END IF;
+            IF jsonb_typeof(parsed) = 'string' THEN
+                value := parsed #>> '{}';
+            END IF;
+            RETURN ARRAY(
+                SELECT btrim(e) FROM unnest(string_to_array(value, ',')) e WHERE btrim(e) <> ''
+            );
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+    """)
+    op.execute("""
+        CREATE FUNCTION pg_temp.to_jsonb_value(value text) RETURNS jsonb AS $$
+        BEGIN
+            IF value IS NULL OR btrim(value) = '' THEN
+                RETURN NULL;
+            END IF;
+            RETURN value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN to_jsonb(pg_temp.to_text_array(value));
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+    """)
+
+    for column in COMPANY_ARRAY_COLUMNS:
+        op.execute(
+            f"ALTER TABLE companies ALTER COLUMN {column} TYPE text[] USING pg_temp.to_text_array({column})"
+        )
+        op.create_index(f'ix_companies_{column}_gin', 'companies', [column], postgresql_using='gin')
+
+    for column in RFQ_ARRAY_COLUMNS:
+        op.execute(
+            f"ALTER TABLE rfqs ALTER COLUMN {column} TYPE text[] USING pg_temp.to_text_array({column})"
+        )
+        op.create_index(f'ix_rfqs_{column}_gin', 'rfqs', [column], postgresql_using='gin')
+
+    # Attachments are file descriptors, never filtered on - no index
+    op.execute("ALTER TABLE rfqs ALTER COLUMN attachments TYPE jsonb USING pg_temp.to_jsonb_value(attachments)")
+
+
+def downgrade():
+    op.execute("ALTER TABLE rfqs ALTER COLUMN attachments TYPE text USING attachments::text")
+
+    for column in RFQ_ARRAY_COLUMNS:
+        op.drop_index(f'ix_rfqs_{column}_gin', table_name='rfqs')
+        op.execute(f"ALTER TABLE rfqs ALTER COLUMN {column} TYPE text USING array_to_json({column})::text")
+
+    for column in COMPANY_ARRAY_COLUMNS:
+        op.drop_index(f'ix_companies_{column}_gin', table_name='companies')
+        op.execute(f"ALTER TABLE companies ALTER COLUMN {column} TYPE text USING array_to_json({column})::text")
@@ -0,0 +1,54 @@
+"""postgres supplier search indexes
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Fuzzy/substring name matching (%, ILIKE '%...%')
+    op.create_index(
+        'ix_companies_name_trgm',
+        'companies',
+        ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+
+    # Full-text search on description - the expression must match
+    # PostgresSearchService.description_vector() exactly
+    op.execute("""
+        CREATE INDEX ix_companies_description_fts ON companies
+        USING gin (to_tsvector('english'::regconfig, coalesce(description, '')))
+    """)
+
+    # Filters and sort keys
+    op.create_index('ix_companies_industry', 'companies', ['industry'])
+    op.create_index('ix_companies_response_rate', 'companies', ['response_rate'])
+    op.create_index(
+        'ix_companies_verified_response_rate',
+        'companies',
+        ['response_rate'],
+        postgresql_where=sa.text('is_verified')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_companies_verified_response_rate', table_name='companies')
+    op.drop_index('ix_companies_response_rate', table_name='companies')
+    op.drop_index('ix_companies_industry', table_name='companies')
+    op.execute("DROP INDEX IF EXISTS ix_companies_description_fts")
+    op.drop_index('ix_companies_name_trgm', table_name='companies')
@@ -0,0 +1,51 @@
+"""company geolocation and geocoding cache
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS cube")
+    op.execute("CREATE EXTENSION IF NOT EXISTS earthdistance")
+
+    op.add_column('companies', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('companies', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('companies', sa.Column('geocoded_at', sa.DateTime(), nullable=True))
+
+    # Radius searches: earth_box(...) @> ll_to_earth(latitude, longitude)
+    op.execute("""
+        CREATE INDEX ix_companies_earth ON companies
+        USING gist (ll_to_earth(latitude, longitude))
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+    """)
+
+    op.create_table(
+        'geocode_cache',
+        sa.Column('query', sa.String(length=500), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('display_name', sa.Text(), nullable=True),
+        sa.Column('provider', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('query')
+    )
+
+
+def downgrade():
+    op.drop_table('geocode_cache')
+    op.execute("DROP INDEX IF EXISTS ix_companies_earth")
+    op.drop_column('companies', 'geocoded_at')
+    op.drop_column('companies', 'longitude')
+    op.drop_column('companies', 'latitude')
@@ -0,0 +1,58 @@
+"""composite query indexes
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # RFQ listing: public RFQs by status, newest first - the index order
+    # serves the ORDER BY ... LIMIT without a sort
+    op.create_index(
+        'ix_rfqs_public_status_created_at',
+        'rfqs',
+        ['status', sa.text('created_at DESC')],
+        postgresql_where=sa.text("visibility = 'public'")
+    )
+    # A buyer's own RFQs in creation order (exports, data exports)
+    op.create_index('ix_rfqs_buyer_created_at', 'rfqs', ['buyer_id', 'created_at'])
+
+    # audit_logs is created by the application (create_all), which builds
+    # these indexes itself on a fresh database
+    if 'audit_logs' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    # User activity, newest first
+    op.execute('CREATE INDEX IF NOT EXISTS ix_audit_logs_user_timestamp ON audit_logs (user_id, timestamp DESC)')
+    # Failed login counting for account lockout (action, email, time window)
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS ix_audit_logs_action_email_timestamp '
+        'ON audit_logs (action, user_email, timestamp)'
+    )
+
+    # Covered by the composites above (same leading column); one less
+    # index to maintain on every audit insert
+    op.execute('DROP INDEX IF EXISTS ix_audit_logs_user_id')
+    op.execute('DROP INDEX IF EXISTS ix_audit_logs_action')
+
+
+def downgrade():
+    if 'audit_logs' in sa.inspect(op.get_bind()).get_table_names():
+        op.execute('CREATE INDEX IF NOT EXISTS ix_audit_logs_action ON audit_logs (action)')
+        op.execute('CREATE INDEX IF NOT EXISTS ix_audit_logs_user_id ON audit_logs (user_id)')
+        op.execute('DROP INDEX IF EXISTS ix_audit_logs_action_email_timestamp')
+        op.execute('DROP INDEX IF EXISTS ix_audit_logs_user_timestamp')
+
+    op.drop_index('ix_rfqs_buyer_created_at', table_name='rfqs')
+    op.drop_index('ix_rfqs_public_status_created_at', table_name='rfqs')
@@ -0,0 +1,111 @@
+"""monthly range partitions for audit_logs
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime, timezone
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+# Monthly partitions created up front; the maintenance task keeps extending them
+PARTITIONS_AHEAD = 3
+
+INDEXES = [
+    ('ix_audit_logs_user_timestamp', '(user_id, timestamp DESC)'),
+    ('ix_audit_logs_action_email_timestamp', '(action, user_email, timestamp)'),
+    ('ix_audit_logs_resource_type', '(resource_type)'),
+    ('ix_audit_logs_resource_id', '(resource_id)'),
+    ('ix_audit_logs_timestamp', '(timestamp)'),
+]
+
+
+def _month(offset):
+    """
+    Start of the UTC month `offset` months from now (partition bounds are UTC months)
+    """
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _create_indexes(table):
+    for name, columns in INDEXES:
+        op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} {columns}')
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    if 'audit_logs' in sa.inspect(conn).get_table_names():
+        # Keep the existing rows in place as one partition holding everything
+        # before next month - no copy. It is archived as a whole once its
+        # upper bound leaves the online window.
+        op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_legacy')
+        op.execute('ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey')
+        for name in conn.execute(sa.text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'audit_logs_legacy' AND indexname LIKE 'ix_audit_logs_%'"
+        )).scalars().all():
+            op.execute(f"ALTER INDEX {name} RENAME TO {name.replace('ix_audit_logs_', 'ix_audit_logs_legacy_', 1)}")
+
+        op.execute(
+            'CREATE TABLE audit_logs (LIKE audit_logs_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            'PARTITION BY RANGE (timestamp)'
+        )
+        op.execute('ALTER TABLE audit_logs ADD CONSTRAINT audit_logs_pkey PRIMARY KEY (id, timestamp)')
+        _create_indexes('audit_logs')
+        op.execute(
+            "ALTER TABLE audit_logs ATTACH PARTITION audit_logs_legacy "
+            f"FOR VALUES FROM (MINVALUE) TO ('{_month(1).isoformat()}')"
+        )
+        first_month = 1
+    else:
+        op.execute("""
+            CREATE TABLE audit_logs (
+                id VARCHAR NOT NULL,
+                user_id VARCHAR,
+                user_email VARCHAR,
+                action VARCHAR NOT NULL,
+                resource_type VARCHAR,
+                resource_id VARCHAR,
+                details TEXT,
+                ip_address VARCHAR,
+                user_agent VARCHAR,
+                request_path VARCHAR,
+                request_method VARCHAR,
+                status VARCHAR NOT NULL,
+                status_code INTEGER,
+                error_message TEXT,
+                timestamp TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+                CONSTRAINT audit_logs_pkey PRIMARY KEY (id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+        """)
+        _create_indexes('audit_logs')
+        first_month = 0
+
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+    for offset in range(first_month, PARTITIONS_AHEAD + 1):
+        start, end = _month(offset), _month(offset + 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_y{start:%Y}m{start:%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+
+def downgrade():
+    # Collapse the partitions back into a plain table (copies every online row)
+    op.execute('CREATE TABLE audit_logs_flat (LIKE audit_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    op.execute('INSERT INTO audit_logs_flat SELECT * FROM audit_logs')
+    op.execute('DROP TABLE audit_logs CASCADE')
+    op.execute('ALTER TABLE audit_logs_flat RENAME TO audit_logs')
+    op.execute('ALTER TABLE audit_logs ADD CONSTRAINT audit_logs_pkey PRIMARY KEY (id)')
+    _create_indexes('audit_logs')
@@ -5,7 +5,6 @@ from typing import Optional
 from datetime import datetime
 import uuid
 import os
-import base64
 
 from app.core.database import get_db
 from app.core.security import (
@@ -20,6 +19,7 @@ from app.core.security import (
 from app.core.sanitizer import sanitize_user_data
 from app.services.linkedin import linkedin_service
 from app.services.audit_service import audit_service
+from app.services.profile_pictures import profile_picture_service, ProfilePictureError
 from app.models.user import User, Company, POC
 from app.schemas.token import Token, TokenRefresh, RegistrationResponse
 from app.schemas.auth import (
@@ -455,7 +455,12 @@ async def get_current_user_info(
         email=user.email,
         name=user.name,
         user_type=user_type,
-        profile_picture_url=user.profile_picture_url,
+        profile_picture_url=await profile_picture_service.get_url(
+            user.profile_picture_key, user.profile_picture_url
+        ),
+        profile_picture_thumbnail_url=await profile_picture_service.get_url(
+            user.profile_picture_key, user.profile_picture_url, size="small"
+        ),
         linkedin_profile_url=user.linkedin_profile_url,
         is_verified=user.is_verified,
         verification_status=user.verification_status,
@@ -499,6 +504,13 @@ async def update_user_profile(
             detail="No valid fields to update"
         )
     
+    # Uploaded pictures go through /upload-profile-picture; never store inline images
+    if str(update_data.get("profile_picture_url") or "").startswith("data:"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use /auth/upload-profile-picture to upload images"
+        )
+    
     # Sanitize user data
     if "name" in update_data:
         sanitized = sanitize_user_data({"name": update_data["name"]})
@@ -537,7 +549,12 @@ async def update_user_profile(
         email=user.email,
         name=user.name,
         user_type=user_type,
-        profile_picture_url=user.profile_picture_url,
+        profile_picture_url=await profile_picture_service.get_url(
+            user.profile_picture_key, user.profile_picture_url
+        ),
+        profile_picture_thumbnail_url=await profile_picture_service.get_url(
+            user.profile_picture_key, user.profile_picture_url, size="small"
+        ),
         linkedin_profile_url=user.linkedin_profile_url,
         is_verified=user.is_verified,
         verification_status=user.verification_status,
@@ -553,8 +570,9 @@ async def upload_profile_picture(
     db: Session = Depends(get_db)
 ):
     """
-    Upload profile picture (converts to base64 data URL for now)
-    In production, this should upload to S3/cloud storage
+    Upload profile picture
+    Renders fixed-size JPEG thumbnails off the request thread and stores
+    them in object storage; only the key is saved on the user row
     """
     # Verify token
     token_data = verify_token(credentials.credentials)
@@ -579,24 +597,36 @@ async def upload_profile_picture(
             detail="File must be an image"
         )
     
-    # Read file content
-    content = await file.read()
+    # Validate file size (max 5MB) without reading the spooled upload into memory
+    file.file.seek(0, os.SEEK_END)
+    file_size = file.file.tell()
+    file.file.seek(0)
     
-    # Validate file size (max 5MB)
-    if len(content) > 5 * 1024 * 1024:
+    if file_size > 5 * 1024 * 1024:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Image must be less than 5MB"
         )
     
-    # Convert to base64 data URL
-    base64_image = base64.b64encode(content).decode('utf-8')
-    data_url = f"data:{file.content_type};base64,{base64_image}"
+    try:
+        key = await profile_picture_service.store(user.id, file.file)
+    except ProfilePictureError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    old_key = user.profile_picture_key
     
     # Update user profile picture
-    user.profile_picture_url = data_url
+    user.profile_picture_key = key
+    if user.profile_picture_url and user.profile_picture_url.startswith("data:"):
+        user.profile_picture_url = None
     db.commit()
     
+    if old_key:
+        await profile_picture_service.delete(old_key)
+    
     # Audit log
     if request:
         audit_service.log_action(
@@ -609,10 +639,13 @@ async def upload_profile_picture(
             ip_address=request.client.host if request.client else None,
             user_agent=request.headers.get("user-agent"),
             status_code=200,
-            details={"file_type": file.content_type, "file_size": len(content)}
+            details={"file_type": file.content_type, "file_size": file_size}
         )
     
-    return {"profile_picture_url": data_url}
+    return {
+        "profile_picture_url": await profile_picture_service.get_url(key),
+        "profile_picture_thumbnail_url": await profile_picture_service.get_url(key, size="small")
+    }
 
 
 @router.post("/verify-email")
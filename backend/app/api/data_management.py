@@ -1,85 +1,92 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
 from typing import Dict, Any
 import json
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import get_current_user
-from app.models.user import User, Company, POC
-from app.models.audit_log import AuditLog
+from app.models.user import User
 from app.services.audit_service import audit_service
+from app.services.email import email_service
+from app.services.data_export import data_export_service
+from app.tasks.data_export import export_user_data as export_user_data_task
 
 router = APIRouter(prefix="/data", tags=["data-management"])
 
 
-@router.get("/export")
+@router.post("/export", status_code=status.HTTP_202_ACCEPTED)
 async def export_user_data(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Export all user data for GDPR/CCPA compliance
-    Returns a JSON file with all personal and business data
+    
+    Starts a background job that builds a zip of NDJSON files (profile,
+    companies, RFQs, responses, messages and the full audit trail).
+    Poll GET /data/export/{export_id} for the download link.
     """
-    # Log the data export request
-    audit_service.log_action(
-        db=db,
-        action="data.export",
-        status="success",
-        user_id=current_user.id,
-        user_email=current_user.email,
-        details={"export_type": "full"}
-    )
+    job, created = data_export_service.create_job(str(current_user.id))
+    
+    if created:
+        # Log the data export request
+        audit_service.log_action(
+            db=db,
+            action="data.export",
+            status="success",
+            user_id=current_user.id,
+            user_email=current_user.email,
+            resource_id=job["export_id"],
+            details={"export_type": "full"}
+        )
+        
+        await run_in_threadpool(
+            export_user_data_task.apply_async,
+            args=[job["export_id"]],
+            kwargs={"idempotency_key": f"data-export:{job['export_id']}"}
+        )
     
-    # Gather all user data
-    export_data = {
-        "user": {
-            "id": str(current_user.id),
-            "email": current_user.email,
-            "name": current_user.name,
-            "created_at": current_user.created_at.isoformat() if current_user.created_at else None,
-            "updated_at": current_user.updated_at.isoformat() if current_user.updated_at else None,
-            "is_active": current_user.is_active,
-            "is_verified": current_user.is_verified,
-            "linkedin_id": current_user.linkedin_id,
-            "linkedin_profile_url": current_user.linkedin_profile_url,
-        },
-        "company_associations": [],
-        "audit_logs": [],
-        "export_date": datetime.utcnow().isoformat(),
-        "format_version": "1.0"
+    return {
+        "export_id": job["export_id"],
+        "status": job["status"],
+        "created_at": job["created_at"]
     }
+
+
+@router.get("/export/{export_id}")
+async def get_data_export(
+    export_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Status of a data export; includes a short-lived download URL once ready
+    """
+    job = data_export_service.get_job(export_id)
+    if not job or job.get("user_id") != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found or expired"
+        )
     
-    # Add company associations
-    for poc in current_user.company_associations:
-        company = poc.company
-        if company:
-            export_data["company_associations"].append({
-                "company_id": str(company.id),
-                "company_name": company.name,
-                "role": poc.role,
-                "is_primary": poc.is_primary,
-                "created_at": poc.created_at.isoformat() if poc.created_at else None
-            })
-    
-    # Add audit logs (last 90 days)
-    cutoff_date = datetime.utcnow() - timedelta(days=90)
-    audit_logs = db.query(AuditLog).filter(
-        AuditLog.user_id == current_user.id,
-        AuditLog.timestamp >= cutoff_date
-    ).order_by(AuditLog.timestamp.desc()).limit(1000).all()
-    
-    export_data["audit_logs"] = [
-        {
-            "action": log.action,
-            "timestamp": log.timestamp.isoformat() if log.timestamp else None,
-            "ip_address": log.ip_address,
-            "status": log.status
-        } for log in audit_logs
-    ]
-    
-    return export_data
+    result = {
+        "export_id": export_id,
+        "status": job["status"],
+        "created_at": job.get("created_at"),
+        "completed_at": job.get("completed_at")
+    }
+    
+    if job["status"] == "ready":
+        result["download_url"] = await data_export_service.get_download_url(job)
+        result["expires_in"] = settings.data_export_url_ttl_seconds
+        result["size"] = int(job.get("size", 0))
+        result["counts"] = json.loads(job.get("counts", "{}"))
+    elif job["status"] == "failed":
+        result["error"] = "Export failed - please request a new export"
+    
+    return result
 
 
 @router.post("/delete-account")
@@ -91,7 +98,8 @@ async def request_account_deletion(
     """
     Request account deletion for GDPR/CCPA compliance
     
-    This schedules the account for deletion after a 30-day grace period.
+    This schedules the account for deletion after a grace period (30 days
+    by default). The purge worker removes the account once it has passed.
     During this period, the user can cancel the deletion request.
     """
     # Check if already scheduled for deletion
@@ -99,11 +107,11 @@ async def request_account_deletion(
         return {
             "message": "Account deletion already scheduled",
             "scheduled_for": current_user.deletion_scheduled_at.isoformat(),
-            "can_cancel_until": (current_user.deletion_scheduled_at + timedelta(days=30)).isoformat()
+            "can_cancel_until": (current_user.deletion_scheduled_at + timedelta(days=settings.account_deletion_grace_days)).isoformat()
         }
     
-    # Schedule deletion for 30 days from now
-    deletion_date = datetime.utcnow() + timedelta(days=30)
+    # Schedule deletion for the end of the grace period
+    deletion_date = datetime.utcnow() + timedelta(days=settings.account_deletion_grace_days)
     current_user.deletion_scheduled_at = datetime.utcnow()
     current_user.is_active = False
     
@@ -119,13 +127,18 @@ async def request_account_deletion(
         details={"deletion_scheduled_for": deletion_date.isoformat()}
     )
     
-    # TODO: Send email notification
-    # background_tasks.add_task(send_deletion_notification_email, current_user.email, deletion_date)
+    # Queued for the worker - does not block the request
+    await email_service.send_account_deletion_notice(
+        to_email=current_user.email,
+        user_name=current_user.name,
+        scheduled_for=deletion_date.strftime("%B %d, %Y"),
+        cancel_link=f"{settings.frontend_url}/dashboard/settings"
+    )
     
     return {
         "message": "Account deletion scheduled",
         "scheduled_for": deletion_date.isoformat(),
-        "grace_period_days": 30,
+        "grace_period_days": settings.account_deletion_grace_days,
         "can_cancel_until": deletion_date.isoformat()
     }
 
@@ -144,8 +157,8 @@ async def cancel_account_deletion(
             detail="No deletion scheduled for this account"
         )
     
-    # Check if within grace period (30 days)
-    deletion_date = current_user.deletion_scheduled_at + timedelta(days=30)
+    # Check if within grace period
+    deletion_date = current_user.deletion_scheduled_at + timedelta(days=settings.account_deletion_grace_days)
     if datetime.utcnow() > deletion_date:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -188,8 +201,10 @@ async def get_retention_policy():
             "description": "Business transaction records retained for 7 years for accounting and legal purposes"
         },
         "audit_logs": {
-            "retention_period": "7 years",
-            "description": "Security and audit logs retained for 7 years for SOC 2 compliance"
+            "retention_period": f"{settings.audit_log_retention_years} years",
+            "description": f"Security and audit logs retained for {settings.audit_log_retention_years} years for SOC 2 compliance",
+            "online_period": f"{settings.audit_log_online_months} months",
+            "archive": "Older logs are kept as compressed monthly archives in object storage"
         },
         "inactive_accounts": {
             "retention_period": "3 years",
@@ -0,0 +1,360 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+import uuid
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.security import verify_token
+from app.models.user import User, RFQ
+from app.services.audit_service import audit_service
+from app.services.storage import MAX_FILE_SIZE, s3_storage_service
+from app.schemas.files import (
+    MultipartUploadCreate,
+    MultipartUploadParts,
+    MultipartUploadComplete,
+    MultipartUploadAbort,
+    BatchPresignRequest
+)
+
+router = APIRouter(prefix="/rfqs/{rfq_id}/files", tags=["files"])
+security = HTTPBearer()
+
+MAX_PRESIGN_BATCH = 200
+MAX_PRESIGN_EXPIRATION = 7 * 24 * 3600  # SigV4 limit
+
+
+def _get_user(db: Session, credentials: HTTPAuthorizationCredentials) -> User:
+    token_data = verify_token(credentials.credentials)
+    if not token_data:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    
+    user = db.query(User).filter(User.id == token_data.sub).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user
+
+
+def _get_rfq(db: Session, rfq_id: str) -> RFQ:
+    try:
+        rfq_uuid = uuid.UUID(rfq_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid RFQ ID format"
+        )
+    
+    rfq = db.query(RFQ).filter(RFQ.id == rfq_uuid).first()
+    if not rfq:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="RFQ not found"
+        )
+    return rfq
+
+
+def _get_owned_rfq(db: Session, rfq_id: str, user: User) -> RFQ:
+    rfq = _get_rfq(db, rfq_id)
+    if rfq.buyer_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the RFQ owner can manage attachments"
+        )
+    return rfq
+
+
+def _check_part_numbers(part_numbers):
+    # Presigned part URLs don't bind a length; at least bound how many can be signed
+    max_parts = s3_storage_service.max_part_count()
+    if not part_numbers or len(part_numbers) > max_parts or len(set(part_numbers)) != len(part_numbers):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {max_parts} distinct parts can be requested"
+        )
+    if any(not 1 <= part_number <= max_parts for part_number in part_numbers):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Part numbers must be between 1 and {max_parts}"
+        )
+
+
+def _check_file_key(rfq_id: str, file_key: str):
+    # Keys are generated as {file_type}/{rfq_id}/... - reject keys for other RFQs
+    parts = file_key.split("/")
+    if len(parts) < 3 or parts[1] != rfq_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File does not belong to this RFQ"
+        )
+
+
+@router.get("")
+async def list_rfq_files(
+    rfq_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    List attachments for an RFQ with download URLs
+    """
+    user = _get_user(db, credentials)
+    rfq = _get_rfq(db, rfq_id)
+    
+    if rfq.visibility != "public" and rfq.buyer_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this RFQ"
+        )
+    
+    return await s3_storage_service.list_rfq_files(str(rfq.id))
+
+
+@router.post("/presign")
+async def batch_presign_download_urls(
+    rfq_id: str,
+    presign_data: BatchPresignRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Sign download URLs for many RFQ attachments in one call
+    Returns one entry per requested file, in request order
+    """
+    user = _get_user(db, credentials)
+    rfq = _get_rfq(db, rfq_id)
+    
+    if rfq.visibility != "public" and rfq.buyer_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this RFQ"
+        )
+    
+    if len(presign_data.files) > MAX_PRESIGN_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_PRESIGN_BATCH} files can be signed per request"
+        )
+    
+    if not 1 <= presign_data.expiration <= MAX_PRESIGN_EXPIRATION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid expiration"
+        )
+    
+    for file in presign_data.files:
+        _check_file_key(rfq_id, file.file_key)
+    
+    urls = await s3_storage_service.generate_presigned_download_urls(
+        [file.dict() for file in presign_data.files],
+        expiration=presign_data.expiration
+    )
+    
+    return {
+        "urls": [
+            {"file_key": file.file_key, "download_filename": file.download_filename, "url": url}
+            for file, url in zip(presign_data.files, urls)
+        ],
+        "expires_in": presign_data.expiration
+    }
+
+
+@router.post("/multipart")
+async def create_multipart_upload(
+    rfq_id: str,
+    upload_data: MultipartUploadCreate,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a multipart upload for a large attachment (CAD, specs, etc.)
+    Returns presigned URLs for every part; the client uploads parts in
+    parallel and then calls /multipart/complete with the part ETags
+    """
+    user = _get_user(db, credentials)
+    rfq = _get_owned_rfq(db, rfq_id, user)
+    
+    validation = await s3_storage_service.validate_file_upload(
+        upload_data.filename,
+        upload_data.file_size,
+        upload_data.content_type
+    )
+    if not validation["valid"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="; ".join(validation["errors"])
+        )
+    
+    max_parts = s3_storage_service.max_part_count()
+    if s3_storage_service.part_count(upload_data.file_size) > max_parts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File would need more than {max_parts} parts"
+        )
+    
+    if upload_data.file_size < settings.s3_multipart_threshold_mb * 1024 * 1024:
+        # Small files are cheaper as a single PUT
+        result = await s3_storage_service.generate_presigned_upload_url(
+            str(rfq.id),
+            upload_data.filename,
+            content_type=upload_data.content_type
+        )
+        if "error" in result:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Could not create upload URL"
+            )
+        return {"multipart": False, **result}
+    
+    result = await s3_storage_service.create_multipart_upload(
+        str(rfq.id),
+        upload_data.filename,
+        upload_data.file_size,
+        content_type=upload_data.content_type
+    )
+    if "error" in result:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not start multipart upload"
+        )
+    
+    return {"multipart": True, **result}
+
+
+@router.post("/multipart/parts")
+async def presign_upload_parts(
+    rfq_id: str,
+    parts_data: MultipartUploadParts,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Resume a multipart upload
+    Returns the parts already stored plus fresh URLs for the requested parts
+    """
+    user = _get_user(db, credentials)
+    _get_owned_rfq(db, rfq_id, user)
+    _check_file_key(rfq_id, parts_data.file_key)
+    _check_part_numbers(parts_data.part_numbers)
+    
+    result = await s3_storage_service.presign_upload_parts(
+        parts_data.file_key,
+        parts_data.upload_id,
+        parts_data.part_numbers
+    )
+    if "error" in result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    
+    return result
+
+
+@router.post("/multipart/complete")
+async def complete_multipart_upload(
+    rfq_id: str,
+    complete_data: MultipartUploadComplete,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Complete a multipart upload and confirm the stored file
+    """
+    user = _get_user(db, credentials)
+    rfq = _get_owned_rfq(db, rfq_id, user)
+    _check_file_key(rfq_id, complete_data.file_key)
+    part_numbers = [part.part_number for part in complete_data.parts]
+    _check_part_numbers(part_numbers)
+    
+    # Check what was actually stored before assembling it
+    size = await s3_storage_service.uploaded_size(complete_data.file_key, complete_data.upload_id, part_numbers)
+    if size is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Not all parts have been uploaded"
+        )
+    if size > MAX_FILE_SIZE:
+        await s3_storage_service.abort_multipart_upload(complete_data.file_key, complete_data.upload_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size ({size / (1024*1024):.1f} MB) exceeds maximum allowed size (100 MB)"
+        )
+    
+    completed = await s3_storage_service.complete_multipart_upload(
+        complete_data.file_key,
+        complete_data.upload_id,
+        [part.dict() for part in complete_data.parts]
+    )
+    if not completed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not complete upload"
+        )
+    
+    file_info = await s3_storage_service.confirm_upload(
+        complete_data.file_key,
+        str(rfq.id),
+        complete_data.original_filename,
+        str(user.id)
+    )
+    if "error" in file_info:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded file not found"
+        )
+    
+    # Backstop: parts could be replaced between the check and completion
+    if file_info["file_size"] > MAX_FILE_SIZE:
+        await s3_storage_service.delete_file(complete_data.file_key)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size ({file_info['file_size'] / (1024*1024):.1f} MB) exceeds maximum allowed size (100 MB)"
+        )
+    
+    audit_service.log_action(
+        db=db,
+        user_id=user.id,
+        action="rfq.file.upload",
+        status="success",
+        resource_type="rfq",
+        resource_id=str(rfq.id),
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+        status_code=200,
+        details={
+            "file_key": complete_data.file_key,
+            "file_size": file_info.get("file_size"),
+            "parts": len(complete_data.parts)
+        }
+    )
+    
+    return file_info
+
+
+@router.post("/multipart/abort")
+async def abort_multipart_upload(
+    rfq_id: str,
+    abort_data: MultipartUploadAbort,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Abort a multipart upload and discard uploaded parts
+    """
+    user = _get_user(db, credentials)
+    _get_owned_rfq(db, rfq_id, user)
+    _check_file_key(rfq_id, abort_data.file_key)
+    
+    aborted = await s3_storage_service.abort_multipart_upload(
+        abort_data.file_key,
+        abort_data.upload_id
+    )
+    
+    return {"aborted": aborted}
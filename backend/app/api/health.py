@@ -3,11 +3,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from datetime import datetime
 from typing import Dict, Any
-import psutil
 import sys
 
-from app.core.database import get_db
+from app.core.database import get_db, get_pool_stats
 from app.core.config import settings
+from app.services.health_sampler import health_sampler
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -27,58 +27,32 @@ async def health_check():
 
 
 @router.get("/detailed")
-async def detailed_health_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def detailed_health_check() -> Dict[str, Any]:
     """
     Detailed health check with database and system metrics
     SOC 2 Compliance - Availability monitoring
+    Dependency and system checks are sampled in the background (see
+    health_sampler); each reports when it was taken and whether it is stale
     """
     health_status = {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "checks": {}
+        "checks": health_sampler.snapshot()
     }
     
-    # Database check
-    try:
-        db.execute(text("SELECT 1"))
-        health_status["checks"]["database"] = {
-            "status": "healthy",
-            "message": "Database connection successful"
-        }
-    except Exception as e:
+    if health_status["checks"]["database"]["status"] == "unhealthy":
         health_status["status"] = "unhealthy"
-        health_status["checks"]["database"] = {
-            "status": "unhealthy",
-            "message": f"Database connection failed: {str(e)}"
-        }
     
-    # System metrics
-    try:
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        health_status["checks"]["system"] = {
-            "status": "healthy",
-            "metrics": {
-                "cpu_percent": cpu_percent,
-                "memory_percent": memory.percent,
-                "memory_available_mb": memory.available / (1024 * 1024),
-                "disk_percent": disk.percent,
-                "disk_free_gb": disk.free / (1024 * 1024 * 1024)
-            }
-        }
-        
-        # Alert if resources are low
-        if cpu_percent > 90 or memory.percent > 90 or disk.percent > 90:
-            health_status["checks"]["system"]["status"] = "warning"
-            health_status["checks"]["system"]["message"] = "High resource utilization"
-            
-    except Exception as e:
-        health_status["checks"]["system"] = {
-            "status": "unknown",
-            "message": f"Could not retrieve system metrics: {str(e)}"
-        }
+    # Connection pools (in_use at size + max_overflow means requests queue for a connection)
+    pools = get_pool_stats()
+    exhausted = [
+        p["pool"] for p in pools
+        if p["size"] is not None and p["in_use"] >= p["size"] + p["max_overflow"]
+    ]
+    health_status["checks"]["database_pool"] = {
+        "status": "warning" if exhausted else "healthy",
+        "pools": pools
+    }
     
     # Python version
     health_status["checks"]["python"] = {
@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import or_, update, func
+from sqlalchemy.dialects.postgresql import insert
 from typing import List, Optional
 from datetime import datetime, timedelta
 import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.core.sanitizer import sanitize_rfq_data
 from app.models.user import User, RFQ, RFQResponse, Company, POC
 from app.services.audit_service import audit_service
+from app.services.supplier_metrics import supplier_metrics_service
+from app.services.supplier_filters import supplier_filter_service
+from app.services.rfq_import import rfq_import_service, RFQImportError
+from app.services.export import export_service, EXPORT_FORMATS, RFQ_EXPORT_COLUMNS, QUOTE_EXPORT_COLUMNS
 from app.schemas.rfq import (
     RFQCreate,
     RFQUpdate, 
@@ -18,7 +25,8 @@ from app.schemas.rfq import (
     RFQList,
     RFQDetail,
     RFQResponseCreate,
-    RFQResponseUpdate
+    RFQResponseUpdate,
+    RFQImportResult
 )
 
 router = APIRouter(prefix="/rfqs", tags=["rfq"])
@@ -78,6 +86,15 @@ async def create_rfq(
     )
     
     db.add(rfq)
+    db.flush()
+    
+    # Invited suppliers count as having received the RFQ
+    supplier_metrics_service.record_distribution(
+        db,
+        rfq.id,
+        supplier_metrics_service.parse_company_ids(rfq.preferred_suppliers)
+    )
+    
     db.commit()
     db.refresh(rfq)
     
@@ -119,6 +136,75 @@ async def create_rfq(
     )
 
 
+@router.post("/bulk", response_model=RFQImportResult)
+async def bulk_import_rfqs(
+    request: Request,
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="Validate only, create nothing"),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Create RFQs in bulk from a BOM upload (CSV or XLSX, one RFQ per row)
+    
+    Column headers are RFQ field names (title, part_number, yearly_quantity,
+    moq_required, incoterm, ...). Valid rows are created; invalid rows are
+    skipped and listed in the per-row error report.
+    """
+    user = get_current_user(db, credentials.credentials)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    
+    poc = db.query(POC).filter(POC.user_id == user.id).first()
+    if not poc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must be associated with a company to post RFQs"
+        )
+    
+    try:
+        # Parsing and inserting block - keep them off the event loop
+        result = await run_in_threadpool(
+            rfq_import_service.import_rfqs,
+            db,
+            file.file,
+            file.filename or "",
+            user.id,
+            poc.company_id,
+            dry_run
+        )
+    except RFQImportError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if not dry_run:
+        # One audit entry for the whole import
+        audit_service.log_action(
+            db=db,
+            user_id=user.id,
+            action="rfq.bulk_import",
+            status="success",
+            resource_type="rfq",
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            status_code=200,
+            details={
+                "filename": file.filename,
+                "total_rows": result["total_rows"],
+                "created": result["created"],
+                "failed": result["failed"]
+            }
+        )
+    
+    return result
+
+
 @router.get("", response_model=List[RFQList])
 async def list_rfqs(
     skip: int = Query(0, ge=0),
@@ -126,7 +212,7 @@ async def list_rfqs(
     material_category: Optional[str] = Query(None),
     status: Optional[str] = Query("active"),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     List RFQs with filtering and pagination
@@ -149,13 +235,9 @@ async def list_rfqs(
             )
         )
     
-    # Only show public RFQs or RFQs that haven't expired
-    query = query.filter(
-        and_(
-            RFQ.visibility == "public",
-            or_(RFQ.expires_at.is_(None), RFQ.expires_at > datetime.utcnow())
-        )
-    )
+    # Only show public RFQs; expired ones are moved out of "active" by the
+    # expiry sweeper, so status alone decides what is open
+    query = query.filter(RFQ.visibility == "public")
     
     # Order by creation date (newest first)
     query = query.order_by(RFQ.created_at.desc())
@@ -187,15 +269,132 @@ async def list_rfqs(
     return result
 
 
+def _export_response(
+    db: Session,
+    stmt,
+    columns: list,
+    export_format: str,
+    filename: str
+) -> StreamingResponse:
+    if not export_service.is_available(export_format):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Export format '{export_format}' is not available"
+        )
+    
+    column_names = [name for name, _ in columns]
+    stamp = datetime.utcnow().strftime("%Y%m%d")
+    return StreamingResponse(
+        export_service.stream(db, stmt, column_names, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}-{stamp}.{export_format}"'}
+    )
+
+
+@router.get("/export")
+async def export_rfqs(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson|xlsx)$"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
+    """
+    Export the current user's RFQs as CSV, NDJSON or XLSX (streamed)
+    """
+    user = get_current_user(db, credentials.credentials)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    
+    audit_service.log_action(
+        db=db,
+        user_id=user.id,
+        action="rfq.export",
+        status="success",
+        resource_type="rfq",
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+        status_code=200,
+        details={"format": format, "status": status_filter}
+    )
+    
+    return _export_response(
+        read_db,
+        export_service.rfq_query(user.id, status_filter),
+        RFQ_EXPORT_COLUMNS,
+        format,
+        "rfqs"
+    )
+
+
+@router.get("/responses/export")
+async def export_rfq_responses(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson|xlsx)$"),
+    rfq_id: Optional[str] = Query(None, description="Limit to one RFQ"),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
+    """
+    Export supplier quotes on the current user's RFQs as CSV, NDJSON or XLSX
+    (streamed), one row per response with the RFQ and supplier details
+    """
+    user = get_current_user(db, credentials.credentials)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    
+    rfq_uuid = None
+    if rfq_id:
+        try:
+            rfq_uuid = uuid.UUID(rfq_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid RFQ ID format"
+            )
+    
+    audit_service.log_action(
+        db=db,
+        user_id=user.id,
+        action="rfq.response.export",
+        status="success",
+        resource_type="rfq_response",
+        resource_id=rfq_id,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+        status_code=200,
+        details={"format": format}
+    )
+    
+    return _export_response(
+        read_db,
+        export_service.quote_query(user.id, rfq_uuid),
+        QUOTE_EXPORT_COLUMNS,
+        format,
+        "quotes"
+    )
+
+
 @router.get("/{rfq_id}", response_model=RFQDetail)
 async def get_rfq(
     rfq_id: str,
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
 ):
     """
     Get detailed RFQ information
+    Reads come from a replica when configured; the view count and audit
+    entry are written to the primary
     """
     try:
         rfq_uuid = uuid.UUID(rfq_id)
@@ -205,7 +404,7 @@ async def get_rfq(
             detail="Invalid RFQ ID format"
         )
     
-    rfq = db.query(RFQ).filter(RFQ.id == rfq_uuid).first()
+    rfq = read_db.query(RFQ).filter(RFQ.id == rfq_uuid).first()
     if not rfq:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -215,7 +414,7 @@ async def get_rfq(
     # Check if RFQ is accessible
     current_user = None
     if credentials:
-        current_user = get_current_user(db, credentials.credentials)
+        current_user = get_current_user(read_db, credentials.credentials)
     
     # Only owner or public RFQs can be viewed
     if rfq.visibility != "public" and (not current_user or rfq.buyer_id != current_user.id):
@@ -224,8 +423,14 @@ async def get_rfq(
             detail="Access denied to this RFQ"
         )
     
-    # Increment view count
-    rfq.view_count += 1
+    # Increment view count (a view is not a write the viewer needs to read back)
+    view_count = db.execute(
+        update(RFQ)
+        .where(RFQ.id == rfq.id)
+        .values(view_count=func.coalesce(RFQ.view_count, 0) + 1)
+        .returning(RFQ.view_count)
+        .execution_options(synchronize_session=False, read_your_writes=False)
+    ).scalar()
     db.commit()
     
     # Audit log (only if authenticated)
@@ -244,10 +449,10 @@ async def get_rfq(
         )
     
     # Get buyer company info
-    buyer_company = db.query(Company).filter(Company.id == rfq.buyer_company_id).first()
+    buyer_company = read_db.query(Company).filter(Company.id == rfq.buyer_company_id).first()
     
     # Get responses count
-    response_count = db.query(RFQResponse).filter(RFQResponse.rfq_id == rfq.id).count()
+    response_count = read_db.query(RFQResponse).filter(RFQResponse.rfq_id == rfq.id).count()
     
     return RFQDetail(
         id=str(rfq.id),
@@ -264,7 +469,7 @@ async def get_rfq(
         status=rfq.status,
         visibility=rfq.visibility,
         expires_at=rfq.expires_at,
-        view_count=rfq.view_count,
+        view_count=view_count,
         response_count=response_count,
         created_at=rfq.created_at,
         updated_at=rfq.updated_at,
@@ -322,6 +527,12 @@ async def update_rfq(
             changes[field] = {"old": str(old_value), "new": str(value)}
         setattr(rfq, field, value)
     
+    if "expires_at" in changes:
+        # New deadline: warn suppliers again, and reopen an RFQ the sweeper expired
+        rfq.expiry_notified_at = None
+        if rfq.status == "expired" and "status" not in update_data and rfq.expires_at and rfq.expires_at > datetime.utcnow():
+            rfq.status = "active"
+    
     rfq.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(rfq)
@@ -478,22 +689,10 @@ async def submit_rfq_response(
             detail="User must be associated with a company to respond to RFQs"
         )
     
-    # Check if company already responded
-    existing_response = db.query(RFQResponse).filter(
-        and_(
-            RFQResponse.rfq_id == rfq.id,
-            RFQResponse.supplier_company_id == poc.company_id
-        )
-    ).first()
-    
-    if existing_response:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Company has already responded to this RFQ"
-        )
-    
-    # Create response
-    rfq_response = RFQResponse(
+    # Insert unless this company already responded (unique on rfq_id +
+    # supplier_company_id) - one round trip, no check-then-insert race
+    responded_at = datetime.utcnow()
+    insert_stmt = insert(RFQResponse).values(
         rfq_id=rfq.id,
         supplier_company_id=poc.company_id,
         responding_poc_id=poc.id,
@@ -503,16 +702,44 @@ async def submit_rfq_response(
         message=response_data.message,
         attachments=response_data.attachments,
         certifications_provided=response_data.certifications_provided,
-        responded_at=datetime.utcnow()
-    )
+        supplier_part_number=response_data.supplier_part_number,
+        production_batch_size=response_data.production_batch_size,
+        supplier_moq=response_data.supplier_moq,
+        supplier_unit_of_measure=response_data.supplier_unit_of_measure,
+        production_lead_time_days=response_data.production_lead_time_days,
+        raw_material_type=response_data.raw_material_type,
+        raw_material_cost=response_data.raw_material_cost,
+        responded_at=responded_at
+    ).on_conflict_do_nothing(
+        index_elements=["rfq_id", "supplier_company_id"]
+    ).returning(RFQResponse.id)
+    
+    response_id = db.execute(insert_stmt).scalar()
+    if response_id is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Company has already responded to this RFQ"
+        )
     
-    db.add(rfq_response)
+    # Update RFQ response count server-side so concurrent submissions don't lose increments
+    db.execute(
+        update(RFQ)
+        .where(RFQ.id == rfq.id)
+        .values(response_count=func.coalesce(RFQ.response_count, 0) + 1)
+        .execution_options(synchronize_session=False)
+    )
     
-    # Update RFQ response count
-    rfq.response_count += 1
+    # Supplier performance metrics (same transaction)
+    supplier_metrics_service.record_response(
+        db,
+        rfq,
+        company_id=poc.company_id,
+        poc_id=poc.id,
+        responded_at=responded_at
+    )
     
     db.commit()
-    db.refresh(rfq_response)
     
     # Audit log
     audit_service.log_action(
@@ -521,7 +748,7 @@ async def submit_rfq_response(
         action="rfq.response.submit",
         status="success",
         resource_type="rfq_response",
-        resource_id=str(rfq_response.id),
+        resource_id=str(response_id),
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent"),
         status_code=200,
@@ -533,14 +760,14 @@ async def submit_rfq_response(
         }
     )
     
-    return {"message": "Response submitted successfully", "response_id": str(rfq_response.id)}
+    return {"message": "Response submitted successfully", "response_id": str(response_id)}
 
 
 @router.get("/{rfq_id}/responses")
 async def get_rfq_responses(
     rfq_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all responses for an RFQ (only for RFQ owner)
@@ -597,4 +824,55 @@ async def get_rfq_responses(
             "created_at": response.created_at
         })
     
-    return result
\ No newline at end of file
+    return result
+
+
+@router.get("/{rfq_id}/qualified-suppliers")
+async def get_qualified_suppliers(
+    rfq_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    radius_km: Optional[float] = Query(None, gt=0, le=20000, description="Only suppliers within this distance of the delivery location"),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Suppliers holding every certification the RFQ requires (only for RFQ owner)
+    """
+    user = get_current_user(db, credentials.credentials)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    
+    try:
+        rfq_uuid = uuid.UUID(rfq_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid RFQ ID format"
+        )
+    
+    rfq = db.query(RFQ).filter(RFQ.id == rfq_uuid).first()
+    if not rfq:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="RFQ not found"
+        )
+    
+    if rfq.buyer_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the RFQ owner can view qualified suppliers"
+        )
+    
+    try:
+        # May call the geocoding provider on a cache miss
+        return await run_in_threadpool(
+            supplier_filter_service.qualified_suppliers, db, rfq, limit=limit, radius_km=radius_km
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -0,0 +1,203 @@
+from fastapi import APIRouter, HTTPException, status, Request, Query
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Tuple
+import anyio
+import os
+import uuid
+
+from app.services.storage import s3_storage_service
+from app.services.storage_backends import LocalStorageBackend, StorageError
+
+router = APIRouter(prefix="/storage", tags=["storage"])
+
+# Same ceiling as S3StorageService.validate_file_upload
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+
+
+class FileRangeResponse(Response):
+    """
+    Serve a byte range of a file
+    Uses the ASGI zero-copy send extension (sendfile) when the server
+    offers it, otherwise streams with positional reads off the event loop
+    """
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        status_code: int,
+        media_type: str,
+        headers: dict
+    ):
+        self.path = path
+        self.start = start
+        self.count = end - start + 1
+        headers = {**headers, "content-length": str(self.count)}
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+
+        if scope["method"] == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        with open(self.path, "rb") as f:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": self.start,
+                    "count": self.count,
+                    "more_body": False
+                })
+                return
+
+            offset = self.start
+            remaining = self.count
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, f.fileno(), min(self.chunk_size, remaining), offset
+                )
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+            if remaining > 0:
+                # File shrank while streaming - close the body anyway
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _local_backend() -> LocalStorageBackend:
+    backend = s3_storage_service.backend
+    if not isinstance(backend, LocalStorageBackend):
+        # Signed local URLs only exist when storage_backend=local
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return backend
+
+
+def _parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=" range; returns None to serve the whole file
+    Raises 416 for unsatisfiable ranges
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    start_str, _, end_str = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # Suffix range: last N bytes
+            start = max(0, size - int(end_str))
+            end = size - 1
+    except ValueError:
+        return None
+
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"])
+async def download_object(
+    key: str,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    disposition: Optional[str] = Query(None)
+):
+    """
+    Serve a locally stored object via a signed URL (supports Range requests)
+    """
+    backend = _local_backend()
+
+    if not backend.verify_signature("GET", key, expires, signature, {"disposition": disposition}):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+
+    try:
+        head = await run_in_threadpool(backend.head_object, key)
+        path = backend.object_path(key)
+    except StorageError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Object not found")
+
+    size = head["ContentLength"]
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": head["ETag"],
+        "last-modified": head["LastModified"].strftime("%a, %d %b %Y %H:%M:%S GMT")
+    }
+    if disposition:
+        headers["content-disposition"] = disposition
+
+    byte_range = _parse_range(request.headers.get("range"), size)
+    if byte_range is None:
+        return FileRangeResponse(path, 0, size - 1, 200, head["ContentType"], headers)
+
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(path, start, end, 206, head["ContentType"], headers)
+
+
+@router.put("/{key:path}")
+async def upload_object(
+    key: str,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    upload_id: Optional[str] = Query(None),
+    part_number: Optional[int] = Query(None)
+):
+    """
+    Receive a direct upload (or multipart part) via a signed URL
+    """
+    backend = _local_backend()
+
+    extra = {"upload_id": upload_id, "part_number": str(part_number) if part_number is not None else None}
+    if not backend.verify_signature("PUT", key, expires, signature, extra):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+
+    try:
+        if upload_id:
+            path = backend.part_path(upload_id, part_number or 1)
+        else:
+            path = backend.object_path(key)
+    except StorageError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    received = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Upload too large"
+                    )
+                await run_in_threadpool(f.write, chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    stat = os.stat(path)
+    return Response(status_code=status.HTTP_200_OK, headers={"ETag": backend.compute_etag(stat)})
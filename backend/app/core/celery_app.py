@@ -0,0 +1,105 @@
+"""
+Celery application for background work (emails, real-time notifications,
+maintenance jobs). Broker and result backend are the configured Redis.
+
+Run a worker:  celery -A app.core.celery_app worker --loglevel=info
+Run the beat:  celery -A app.core.celery_app beat --loglevel=info
+"""
+from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_init, worker_process_shutdown
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+celery_app = Celery(
+    "linkedprocurement",
+    broker=settings.redis_url,
+    backend=settings.redis_url,
+    include=[
+        "app.tasks.notifications",
+        "app.tasks.maintenance",
+        "app.tasks.digest",
+        "app.tasks.data_export",
+    ]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    result_expires=3600,
+    timezone="UTC",
+    enable_utc=True,
+    # Ack after the task finishes so a crashed worker's tasks are redelivered;
+    # idempotency keys make the redelivery safe
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_default_queue="default",
+    task_routes={
+        "app.tasks.notifications.*": {"queue": "notifications"},
+        "app.tasks.maintenance.*": {"queue": "maintenance"},
+        "app.tasks.digest.*": {"queue": "maintenance"},
+        "app.tasks.data_export.*": {"queue": "maintenance"},
+    },
+    # Local development without a worker: run tasks inline
+    task_always_eager=settings.celery_task_always_eager,
+)
+
+celery_app.conf.beat_schedule = {
+    "cleanup-stale-multipart-uploads": {
+        "task": "app.tasks.maintenance.cleanup_stale_uploads",
+        "schedule": crontab(minute=15),
+    },
+    "cleanup-data-exports": {
+        "task": "app.tasks.maintenance.cleanup_data_exports",
+        "schedule": crontab(minute=45),
+    },
+    "sweep-rfq-expiry": {
+        "task": "app.tasks.maintenance.sweep_rfq_expiry",
+        "schedule": crontab(minute="*/5"),
+    },
+    "purge-deleted-accounts": {
+        "task": "app.tasks.maintenance.purge_deleted_accounts",
+        "schedule": crontab(minute=5),
+    },
+    "geocode-companies": {
+        "task": "app.tasks.maintenance.geocode_companies",
+        "schedule": crontab(minute=50),
+    },
+    "maintain-audit-partitions": {
+        "task": "app.tasks.maintenance.maintain_audit_partitions",
+        "schedule": crontab(hour=2, minute=10),
+    },
+    "reconcile-supplier-metrics": {
+        "task": "app.tasks.maintenance.reconcile_supplier_metrics",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "weekly-digest": {
+        "task": "app.tasks.digest.send_weekly_digests",
+        "schedule": crontab(day_of_week="mon", hour=13, minute=0),
+    },
+}
+
+
+# Prometheus: the worker's outbound calls (SendGrid, Pusher, S3) are only
+# visible through its own metrics server
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    if not settings.worker_metrics_port:
+        return
+    from app.core import metrics
+    try:
+        metrics.start_worker_server(settings.worker_metrics_port)
+    except OSError as e:
+        logger.warning(f"Worker metrics server not started: {e}")
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(**kwargs):
+    from app.core import metrics
+    metrics.mark_process_dead()
@@ -27,6 +27,18 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./sscn.db"
     database_url_test: Optional[str] = None
+    database_pool_size: int = 5  # Persistent connections per process (per engine)
+    database_max_overflow: int = 10  # Extra connections opened under load, closed when returned
+    database_pool_timeout: int = 30  # Seconds to wait for a free connection before failing
+    database_pool_recycle: int = 300  # Reconnect connections older than this (seconds)
+    database_pool_pre_ping: bool = True  # Test connections on checkout (one round trip each)
+    database_pgbouncer_mode: bool = False  # Transaction pooler in front (PgBouncer, Supabase :6543): no prepared statements
+    database_null_pool: bool = False  # No client-side pool - every checkout connects through the external pooler
+    database_replica_urls: Optional[str] = None  # Comma-separated read replica URLs (read-only endpoints)
+    replica_max_lag_seconds: float = 5.0  # Replicas further behind are skipped (reads go to the primary)
+    replica_lag_check_interval_seconds: float = 5.0
+    replica_connect_timeout_seconds: int = 3  # An unreachable replica is given up on this fast
+    replica_read_your_writes_seconds: int = 10  # A client's reads stay on the primary this long after it writes
     
     # LinkedIn API (Optional - can be placeholders)
     linkedin_client_id: str = "placeholder-linkedin-client-id"
@@ -36,18 +48,45 @@ class Settings(BaseSettings):
     # SendGrid (Optional)
     sendgrid_api_key: str = "placeholder-sendgrid-key"
     from_email: str = "noreply@example.com"
+    sendgrid_digest_template_id: Optional[str] = None  # Dynamic template for the weekly digest
+    digest_batch_size: int = 1000  # Recipients per SendGrid request (SendGrid maximum is 1000)
+    
+    # File storage backend: "s3" (AWS or S3-compatible endpoint) or "local" (disk)
+    storage_backend: str = "s3"
+    local_storage_path: str = "./storage"
+    local_storage_url: str = "http://localhost:8000/api/v1/storage"  # Base URL for signed local URLs
     
     # AWS S3 (Optional)
     aws_access_key_id: str = "placeholder-aws-key"
     aws_secret_access_key: str = "placeholder-aws-secret" 
     s3_bucket_name: str = "placeholder-bucket"
     aws_region: str = "us-east-1"
+    s3_endpoint_url: Optional[str] = None  # e.g. http://localhost:9000 for MinIO
+    s3_force_path_style: bool = False  # Required by most S3-compatible stand-ins
+    s3_max_concurrency: int = 16  # Parallel S3 calls per process (thread pool + connection pool)
+    s3_metadata_cache_size: int = 10000  # Cached head_object results (LRU)
+    s3_multipart_threshold_mb: int = 16  # Files larger than this use multipart uploads
+    s3_multipart_target_parts: int = 16  # Preferred number of parts per upload
+    s3_multipart_stale_hours: int = 24  # Incomplete uploads older than this are aborted
+    presign_cache_ttl_seconds: int = 300  # Reuse signed download URLs for this long (0 disables)
+    presign_cache_size: int = 10000
+    data_export_url_ttl_seconds: int = 3600  # Lifetime of GDPR export download links
+    data_export_retention_hours: int = 72  # Export archives are deleted after this
     
     # Redis (Optional)
     redis_url: str = "redis://localhost:6379/0"
     
+    # Background tasks (Celery on Redis)
+    celery_task_always_eager: bool = False  # Run tasks inline (local development without a worker)
+    task_max_retries: int = 5
+    task_retry_backoff_max_seconds: int = 600
+    task_idempotency_ttl_seconds: int = 86400
+    task_dead_letter_key: str = "tasks:dead_letter"
+    task_dead_letter_max_length: int = 10000
+    
     # Elasticsearch (Optional)
     elasticsearch_url: str = "http://localhost:9200"
+    search_backend: str = "elasticsearch"  # "elasticsearch" or "postgres" (supplier search without a cluster)
     
     # Pusher (Optional)
     pusher_app_id: str = "placeholder-pusher-app-id"
@@ -55,6 +94,13 @@ class Settings(BaseSettings):
     pusher_secret: str = "placeholder-pusher-secret"
     pusher_cluster: str = "us2"
     
+    # Geocoding (Nominatim-compatible search API)
+    geocoding_url: str = "https://nominatim.openstreetmap.org/search"
+    geocoding_user_agent: str = "LinkedProcurement/1.0"
+    geocoding_batch_size: int = 100  # Companies geocoded per backfill run
+    geocoding_min_interval_seconds: float = 1.0  # Provider rate limit (Nominatim: 1 request/s)
+    geocoding_negative_cache_days: int = 30  # Unresolvable locations are retried after this
+    
     # Third-party APIs
     clearbit_api_key: Optional[str] = None
     hunter_api_key: Optional[str] = None
@@ -62,6 +108,15 @@ class Settings(BaseSettings):
     
     # Monitoring
     sentry_dsn: Optional[str] = None
+    sql_profiler_enabled: bool = True  # Per-request query count/time (Server-Timing header, app.sql logs)
+    sql_repeated_statement_threshold: int = 5  # Same statement this often in one request is logged (likely N+1)
+    sql_query_budget: Optional[int] = None  # Statements allowed per request (unset: no budget)
+    sql_query_budget_fail: bool = False  # Fail over-budget requests with a 500 instead of logging (tests/CI)
+    metrics_enabled: bool = True  # Prometheus /metrics endpoint and request metrics
+    metrics_token: Optional[str] = None  # Bearer token required to scrape /metrics (unset: only served in development)
+    worker_metrics_port: Optional[int] = 9101  # Celery worker metrics server (unset: disabled)
+    health_sample_interval_seconds: float = 30.0  # How often /health/detailed checks are refreshed in the background
+    health_check_timeout_seconds: float = 5.0  # A check taking longer is reported unhealthy
     
     # Supabase
     supabase_url: Optional[str] = None
@@ -90,7 +145,22 @@ class Settings(BaseSettings):
     password_min_length: int = 12
     session_timeout_minutes: int = 30
     session_absolute_timeout_hours: int = 24
-    
+
+    # Audit log partitions (monthly, on timestamp)
+    audit_log_partitions_ahead: int = 3  # Future monthly partitions kept ready
+    audit_log_online_months: int = 13  # Older partitions are archived to object storage and dropped
+    audit_log_retention_years: int = 7  # Archives are deleted after this (see the retention policy)
+
+    # RFQ lifecycle
+    rfq_expiry_batch_size: int = 500  # RFQs expired or notified per sweeper transaction
+    rfq_expiring_soon_hours: int = 24  # Suppliers are warned this long before an RFQ expires
+
+    # GDPR/CCPA account deletion
+    account_deletion_grace_days: int = 30  # Users can cancel until this has passed
+    account_purge_batch_size: int = 10  # Due accounts locked per purge transaction
+    account_purge_chunk_size: int = 1000  # Rows deleted/anonymized per purge transaction
+    account_purge_max_seconds: int = 900  # Time budget per purge run (the next run resumes)
+
     # CORS
     allowed_origins: List[str] = []
     
@@ -1,11 +1,18 @@
-from sqlalchemy import create_engine
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from fastapi import Request
+from typing import Dict, Generator, List, Optional, Tuple
 from urllib.parse import quote_plus
+import hashlib
+import itertools
 import logging
+import threading
+import time
 
 from app.core.config import settings
+from app.core.db_pool import create_pooled_engine, pool_stats
 
 logger = logging.getLogger(__name__)
 
@@ -20,35 +27,233 @@ if database_url and "postgresql" in database_url and "@" in database_url:
         logger.warning(f"Could not parse database URL: {e}")
 
 try:
-    engine = create_engine(
-        settings.database_url,
-        pool_pre_ping=True,
-        pool_recycle=300,
-        pool_size=5,
-        max_overflow=10
-    )
+    engine = create_pooled_engine(settings.database_url, "primary")
 except Exception as e:
     logger.warning(f"Database engine creation failed: {e}")
     engine = None
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) if engine else None
 
+# Read-only sessions; bound per session to a replica (see get_read_db)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
 Base = declarative_base()
 
+# Replication delay in seconds; 0 when the replica has replayed everything
+# it received (an idle primary sends nothing, so replay time alone would grow)
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# The lag probe gives up this fast on a replica that accepts connections
+# but doesn't answer (set per probe; replica reads such as exports can be long)
+REPLICA_LAG_STATEMENT_TIMEOUT = "2s"
+
+STICKY_KEY_PREFIX = "db:read_your_writes:"
+
+# Writes that don't make a client's reads sticky to the primary
+STICKY_EXEMPT_TABLES = {"audit_logs"}
+
+
+class ReplicaRouter:
+    """
+    Picks the engine for read-only sessions
+
+    Replicas are used round-robin while their replication lag (checked at
+    most every replica_lag_check_interval_seconds) is within
+    replica_max_lag_seconds. Reads fall back to the primary when no
+    replica qualifies, and for replica_read_your_writes_seconds after the
+    same client committed a write, so users see their own changes.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.engines = [
+            create_pooled_engine(url, f"replica{index}", {"connect_timeout": settings.replica_connect_timeout_seconds})
+            for index, url in enumerate(urls)
+        ]
+        self._lag: Dict[int, Tuple[float, Optional[float]]] = {}
+        # One probe per replica at a time; other callers get the cached value
+        self._probing = [threading.Lock() for _ in self.engines]
+        self._turn = itertools.count()
+
+    def lag_seconds(self, index: int) -> Optional[float]:
+        """
+        Cached replication lag of one replica; None when it is unreachable
+        or has not been checked yet
+        """
+        now = time.monotonic()
+        checked = self._lag.get(index)
+        if checked and now - checked[0] < settings.replica_lag_check_interval_seconds:
+            return checked[1]
+
+        if not self._probing[index].acquire(blocking=False):
+            # Another thread is probing this replica - don't queue behind its I/O
+            return checked[1] if checked else None
+        try:
+            lag = self._probe(index)
+            self._lag[index] = (time.monotonic(), lag)
+            return lag
+        finally:
+            self._probing[index].release()
+
+    def _probe(self, index: int) -> Optional[float]:
+        try:
+            with self.engines[index].connect() as conn:
+                with conn.begin():
+                    conn.execute(text(f"SET LOCAL statement_timeout = '{REPLICA_LAG_STATEMENT_TIMEOUT}'"))
+                    return float(conn.execute(text(REPLICA_LAG_QUERY)).scalar())
+        except Exception as e:
+            logger.warning(f"Read replica {index} unavailable: {e}")
+            return None
+
+    def pick(self) -> Optional[Engine]:
+        """
+        Next replica within the lag limit, or None for the primary
+        """
+        for _ in range(len(self.engines)):
+            index = next(self._turn) % len(self.engines)
+            lag = self.lag_seconds(index)
+            if lag is not None and lag <= settings.replica_max_lag_seconds:
+                return self.engines[index]
+        return None
+
+    def status(self) -> List[Dict[str, object]]:
+        replicas = []
+        for index in range(len(self.engines)):
+            lag = self.lag_seconds(index)
+            replicas.append({
+                "replica": index,
+                "lag_seconds": lag,
+                "in_rotation": lag is not None and lag <= settings.replica_max_lag_seconds
+            })
+        return replicas
 
-def get_db() -> Generator[Session, None, None]:
+    # Read-your-writes (shared across workers through Redis)
+
+    def mark_write(self, client_key: str):
+        from app.core.redis import get_redis
+        try:
+            get_redis().set(f"{STICKY_KEY_PREFIX}{client_key}", 1, ex=settings.replica_read_your_writes_seconds)
+        except Exception as e:
+            logger.warning(f"Could not record write for read-your-writes: {e}")
+
+    def recently_wrote(self, client_key: str) -> bool:
+        from app.core.redis import get_redis
+        try:
+            return bool(get_redis().exists(f"{STICKY_KEY_PREFIX}{client_key}"))
+        except Exception:
+            # Unknown - the primary is always safe
+            return True
+
+
+def _replica_urls() -> List[str]:
+    return [url.strip() for url in (settings.database_replica_urls or "").split(",") if url.strip()]
+
+
+try:
+    replica_router = ReplicaRouter(_replica_urls()) if engine and _replica_urls() else None
+except Exception as e:
+    logger.warning(f"Read replica engine creation failed: {e}")
+    replica_router = None
+
+
+def client_key(request: Request) -> str:
+    """
+    Identifies the caller for read-your-writes: the bearer token, else the client address
+    """
+    identity = request.headers.get("authorization") or (request.client.host if request.client else "")
+    return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+
+def _wrote(session: Session, tables):
+    if "client_key" in session.info and any(table not in STICKY_EXEMPT_TABLES for table in tables):
+        session.info["wrote"] = True
+
+
+def _after_flush(session: Session, flush_context):
+    _wrote(session, {
+        obj.__table__.name
+        for obj in itertools.chain(session.new, session.dirty, session.deleted)
+        if hasattr(obj, "__table__")
+    })
+
+
+def _do_orm_execute(state):
+    # Bulk UPDATE/DELETE/INSERT statements bypass the flush
+    if (state.is_insert or state.is_update or state.is_delete) and state.execution_options.get("read_your_writes", True):
+        _wrote(state.session, {getattr(getattr(state.statement, "table", None), "name", None)})
+
+
+def _after_commit(session: Session):
+    if session.info.pop("wrote", False):
+        replica_router.mark_write(session.info["client_key"])
+
+
+def _after_rollback(session: Session):
+    session.info.pop("wrote", None)
+
+
+if replica_router:
+    # Request sessions (get_db) remember whether they wrote anything and mark
+    # the client sticky to the primary once that commits
+    event.listen(SessionLocal, "after_flush", _after_flush)
+    event.listen(SessionLocal, "do_orm_execute", _do_orm_execute)
+    event.listen(SessionLocal, "after_commit", _after_commit)
+    event.listen(SessionLocal, "after_rollback", _after_rollback)
+
+
+def get_db(request: Request) -> Generator[Session, None, None]:
     """
     Database dependency for FastAPI endpoints
     """
     if not SessionLocal:
         raise RuntimeError("Database not configured")
     db = SessionLocal()
+    if replica_router:
+        db.info["client_key"] = client_key(request)
     try:
         yield db
     finally:
         db.close()
 
 
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Database dependency for read-only endpoints: a replica session when one
+    is configured, in sync and the client has not just written; otherwise
+    the primary
+    """
+    if not SessionLocal:
+        raise RuntimeError("Database not configured")
+    replica = None
+    if replica_router and not replica_router.recently_wrote(client_key(request)):
+        replica = replica_router.pick()
+    db = ReadSessionLocal(bind=replica) if replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def read_session() -> Session:
+    """
+    Read-only session for background jobs (replica when in sync, else primary)
+    """
+    replica = replica_router.pick() if replica_router else None
+    return ReadSessionLocal(bind=replica) if replica else SessionLocal()
+
+
+def get_pool_stats() -> List[Dict[str, object]]:
+    """
+    Pool state and checkout counters for the primary and each replica
+    """
+    engines = [engine] + (replica_router.engines if replica_router else [])
+    return [stats for stats in (pool_stats(e) for e in engines if e is not None) if stats]
+
+
 def create_tables():
     """
     Create all database tables
@@ -56,4 +261,4 @@ def create_tables():
     if engine:
         Base.metadata.create_all(bind=engine)
     else:
-        logger.warning("Skipping table creation - no database engine")
\ No newline at end of file
+        logger.warning("Skipping table creation - no database engine")
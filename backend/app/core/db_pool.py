@@ -0,0 +1,143 @@
+"""
+Connection pool configuration and metrics
+
+Pools are sized from Settings. In PgBouncer mode (transaction pooling, e.g.
+the Supabase pooler on port 6543) drivers must not keep server-side
+prepared statements, because consecutive transactions can run on different
+server connections; with database_null_pool the external pooler does all
+pooling and each checkout opens a fresh client connection.
+"""
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import NullPool, QueuePool
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+
+from app.core import metrics as prometheus
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Checkouts slower than this are logged (pool exhausted or database slow to connect)
+SLOW_CHECKOUT_SECONDS = 1.0
+
+
+class PoolMetrics:
+    """
+    Checkout counters for one engine's pool (per process)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        prometheus.observe_pool_checkout(self.name, seconds, timed_out)
+        if seconds >= SLOW_CHECKOUT_SECONDS:
+            logger.warning(f"Slow {self.name} pool checkout: {seconds:.2f}s{' (timed out)' if timed_out else ''}")
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        """
+        Counters plus the pool's current state; size/overflow are None for NullPool
+        """
+        queued = isinstance(pool, QueuePool)
+        with self._lock:
+            return {
+                "pool": self.name,
+                "size": pool.size() if queued else None,
+                "max_overflow": settings.database_max_overflow if queued else None,
+                "in_use": pool.checkedout() if queued else None,
+                "idle": pool.checkedin() if queued else None,
+                "overflow": max(pool.overflow(), 0) if queued else None,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class _TimedCheckout:
+    """
+    Times every checkout (queueing for a free connection plus connecting)
+    """
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        if self.metrics:
+            self.metrics.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a new pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def _connect_args(url: str) -> Dict[str, Any]:
+    """
+    Driver options that keep transaction poolers working
+    """
+    if not settings.database_pgbouncer_mode:
+        return {}
+    driver = make_url(url).get_driver_name()
+    if driver == "psycopg":
+        return {"prepare_threshold": None}
+    # psycopg2 binds parameters client-side and never prepares statements
+    return {}
+
+
+def engine_options(url: str, connect_args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    options = {"connect_args": {**_connect_args(url), **(connect_args or {})}}
+    if settings.database_null_pool:
+        # Connections are always fresh, a ping would only add a round trip
+        options["poolclass"] = InstrumentedNullPool
+    else:
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_pre_ping=settings.database_pool_pre_ping,
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout,
+            pool_recycle=settings.database_pool_recycle,
+        )
+    return options
+
+
+def create_pooled_engine(url: str, name: str, connect_args: Optional[Dict[str, Any]] = None) -> Engine:
+    engine = create_engine(url, **engine_options(url, connect_args))
+    engine.pool.metrics = PoolMetrics(name)
+    return engine
+
+
+def pool_stats(engine: Engine) -> Optional[Dict[str, Any]]:
+    metrics = getattr(engine.pool, "metrics", None)
+    return metrics.snapshot(engine.pool) if metrics else None
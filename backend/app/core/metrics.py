@@ -0,0 +1,267 @@
+"""
+Prometheus metrics
+
+Set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory (cleared
+before the server starts) when running several workers: each worker then
+writes its samples there and /metrics aggregates all of them, so a scrape
+sees the whole server rather than whichever worker answered it. Without it
+metrics are kept per process.
+
+Queue depths are read from Redis when /metrics is scraped.
+
+Celery workers (SendGrid and Pusher delivery run there) serve their own
+metrics on worker_metrics_port; scrape each worker there as well. With a
+prefork pool, give the worker its own PROMETHEUS_MULTIPROC_DIR so the
+server aggregates every pool process.
+"""
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterator, Optional, Tuple
+import asyncio
+import logging
+import os
+import secrets
+import time
+
+from app.core.config import settings
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+        generate_latest, multiprocess, start_http_server
+    )
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    generate_latest = None
+    print("⚠️ WARNING: prometheus-client not installed. /metrics disabled.")
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Celery queues (see celery_app task_routes and the worker -Q option); the
+# Redis broker keeps each one as a list under the queue name
+BACKGROUND_QUEUES = ("default", "notifications", "maintenance")
+
+# Label for requests that matched no route, so scanners can't add label values
+UNMATCHED_ROUTE = "unmatched"
+
+POOL_STATES = ("in_use", "idle", "overflow")
+
+if generate_latest:
+    HTTP_REQUEST_DURATION = Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template",
+        ["method", "route", "status"]
+    )
+    HTTP_REQUESTS_IN_PROGRESS = Gauge(
+        "http_requests_in_progress",
+        "HTTP requests being served",
+        multiprocess_mode="livesum"
+    )
+    DB_POOL_CONNECTIONS = Gauge(
+        "db_pool_connections",
+        "Database pool connections by state",
+        ["pool", "state"],
+        multiprocess_mode="livesum"
+    )
+    DB_POOL_CHECKOUT = Histogram(
+        "db_pool_checkout_seconds",
+        "Time to check a connection out of the pool",
+        ["pool"],
+        buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+    )
+    DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+        "db_pool_checkout_timeouts",
+        "Checkouts that gave up waiting for a free connection",
+        ["pool"]
+    )
+    OUTBOUND_REQUEST_DURATION = Histogram(
+        "outbound_request_duration_seconds",
+        "Latency of calls to external services",
+        ["service", "operation", "outcome"]
+    )
+
+
+# Recording
+
+def observe_request(method: str, route: Optional[str], status: int, seconds: float):
+    if generate_latest:
+        HTTP_REQUEST_DURATION.labels(method, route or UNMATCHED_ROUTE, str(status)).observe(seconds)
+
+
+@contextmanager
+def track_in_progress() -> Iterator[None]:
+    if not generate_latest:
+        yield
+        return
+    HTTP_REQUESTS_IN_PROGRESS.inc()
+    try:
+        yield
+    finally:
+        HTTP_REQUESTS_IN_PROGRESS.dec()
+
+
+def observe_pool_checkout(pool: str, seconds: float, timed_out: bool = False):
+    if not generate_latest:
+        return
+    if timed_out:
+        DB_POOL_CHECKOUT_TIMEOUTS.labels(pool).inc()
+    else:
+        DB_POOL_CHECKOUT.labels(pool).observe(seconds)
+
+
+def update_pool_gauges():
+    """
+    Copy this process's pool state into the gauges (called after each
+    request: in multiprocess mode a scrape only reaches one worker)
+    """
+    if not generate_latest:
+        return
+    from app.core.database import get_pool_stats
+    for stats in get_pool_stats():
+        if stats["in_use"] is None:
+            # NullPool keeps no connections
+            continue
+        for state in POOL_STATES:
+            DB_POOL_CONNECTIONS.labels(stats["pool"], state).set(stats[state])
+
+
+@contextmanager
+def track_outbound(service: str, operation: str) -> Iterator[None]:
+    """
+    Time a call to an external service:
+
+        with track_outbound("sendgrid", "send"):
+            client.send(...)
+
+    Works around awaits too; outcome is "error" when the block raises
+    """
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        if generate_latest:
+            OUTBOUND_REQUEST_DURATION.labels(service, operation, outcome).observe(time.perf_counter() - started)
+
+
+def outbound(service: str, operation: Optional[str] = None) -> Callable:
+    """
+    Decorator form of track_outbound; operation defaults to the function name
+    """
+    def decorator(func: Callable) -> Callable:
+        name = operation or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track_outbound(service, name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_outbound(service, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Scraping
+
+class BackgroundQueueCollector:
+    """
+    Depth of the Celery queues, the dead letter list and the accounts
+    waiting to be purged, read from Redis on each scrape
+    """
+
+    def collect(self):
+        from app.core.redis import get_redis
+        from app.services.account_purge import PURGE_STATS_KEY
+
+        try:
+            pipe = get_redis().pipeline()
+            for queue in BACKGROUND_QUEUES:
+                pipe.llen(queue)
+            pipe.llen(settings.task_dead_letter_key)
+            pipe.hget(PURGE_STATS_KEY, "pending")
+            *depths, dead_letters, purge_pending = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not read queue depths: {e}")
+            return
+
+        queue_depth = GaugeMetricFamily(
+            "background_queue_depth", "Tasks waiting in each Celery queue", labels=["queue"]
+        )
+        for queue, depth in zip(BACKGROUND_QUEUES, depths):
+            queue_depth.add_metric([queue], depth)
+        yield queue_depth
+        yield GaugeMetricFamily(
+            "background_dead_letters", "Tasks that exhausted their retries", value=dead_letters
+        )
+        if purge_pending is not None:
+            yield GaugeMetricFamily(
+                "account_purge_pending", "Accounts due for purge at the last purge run", value=int(purge_pending)
+            )
+
+
+if generate_latest:
+    _scrape_registry = CollectorRegistry()
+    _scrape_registry.register(BackgroundQueueCollector())
+
+
+def scrape_status(authorization: Optional[str]) -> int:
+    """
+    Whether to serve /metrics: 200 to serve it, 401 for a wrong token, 404
+    when metrics are off - or unprotected outside development, so a deploy
+    that forgot METRICS_TOKEN doesn't publish its internals
+    """
+    if not settings.metrics_enabled:
+        return 404
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        return 200 if secrets.compare_digest(authorization or "", expected) else 401
+    return 200 if settings.environment == "development" else 404
+
+
+def _registry():
+    """
+    Every process's samples in multiprocess mode, this process's otherwise
+    """
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Exposition text for /metrics: the app's samples plus the queue depths
+    """
+    if not generate_latest:
+        raise RuntimeError("prometheus-client not installed")
+    return generate_latest(_registry()) + generate_latest(_scrape_registry), CONTENT_TYPE_LATEST
+
+
+def start_worker_server(port: int):
+    """
+    Serve a Celery worker's metrics over HTTP (queue depths are left to the
+    API's /metrics so they aren't reported twice)
+    """
+    if not generate_latest:
+        return
+    start_http_server(port, registry=_registry())
+    logger.info(f"Worker metrics on :{port}/metrics")
+
+
+def mark_process_dead():
+    """
+    Drop this worker's live gauges from the aggregate (call on shutdown)
+    """
+    if generate_latest and MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
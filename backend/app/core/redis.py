@@ -0,0 +1,13 @@
+"""
+Shared Redis client (task idempotency keys, dead letters, caches)
+"""
+from functools import lru_cache
+import redis
+
+from app.core.config import settings
+
+
+@lru_cache()
+def get_redis() -> redis.Redis:
+    """Get cached Redis client instance"""
+    return redis.Redis.from_url(settings.redis_url, decode_responses=True)
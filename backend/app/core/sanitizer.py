@@ -132,6 +132,20 @@ def sanitize_filename(filename: Optional[str]) -> Optional[str]:
     return filename.strip()
 
 
+def sanitize_list(values: List[Any]) -> List[str]:
+    """
+    Sanitize the elements of a list field (e.g. certifications) as plain text.
+    
+    Args:
+        values: List of values
+    
+    Returns:
+        Cleaned strings, with empty entries dropped
+    """
+    cleaned = (sanitize_plain_text(str(value)) for value in values if value is not None)
+    return [value for value in cleaned if value]
+
+
 def sanitize_dict(data: Dict[str, Any], text_fields: List[str], html_fields: List[str] = None) -> Dict[str, Any]:
     """
     Sanitize multiple fields in a dictionary.
@@ -231,6 +245,28 @@ def validate_file_upload(
     return True, None
 
 
+# RFQ fields that should be plain text (no HTML)
+RFQ_PLAIN_TEXT_FIELDS = [
+    'title',
+    'material_category',
+    'delivery_location'
+]
+
+# RFQ fields that can contain safe HTML (rich text)
+RFQ_HTML_FIELDS = [
+    'specifications'
+]
+
+# RFQ list fields (TEXT[]) - every element is plain text
+RFQ_LIST_FIELDS = [
+    'required_certifications',
+    'preferred_suppliers'
+]
+
+# Characters bleach escapes or parses; values without them come back unchanged
+_MARKUP_CHARS = frozenset('<>&')
+
+
 # Example usage for RFQ specifications field
 def sanitize_rfq_data(rfq_data: dict) -> dict:
     """
@@ -242,22 +278,61 @@ def sanitize_rfq_data(rfq_data: dict) -> dict:
     Returns:
         Sanitized dictionary
     """
-    # Fields that should be plain text (no HTML)
-    plain_text_fields = [
-        'title',
-        'material_category',
-        'delivery_location',
-        'preferred_suppliers'
-    ]
+    sanitized = sanitize_dict(rfq_data, RFQ_PLAIN_TEXT_FIELDS, RFQ_HTML_FIELDS)
+    for field in RFQ_LIST_FIELDS:
+        if isinstance(sanitized.get(field), list):
+            sanitized[field] = sanitize_list(sanitized[field])
+    return sanitized
+
+
+
+def sanitize_rfq_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Sanitize many RFQ rows (bulk import) with the same rules as sanitize_rfq_data.
     
-    # Fields that can contain safe HTML (rich text)
-    html_fields = [
-        'specifications',
-        'required_certifications'
-    ]
+    Works column by column: each distinct value is cleaned once (BOMs repeat
+    categories, locations and certifications on every line), and values
+    without markup characters skip the HTML parser entirely.
     
-    return sanitize_dict(rfq_data, plain_text_fields, html_fields)
-
+    Args:
+        rows: List of RFQ field dictionaries
+    
+    Returns:
+        New list of sanitized dictionaries
+    """
+    sanitized = [row.copy() for row in rows]
+    
+    def clean(value: str, plain: bool, cache: Dict[str, Optional[str]]) -> Optional[str]:
+        cleaned = cache.get(value)
+        if cleaned is None:
+            if not _MARKUP_CHARS.intersection(value):
+                # Nothing for bleach to strip or escape
+                cleaned = value.strip() if plain else value
+            elif plain:
+                cleaned = sanitize_plain_text(value)
+            else:
+                cleaned = sanitize_html(value, strip=False)
+            cache[value] = cleaned
+        return cleaned
+    
+    columns = [(field, True) for field in RFQ_PLAIN_TEXT_FIELDS] + [(field, False) for field in RFQ_HTML_FIELDS]
+    for field, plain in columns:
+        cache: Dict[str, Optional[str]] = {}
+        for row in sanitized:
+            value = row.get(field)
+            if isinstance(value, str):
+                row[field] = clean(value, plain, cache)
+    
+    for field in RFQ_LIST_FIELDS:
+        cache = {}
+        for row in sanitized:
+            values = row.get(field)
+            if isinstance(values, list):
+                row[field] = [
+                    cleaned for cleaned in (clean(str(value), True, cache) for value in values) if cleaned
+                ]
+    
+    return sanitized
 
 # Example usage for company data
 def sanitize_company_data(company_data: dict) -> dict:
@@ -278,12 +353,23 @@ def sanitize_company_data(company_data: dict) -> dict:
     ]
     
     html_fields = [
-        'description',
+        'description'
+    ]
+    
+    # TEXT[] columns
+    list_fields = [
         'capabilities',
-        'certifications'
+        'certifications',
+        'materials',
+        'naics_codes',
+        'business_categories',
+        'raw_materials_focus'
     ]
     
     sanitized = sanitize_dict(company_data, plain_text_fields, html_fields)
+    for field in list_fields:
+        if isinstance(sanitized.get(field), list):
+            sanitized[field] = sanitize_list(sanitized[field])
     
     # Sanitize website URL
     if 'website' in sanitized:
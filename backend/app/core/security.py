@@ -11,6 +11,7 @@ import httpx
 import os
 
 from app.core.config import settings
+from app.core.metrics import track_outbound
 from app.schemas.token import TokenPayload
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
@@ -140,13 +141,14 @@ async def verify_supabase_token(token: str) -> Optional[dict]:
     """
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SUPABASE_URL}/auth/v1/user",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "apikey": os.getenv("SUPABASE_ANON_KEY", "")
-                }
-            )
+            with track_outbound("supabase", "get_user"):
+                response = await client.get(
+                    f"{SUPABASE_URL}/auth/v1/user",
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "apikey": os.getenv("SUPABASE_ANON_KEY", "")
+                    }
+                )
             
             if response.status_code == 200:
                 return response.json()
@@ -161,7 +163,7 @@ def verify_supabase_token_sync(token: str) -> Optional[dict]:
     Synchronous version of Supabase token verification
     """
     try:
-        with httpx.Client() as client:
+        with httpx.Client() as client, track_outbound("supabase", "get_user"):
             response = client.get(
                 f"{SUPABASE_URL}/auth/v1/user",
                 headers={
@@ -1,18 +1,23 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
 import time
 import logging
 from contextlib import asynccontextmanager
 
+from app.core import metrics
 from app.core.config import settings
 from app.core.database import create_tables
 from app.core.sentry_config import init_sentry
 from app.api import auth, rfq, mfa, billing
-from app.api import health, data_management
+from app.api import health, data_management, files, storage
 from app.services.linkedin import linkedin_service
+from app.services.health_sampler import health_sampler
 from app.middleware.security_headers import SecurityHeadersMiddleware
+from app.middleware.query_profiler import QueryProfilerMiddleware
+from app.middleware.metrics import PrometheusMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -69,10 +74,15 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Database table creation skipped (using Supabase): {e}")
     
+    # Refresh /health/detailed checks in the background
+    health_sampler.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down LinkedProcurement API")
+    await health_sampler.stop()
+    metrics.mark_process_dead()
 
 
 # Create FastAPI app
@@ -146,6 +156,14 @@ async def rate_limit_middleware(request: Request, call_next):
     response = await call_next(request)
     return response
 
+# 4. SQL profiling (statement count and DB time per request)
+if settings.sql_profiler_enabled:
+    app.add_middleware(QueryProfilerMiddleware)
+
+# 5. Prometheus request metrics (latency by route, in-flight requests)
+if settings.metrics_enabled:
+    app.add_middleware(PrometheusMiddleware)
+
 # Trusted host middleware (security)
 if not settings.debug:
     app.add_middleware(
@@ -216,6 +234,26 @@ async def health_check(request: Request):
     }
 
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """
+    Prometheus exposition (all workers when PROMETHEUS_MULTIPROC_DIR is set)
+    """
+    scrape_status = metrics.scrape_status(request.headers.get("authorization"))
+    if scrape_status == 404:
+        # Fails closed: off, or no METRICS_TOKEN outside development
+        raise HTTPException(status_code=404, detail="Endpoint not found")
+    if scrape_status == 401:
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    try:
+        # Reads worker files and Redis - keep it off the event loop
+        body, content_type = await run_in_threadpool(metrics.render)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return Response(content=body, media_type=content_type)
+
+
 # CORS test endpoint
 @app.get("/cors-test")
 async def cors_test(request: Request):
@@ -275,6 +313,8 @@ app.include_router(health.router, prefix="/api/v1")
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(mfa.router, prefix="/api/v1")
 app.include_router(rfq.router, prefix="/api/v1")
+app.include_router(files.router, prefix="/api/v1")
+app.include_router(storage.router, prefix="/api/v1")
 app.include_router(data_management.router, prefix="/api/v1")
 app.include_router(billing.router)
 
@@ -0,0 +1,45 @@
+"""
+Request metrics for Prometheus
+
+Latency is labelled with the route template (/api/v1/rfqs/{rfq_id}), not
+the raw path, so label values stay bounded. Unlike Sentry tracing this
+sees every request, which is what SLO dashboards need.
+"""
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+import logging
+import time
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Scrapes and platform probes would only dilute the latency figures
+EXCLUDED_PATHS = {"/metrics", "/healthz"}
+
+
+class PrometheusMiddleware(BaseHTTPMiddleware):
+    """
+    Record latency, status and in-flight count of each request
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in EXCLUDED_PATHS:
+            return await call_next(request)
+
+        started = time.perf_counter()
+        status = 500
+        try:
+            with metrics.track_in_progress():
+                response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            metrics.observe_request(
+                request.method, getattr(route, "path", None), status, time.perf_counter() - started
+            )
+            try:
+                metrics.update_pool_gauges()
+            except Exception as e:
+                logger.debug(f"Could not update pool gauges: {e}")
@@ -0,0 +1,177 @@
+"""
+Per-request SQL profiling
+
+Cursor events on every engine (primary and replicas) count statements and
+database time for the request being served. Results go out as a
+Server-Timing header and a JSON log line; statements repeated many times in
+one request (the N+1 pattern) are logged with their counts. With
+sql_query_budget set, requests running more statements are logged, or
+failed with a 500 when sql_query_budget_fail is on (tests/CI).
+
+Statements run after the response has started (streamed exports) are not
+included.
+"""
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+import json
+import logging
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.sql")
+
+# Statement text kept in logs
+STATEMENT_LOG_LENGTH = 300
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    """
+    Statements run in one request (or count_queries block)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+        # Sync endpoints and dependencies run on threadpool threads
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Dict[str, object]]:
+        return [
+            {"statement": statement[:STATEMENT_LOG_LENGTH], "count": count}
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+# Cursor events
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+event.listen(Engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Count the statements run inside the block:
+
+        with count_queries() as stats:
+            ...
+        assert stats.count <= 3
+    """
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Raise QueryBudgetExceeded when the block runs more than max_queries statements
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{stats.count} statements (budget {max_queries}); "
+            f"repeated: {stats.repeated(settings.sql_repeated_statement_threshold)}"
+        )
+
+
+class QueryProfilerMiddleware(BaseHTTPMiddleware):
+    """
+    Profile the SQL of each request
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        stats = QueryStats()
+        token = _current.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            _current.reset(token)
+
+        if not stats.count:
+            return response
+
+        route = request.scope.get("route")
+        budget = settings.sql_query_budget
+        over_budget = budget is not None and stats.count > budget
+        repeated = stats.repeated(settings.sql_repeated_statement_threshold)
+
+        record = {
+            "event": "sql_profile",
+            "method": request.method,
+            "route": getattr(route, "path", request.url.path),
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.seconds * 1000, 1),
+        }
+        if repeated:
+            record["repeated"] = repeated
+        if over_budget:
+            record["budget"] = budget
+
+        if repeated or over_budget:
+            logger.warning(json.dumps(record))
+        else:
+            logger.debug(json.dumps(record))
+
+        if over_budget and settings.sql_query_budget_fail:
+            return JSONResponse(
+                status_code=500,
+                content={
+                    "detail": f"Query budget exceeded: {stats.count} statements (budget {budget})",
+                    "repeated": repeated
+                },
+                headers={"Server-Timing": stats.server_timing()}
+            )
+
+        response.headers.append("Server-Timing", stats.server_timing())
+        return response
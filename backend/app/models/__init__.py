@@ -1,4 +1,5 @@
 # Import all models here to ensure they are available for SQLAlchemy
-from .user import User, Company, POC, RFQ, RFQResponse, Message
+from .user import User, Company, POC, RFQ, RFQResponse, RFQDistribution, Message
+from .geo import GeocodeCache
 
-__all__ = ["User", "Company", "POC", "RFQ", "RFQResponse", "Message"]
\ No newline at end of file
+__all__ = ["User", "Company", "POC", "RFQ", "RFQResponse", "RFQDistribution", "Message", "GeocodeCache"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index, text, event, DDL
 from sqlalchemy.sql import func
 from app.core.database import Base
 import uuid
@@ -8,17 +8,28 @@ class AuditLog(Base):
     """
     Audit log for tracking all sensitive operations
     Required for SOC 2 compliance
+
+    Range-partitioned by month on timestamp (see AuditPartitionService):
+    time-bounded queries only touch the partitions they need, and old
+    months are archived to object storage and dropped whole.
     """
     __tablename__ = "audit_logs"
-    
+    __table_args__ = (
+        # Lead with user_id/action, so they also serve single-column lookups
+        Index("ix_audit_logs_user_timestamp", "user_id", text("timestamp DESC")),
+        Index("ix_audit_logs_action_email_timestamp", "action", "user_email", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+    
+    # The partition key has to be part of the primary key
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     
     # Who performed the action
-    user_id = Column(String, index=True, nullable=True)
+    user_id = Column(String, nullable=True)
     user_email = Column(String, nullable=True)
     
     # What action was performed
-    action = Column(String, nullable=False, index=True)  # e.g., "user.login", "rfq.create", "data.access"
+    action = Column(String, nullable=False)  # e.g., "user.login", "rfq.create", "data.access"
     resource_type = Column(String, nullable=True, index=True)  # e.g., "user", "rfq", "company"
     resource_id = Column(String, nullable=True, index=True)
     
@@ -37,7 +48,16 @@ class AuditLog(Base):
     error_message = Column(Text, nullable=True)
     
     # Timestamp
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False, index=True)
     
     def __repr__(self):
         return f"<AuditLog {self.action} by {self.user_email} at {self.timestamp}>"
+
+
+# Catch-all partition for rows outside the monthly ones, so inserts never
+# fail before the first partition maintenance run
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT").execute_if(dialect="postgresql")
+)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, Float, Text
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class GeocodeCache(Base):
+    """
+    Geocoding results per normalized location string, so each distinct
+    address is sent to the provider once
+    """
+    __tablename__ = "geocode_cache"
+
+    query = Column(String(500), primary_key=True)  # Normalized location text
+    latitude = Column(Float, nullable=True)  # Null when the provider found nothing
+    longitude = Column(Float, nullable=True)
+    display_name = Column(Text, nullable=True)
+    provider = Column(String(50), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer, ForeignKey, Numeric
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer, ForeignKey, Numeric, Float, UniqueConstraint, Index, text, event, DDL
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -14,7 +14,8 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=True)  # Can be null for LinkedIn-only users
     name = Column(String(255), nullable=False)
-    profile_picture_url = Column(Text, nullable=True)
+    profile_picture_url = Column(Text, nullable=True)  # External URL (e.g. LinkedIn)
+    profile_picture_key = Column(String(255), nullable=True)  # Uploaded picture in object storage
     
     # LinkedIn specific fields
     linkedin_id = Column(String(255), unique=True, nullable=True, index=True)
@@ -47,6 +48,32 @@ class User(Base):
 
 class Company(Base):
     __tablename__ = "companies"
+    __table_args__ = tuple(
+        # Containment filters (@>, &&) on the capability arrays
+        Index(f"ix_companies_{column}_gin", column, postgresql_using="gin")
+        for column in (
+            "certifications", "capabilities", "materials",
+            "naics_codes", "business_categories", "raw_materials_focus"
+        )
+    ) + (
+        # Supplier search without Elasticsearch (see PostgresSearchService)
+        Index("ix_companies_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index(
+            "ix_companies_description_fts",
+            text("to_tsvector('english'::regconfig, coalesce(description, ''))"),
+            postgresql_using="gin"
+        ),
+        Index("ix_companies_industry", "industry"),
+        Index("ix_companies_response_rate", "response_rate"),
+        Index("ix_companies_verified_response_rate", "response_rate", postgresql_where=text("is_verified")),
+        # Radius searches (earthdistance, see GeoService)
+        Index(
+            "ix_companies_earth",
+            text("ll_to_earth(latitude, longitude)"),
+            postgresql_using="gist",
+            postgresql_where=text("latitude IS NOT NULL AND longitude IS NOT NULL")
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -58,6 +85,9 @@ class Company(Base):
     # Company details
     industry = Column(String(255), nullable=True)
     headquarters_location = Column(String(255), nullable=True)
+    latitude = Column(Float, nullable=True)  # Geocoded from headquarters_location
+    longitude = Column(Float, nullable=True)
+    geocoded_at = Column(DateTime, nullable=True)  # Set once geocoding was attempted
     employee_count = Column(String(50), nullable=True)  # e.g., "51-200", "1001-5000"
     founded_year = Column(Integer, nullable=True)
     description = Column(Text, nullable=True)
@@ -66,25 +96,26 @@ class Company(Base):
     
     # Company type and business focus
     company_type = Column(String(100), nullable=True)  # manufacturer, distributor, service_provider, both
-    business_categories = Column(Text, nullable=True)  # JSON array of categories supplier focuses on
-    raw_materials_focus = Column(Text, nullable=True)  # JSON array of raw materials company works with
+    business_categories = Column(ARRAY(Text), nullable=True)  # Categories supplier focuses on
+    raw_materials_focus = Column(ARRAY(Text), nullable=True)  # Raw materials company works with
     
     # Business verification
     duns_number = Column(String(50), nullable=True)
     is_verified = Column(Boolean, default=False)
     verification_source = Column(String(100), nullable=True)  # linkedin, duns, manual
     
-    # Capabilities and certifications (stored as JSON)
-    certifications = Column(Text, nullable=True)  # JSON string
-    capabilities = Column(Text, nullable=True)  # JSON string
-    materials = Column(Text, nullable=True)  # JSON string
-    naics_codes = Column(Text, nullable=True)  # JSON string
+    # Capabilities and certifications (GIN-indexed, filter with contains/overlap)
+    certifications = Column(ARRAY(Text), nullable=True)
+    capabilities = Column(ARRAY(Text), nullable=True)
+    materials = Column(ARRAY(Text), nullable=True)
+    naics_codes = Column(ARRAY(Text), nullable=True)
     
     # Performance metrics
     response_rate = Column(Integer, default=0)  # Percentage
     avg_response_time_hours = Column(Integer, nullable=True)
     total_rfqs_received = Column(Integer, default=0)
     total_rfqs_responded = Column(Integer, default=0)
+    total_response_hours = Column(Float, default=0)  # Running sum behind avg_response_time_hours
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -96,6 +127,23 @@ class Company(Base):
     received_responses = relationship("RFQResponse", back_populates="supplier_company")
 
 
+@event.listens_for(Company.headquarters_location, "set")
+def _headquarters_location_changed(company, value, oldvalue, initiator):
+    # A moved company is picked up again by the geocoding backfill, which
+    # replaces the coordinates (bulk UPDATE statements don't fire this)
+    if value != oldvalue:
+        company.geocoded_at = None
+
+
+# Index extensions must exist before companies is created (create_tables)
+for extension in ("pg_trgm", "cube", "earthdistance"):
+    event.listen(
+        Company.__table__,
+        "before_create",
+        DDL(f"CREATE EXTENSION IF NOT EXISTS {extension}").execute_if(dialect="postgresql")
+    )
+
+
 class POC(Base):
     __tablename__ = "pocs"
 
@@ -111,8 +159,9 @@ class POC(Base):
     
     # Performance metrics
     avg_response_time_hours = Column(Integer, nullable=True)
-    response_rate = Column(Integer, default=0)  # Percentage
+    response_rate = Column(Integer, default=0)  # Percentage of the company's received RFQs this POC answered
     total_rfqs_handled = Column(Integer, default=0)
+    total_response_hours = Column(Float, default=0)  # Running sum behind avg_response_time_hours
     
     # Timestamps
     last_active_at = Column(DateTime, nullable=True)
@@ -127,6 +176,19 @@ class POC(Base):
 
 class RFQ(Base):
     __tablename__ = "rfqs"
+    __table_args__ = (
+        # Expiry sweeper scans only active RFQs (see RFQExpiryService)
+        Index("ix_rfqs_active_expires_at", "expires_at", postgresql_where=text("status = 'active'")),
+        # Public listing by status, newest first (list_rfqs)
+        Index(
+            "ix_rfqs_public_status_created_at",
+            "status", text("created_at DESC"),
+            postgresql_where=text("visibility = 'public'")
+        ),
+        Index("ix_rfqs_buyer_created_at", "buyer_id", "created_at"),
+        Index("ix_rfqs_required_certifications_gin", "required_certifications", postgresql_using="gin"),
+        Index("ix_rfqs_preferred_suppliers_gin", "preferred_suppliers", postgresql_using="gin"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     buyer_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
@@ -153,15 +215,16 @@ class RFQ(Base):
     incoterm = Column(String(20), nullable=True)  # e.g., "FOB", "CIF", "EXW", "DDP"
     commodity = Column(String(255), nullable=True, index=True)
     
-    # Requirements (stored as JSON)
-    required_certifications = Column(Text, nullable=True)  # JSON string
-    preferred_suppliers = Column(Text, nullable=True)  # JSON string
-    attachments = Column(Text, nullable=True)  # JSON string of file URLs
+    # Requirements
+    required_certifications = Column(ARRAY(Text), nullable=True)  # GIN-indexed
+    preferred_suppliers = Column(ARRAY(Text), nullable=True)  # Company ids or names, GIN-indexed
+    attachments = Column(JSONB, nullable=True)  # File URLs/descriptors
     
     # Status and lifecycle
     status = Column(String(50), default="active", index=True)  # active, closed, expired, cancelled
     visibility = Column(String(50), default="public")  # public, private, invited_only
     expires_at = Column(DateTime, nullable=True)
+    expiry_notified_at = Column(DateTime, nullable=True)  # Expiring-soon notification sent
     
     # Metrics
     view_count = Column(Integer, default=0)
@@ -176,10 +239,31 @@ class RFQ(Base):
     buyer_company = relationship("Company", back_populates="sent_rfqs")
     responses = relationship("RFQResponse", back_populates="rfq")
     messages = relationship("Message", back_populates="rfq")
+    distributions = relationship("RFQDistribution", back_populates="rfq")
+
+
+class RFQDistribution(Base):
+    """
+    A supplier company an RFQ was sent to (invited, matched, or discovered
+    by responding). Source of truth for Company.total_rfqs_received.
+    """
+    __tablename__ = "rfq_distributions"
+    __table_args__ = (UniqueConstraint("rfq_id", "company_id", name="uq_rfq_distributions_rfq_company"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    rfq_id = Column(UUID(as_uuid=True), ForeignKey("rfqs.id", ondelete="CASCADE"), nullable=False, index=True)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True)
+    channel = Column(String(50), default="invited")  # invited, matched, direct
+    distributed_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    rfq = relationship("RFQ", back_populates="distributions")
 
 
 class RFQResponse(Base):
     __tablename__ = "rfq_responses"
+    # One response per supplier company per RFQ
+    __table_args__ = (UniqueConstraint("rfq_id", "supplier_company_id", name="uq_rfq_responses_rfq_supplier"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     rfq_id = Column(UUID(as_uuid=True), ForeignKey("rfqs.id"), nullable=False, index=True)
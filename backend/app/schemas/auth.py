@@ -20,6 +20,7 @@ class UserResponse(BaseModel):
     name: str
     user_type: Optional[str] = None
     profile_picture_url: Optional[str] = None
+    profile_picture_thumbnail_url: Optional[str] = None
     linkedin_profile_url: Optional[str] = None
     is_verified: bool
     verification_status: str
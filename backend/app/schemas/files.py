@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+
+class MultipartUploadCreate(BaseModel):
+    filename: str
+    file_size: int = Field(gt=0)  # bytes
+    content_type: Optional[str] = None
+
+
+class MultipartUploadParts(BaseModel):
+    file_key: str
+    upload_id: str
+    part_numbers: List[int]
+
+
+class UploadedPart(BaseModel):
+    part_number: int
+    etag: str
+
+
+class MultipartUploadComplete(BaseModel):
+    file_key: str
+    upload_id: str
+    original_filename: str
+    parts: List[UploadedPart]
+
+
+class MultipartUploadAbort(BaseModel):
+    file_key: str
+    upload_id: str
+
+
+class PresignFile(BaseModel):
+    file_key: str
+    download_filename: Optional[str] = None
+
+
+class BatchPresignRequest(BaseModel):
+    files: List[PresignFile]
+    expiration: int = 3600  # seconds
@@ -1,6 +1,36 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, field_validator
+from typing import Any, Optional, List, Dict
 from datetime import datetime
+import json
+
+
+def _string_list(value: Any) -> Any:
+    """
+    Lists pass through; strings may be a JSON array (older clients) or
+    comma-separated text (forms, spreadsheet cells)
+    """
+    if not isinstance(value, str):
+        return value
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        parsed = value
+    if isinstance(parsed, list):
+        return [str(item).strip() for item in parsed if str(item).strip()]
+    return [item.strip() for item in str(parsed).split(",") if item.strip()]
+
+
+def _json_list(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return _string_list(value)
+        return parsed if isinstance(parsed, list) or parsed is None else [parsed]
+    return value
 
 
 class RFQBase(BaseModel):
@@ -11,9 +41,9 @@ class RFQBase(BaseModel):
     specifications: Optional[str] = None
     delivery_deadline: Optional[datetime] = None
     delivery_location: Optional[str] = None
-    required_certifications: Optional[str] = None  # JSON string
-    preferred_suppliers: Optional[str] = None  # JSON string
-    attachments: Optional[str] = None  # JSON string
+    required_certifications: Optional[List[str]] = None
+    preferred_suppliers: Optional[List[str]] = None  # Company ids (or names)
+    attachments: Optional[List[Any]] = None  # File URLs/descriptors
     visibility: str = "public"  # public, private, invited_only
     # Enhanced RFQ fields
     part_number: Optional[str] = None
@@ -27,11 +57,37 @@ class RFQBase(BaseModel):
     incoterm: Optional[str] = None  # e.g., "FOB", "CIF", "EXW", "DDP"
     commodity: Optional[str] = None
 
+    @field_validator("required_certifications", "preferred_suppliers", mode="before")
+    @classmethod
+    def split_lists(cls, value):
+        return _string_list(value)
+
+    @field_validator("attachments", mode="before")
+    @classmethod
+    def parse_attachments(cls, value):
+        return _json_list(value)
+
 
 class RFQCreate(RFQBase):
     expires_at: Optional[datetime] = None
 
 
+class RFQImportRowError(BaseModel):
+    row: int  # Spreadsheet row number (header is row 1)
+    errors: List[Dict[str, str]]  # [{"field": ..., "message": ...}]
+
+
+class RFQImportResult(BaseModel):
+    total_rows: int
+    created: int
+    valid: int
+    failed: int
+    dry_run: bool
+    rfq_ids: List[str]
+    errors: List[RFQImportRowError]
+    ignored_columns: List[str]
+
+
 class RFQUpdate(BaseModel):
     title: Optional[str] = None
     material_category: Optional[str] = None
@@ -40,9 +96,9 @@ class RFQUpdate(BaseModel):
     specifications: Optional[str] = None
     delivery_deadline: Optional[datetime] = None
     delivery_location: Optional[str] = None
-    required_certifications: Optional[str] = None
-    preferred_suppliers: Optional[str] = None
-    attachments: Optional[str] = None
+    required_certifications: Optional[List[str]] = None
+    preferred_suppliers: Optional[List[str]] = None
+    attachments: Optional[List[Any]] = None
     visibility: Optional[str] = None
     status: Optional[str] = None
     expires_at: Optional[datetime] = None
@@ -58,6 +114,16 @@ class RFQUpdate(BaseModel):
     incoterm: Optional[str] = None
     commodity: Optional[str] = None
 
+    @field_validator("required_certifications", "preferred_suppliers", mode="before")
+    @classmethod
+    def split_lists(cls, value):
+        return _string_list(value)
+
+    @field_validator("attachments", mode="before")
+    @classmethod
+    def parse_attachments(cls, value):
+        return _json_list(value)
+
 
 class RFQResponse(RFQBase):
     id: str
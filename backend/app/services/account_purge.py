@@ -0,0 +1,325 @@
+from sqlalchemy import select, delete, update, func, or_
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+from datetime import datetime, timedelta
+import logging
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.user import User, POC, RFQ, RFQResponse, Message, Subscription, Invoice
+from app.models.mfa import MFAToken
+from app.models.audit_log import AuditLog
+from app.services.audit_service import audit_service
+from app.services.storage import s3_storage_service
+
+logger = logging.getLogger(__name__)
+
+# Redis hash with running totals for dashboards/alerting
+PURGE_STATS_KEY = "account_purge:stats"
+
+# RFQs removed per step - each one costs a storage listing for its attachments
+PURGE_RFQ_CHUNK_SIZE = 50
+
+# Storage prefixes holding a user's own objects
+USER_STORAGE_PREFIXES = ("profile/{user_id}/", "exports/{user_id}/")
+
+
+class AccountPurgeService:
+    """
+    Permanently removes accounts whose deletion grace period has passed
+
+    Due users are claimed with FOR UPDATE SKIP LOCKED, so several workers
+    can run side by side without waiting on each other. Each transaction
+    removes at most account_purge_chunk_size rows (messages, responses,
+    RFQs, POCs, ...) before committing; a large account is worked off over
+    several short transactions instead of one long one. Every step is
+    idempotent, so an interrupted purge simply resumes on the next run.
+
+    Supplier counters touched by removed responses are left to the nightly
+    metrics reconcile.
+    """
+
+    @staticmethod
+    def cutoff(now: datetime = None) -> datetime:
+        now = now or datetime.utcnow()
+        return now - timedelta(days=settings.account_deletion_grace_days)
+
+    def _due(self, cutoff: datetime):
+        return select(User.id).where(
+            User.deletion_scheduled_at.isnot(None),
+            User.deletion_scheduled_at <= cutoff
+        )
+
+    def pending_count(self, db: Session) -> int:
+        return db.execute(select(func.count()).select_from(self._due(self.cutoff()).subquery())).scalar()
+
+    # Steps - each removes up to `limit` rows and returns how many it touched
+
+    def _rfq_messages(self, db: Session, user_id: uuid.UUID, limit: int) -> int:
+        own_rfqs = select(RFQ.id).where(RFQ.buyer_id == user_id)
+        ids = select(Message.id).where(Message.rfq_id.in_(own_rfqs)).limit(limit)
+        return db.execute(
+            delete(Message).where(Message.id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+
+    def _rfq_responses(self, db: Session, user_id: uuid.UUID, limit: int) -> int:
+        own_rfqs = select(RFQ.id).where(RFQ.buyer_id == user_id)
+        ids = select(RFQResponse.id).where(RFQResponse.rfq_id.in_(own_rfqs)).limit(limit)
+        return db.execute(
+            delete(RFQResponse).where(RFQResponse.id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+
+    def _rfqs(self, db: Session, user_id: uuid.UUID, limit: int) -> int:
+        rfq_ids = db.execute(select(RFQ.id).where(RFQ.buyer_id == user_id).limit(limit)).scalars().all()
+        if not rfq_ids:
+            return 0
+
+        # Attachments first: if the delete below rolls back, the next run lists them again
+        backend = s3_storage_service.backend
+        for rfq_id in rfq_ids:
+            for obj in backend.list_objects(f"document/{rfq_id}/"):
+                backend.delete_object(obj["Key"])
+
+        # rfq_distributions rows go with the RFQ (ON DELETE CASCADE)
+        return db.execute(
+            delete(RFQ).where(RFQ.id.in_(rfq_ids)).execution_options(synchronize_session=False)
+        ).rowcount
+
+    def _messages(self, db: Session, user_id: uuid.UUID, limit: int) -> int:
+        ids = select(Message.id).where(
+            or_(Message.sender_id == user_id, Message.recipient_id == user_id)
+        ).limit(limit)
+        return db.execute(
+            delete(Message).where(Message.id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+
+    def _responses(self, db: Session, user_id: uuid.UUID, limit: int) -> int:
+        """
+        Quotes the user sent on behalf of a supplier; the buyers' RFQ
+        response counts are decremented to match
+        """
+        own_pocs = select(POC.id).where(POC.user_id == user_id)
+        ids = select(RFQResponse.id).where(RFQResponse.responding_poc_id.in_(own_pocs)).limit(limit)
+        rfq_ids = db.execute(
+            delete(RFQResponse)
+            .where(RFQResponse.id.in_(ids))
+            .returning(RFQResponse.rfq_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+
+        removed = defaultdict(int)
+        for rfq_id in rfq_ids:
+            removed[rfq_id] += 1
+        # One UPDATE per distinct decrement rather than per RFQ
+        by_amount = defaultdict(list)
+        for rfq_id, amount in removed.items():
+            by_amount[amount].append(rfq_id)
+        for amount, affected in by_amount.items():
+            db.execute(
+                update(RFQ)
+                .where(RFQ.id.in_(affected))
+                .values(response_count=func.greatest(func.coalesce(RFQ.response_count, 0) - amount, 0))
+                .execution_options(synchronize_session=False)
+            )
+        return len(rfq_ids)
+
+    def _pocs(self, db: Session, user_id: uuid.UUID, limit: int) -> int:
+        ids = select(POC.id).where(POC.user_id == user_id).limit(limit)
+        return db.execute(
+            delete(POC).where(POC.id.in_(ids)).execution_options(synchronize_session=False)
+        ).rowcount
+
+    def _audit_logs(self, db: Session, user_id: uuid.UUID, limit: int) -> int:
+        """
+        Audit entries are kept (SOC 2) with the personal fields removed;
+        the bare user id stays as a pseudonymous reference
+        """
+        ids = select(AuditLog.id).where(
+            AuditLog.user_id == str(user_id),
+            or_(AuditLog.user_email.isnot(None), AuditLog.ip_address.isnot(None), AuditLog.user_agent.isnot(None))
+        ).limit(limit)
+        return db.execute(
+            update(AuditLog)
+            .where(AuditLog.id.in_(ids))
+            .values(user_email=None, ip_address=None, user_agent=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    def _mfa_tokens(self, db: Session, user_id: uuid.UUID, limit: int) -> int:
+        return db.execute(
+            delete(MFAToken).where(MFAToken.user_id == user_id).execution_options(synchronize_session=False)
+        ).rowcount
+
+    def _storage(self, db: Session, user_id: uuid.UUID, limit: int) -> int:
+        """
+        Profile picture renditions (current and replaced) and GDPR export archives
+        """
+        backend = s3_storage_service.backend
+        deleted = 0
+        for prefix in USER_STORAGE_PREFIXES:
+            for obj in backend.list_objects(prefix.format(user_id=user_id))[:limit - deleted]:
+                backend.delete_object(obj["Key"])
+                deleted += 1
+        return deleted
+
+    def _steps(self) -> List[Tuple[str, Callable[[Session, uuid.UUID, int], int], int]]:
+        """
+        (name, step, per-step cap) in dependency order - children before parents
+        """
+        chunk = settings.account_purge_chunk_size
+        return [
+            ("rfq_messages", self._rfq_messages, chunk),
+            ("rfq_responses", self._rfq_responses, chunk),
+            ("rfqs", self._rfqs, PURGE_RFQ_CHUNK_SIZE),
+            ("messages", self._messages, chunk),
+            ("responses", self._responses, chunk),
+            ("pocs", self._pocs, chunk),
+            ("audit_logs", self._audit_logs, chunk),
+            ("mfa_tokens", self._mfa_tokens, chunk),
+            ("storage_objects", self._storage, chunk),
+        ]
+
+    def _finish(self, db: Session, user_id: uuid.UUID) -> str:
+        """
+        Remove the user row. Accounts with invoices keep an anonymized
+        tombstone so billing records stay intact for accounting.
+        """
+        has_invoices = db.execute(
+            select(Invoice.id).join(Subscription, Subscription.id == Invoice.subscription_id)
+            .where(Subscription.user_id == user_id).limit(1)
+        ).first() is not None
+
+        if has_invoices:
+            db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(
+                    email=f"deleted-{user_id}@deleted.invalid",
+                    name="Deleted user",
+                    hashed_password=None,
+                    profile_picture_url=None,
+                    profile_picture_key=None,
+                    linkedin_id=None,
+                    linkedin_profile_url=None,
+                    last_login_ip=None,
+                    deletion_scheduled_at=None,
+                    is_active=False,
+                    updated_at=datetime.utcnow()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            return "accounts_anonymized"
+
+        db.execute(delete(Subscription).where(Subscription.user_id == user_id).execution_options(synchronize_session=False))
+        db.execute(delete(User).where(User.id == user_id).execution_options(synchronize_session=False))
+        return "accounts_deleted"
+
+    def purge_user(self, db: Session, user_id: uuid.UUID, budget: int, counts: Dict[str, int]) -> int:
+        """
+        Work through the steps for one locked user within a row budget
+        Returns the unused budget; the user is finished when it is not 0
+        """
+        for name, step, cap in self._steps():
+            while budget > 0:
+                limit = min(budget, cap)
+                touched = step(db, user_id, limit)
+                counts[name] += touched
+                budget -= touched
+                if touched < limit:
+                    break
+            if budget <= 0:
+                return 0
+
+        counts[self._finish(db, user_id)] += 1
+        return budget
+
+    def run(self, db: Session) -> Dict[str, int]:
+        """
+        Purge due accounts until none are left or the time budget runs out
+        (blocking - worker only)
+        """
+        started = time.monotonic()
+        cutoff = self.cutoff()
+        counts: Dict[str, int] = defaultdict(int)
+        finished: List[uuid.UUID] = []
+
+        while time.monotonic() - started < settings.account_purge_max_seconds:
+            user_ids = db.execute(
+                self._due(cutoff)
+                .order_by(User.deletion_scheduled_at)
+                .limit(settings.account_purge_batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not user_ids:
+                break
+
+            batch_counts: Dict[str, int] = defaultdict(int)
+            budget = settings.account_purge_chunk_size
+            batch_finished = []
+            try:
+                for user_id in user_ids:
+                    budget = self.purge_user(db, user_id, budget, batch_counts)
+                    if budget <= 0:
+                        break
+                    batch_finished.append(user_id)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                # Whatever committed is reported, even if a later batch fails
+                self._record(counts, batch_counts)
+
+            finished.extend(batch_finished)
+            for user_id in batch_finished:
+                audit_service.log_action(
+                    db=db,
+                    action="account.purged",
+                    status="success",
+                    user_id=str(user_id),
+                    resource_type="user",
+                    resource_id=str(user_id)
+                )
+
+        pending = self.pending_count(db)
+        elapsed = round(time.monotonic() - started, 1)
+        self._publish_run(pending, elapsed)
+        logger.info(
+            f"Account purge: {len(finished)} accounts finished, {pending} still due, "
+            f"{dict(counts)} in {elapsed}s"
+        )
+        return {**counts, "accounts_finished": len(finished), "pending": pending, "seconds": elapsed}
+
+    # Metrics (best effort - a Redis outage must not stop the purge)
+
+    def _record(self, totals: Dict[str, int], batch_counts: Dict[str, int]):
+        for name, value in batch_counts.items():
+            totals[name] += value
+        try:
+            pipe = get_redis().pipeline()
+            for name, value in batch_counts.items():
+                if value:
+                    pipe.hincrby(PURGE_STATS_KEY, name, value)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not record account purge metrics: {e}")
+
+    def _publish_run(self, pending: int, elapsed: float):
+        try:
+            get_redis().hset(PURGE_STATS_KEY, mapping={
+                "pending": pending,
+                "last_run_at": datetime.utcnow().isoformat(),
+                "last_run_seconds": elapsed
+            })
+        except Exception as e:
+            logger.warning(f"Could not record account purge metrics: {e}")
+
+    def get_stats(self) -> Dict[str, str]:
+        return get_redis().hgetall(PURGE_STATS_KEY)
+
+
+# Global instance
+account_purge_service = AccountPurgeService()
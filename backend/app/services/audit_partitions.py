@@ -0,0 +1,269 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
+import csv
+import gzip
+import io
+import logging
+import os
+import re
+import tempfile
+
+from app.core.config import settings
+from app.services.storage import s3_storage_service
+from app.services.storage_backends import StorageError
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "audit_logs"
+DEFAULT_PARTITION = "audit_logs_default"
+
+# Archives are grouped by the month their partition ends in:
+# audit-archive/audit_logs/2025-02/audit_logs_y2025m01.csv.gz
+ARCHIVE_KEY_PREFIX = "audit-archive/audit_logs/"
+_ARCHIVE_MONTH_RE = re.compile(r"/(\d{4})-(\d{2})/[^/]+\.csv\.gz$")
+
+# Detaching needs a brief exclusive lock on audit_logs; give up rather
+# than stall audit inserts behind a long-running query
+DETACH_LOCK_TIMEOUT = "5s"
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_y{month:%Y}m{month:%m}"
+
+
+class AuditPartitionService:
+    """
+    Monthly range partitions of audit_logs
+
+    Partitions are created a few months ahead; rows that land outside them
+    go to the default partition and are moved out when their month is
+    created. Partitions older than audit_log_online_months are dumped to a
+    gzipped CSV in object storage, detached and dropped, so the table (and
+    its indexes) only holds the online window. Archives are deleted once
+    they pass the retention period.
+    """
+
+    def partitions(self, db: Session) -> List[Dict[str, Any]]:
+        """
+        Attached partitions with their bounds; lower is None for a
+        MINVALUE bound, both are None for the default partition
+        """
+        rows = db.execute(text(r"""
+            SELECT c.relname AS name,
+                   substring(pg_get_expr(c.relpartbound, c.oid) FROM 'FROM \(''([^'']+)''\)')::timestamptz AS lower,
+                   substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)')::timestamptz AS upper
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'audit_logs'::regclass
+            ORDER BY upper NULLS LAST
+        """))
+        return [dict(row._mapping) for row in rows]
+
+    # Future partitions
+
+    def ensure_partitions(self, db: Session, now: datetime = None) -> List[str]:
+        """
+        Create the current month's partition and the ones ahead of it
+        """
+        now = now or datetime.now(timezone.utc)
+        existing = self.partitions(db)
+        has_default = any(partition["name"] == DEFAULT_PARTITION for partition in existing)
+
+        created = []
+        current = month_start(now)
+        for offset in range(settings.audit_log_partitions_ahead + 1):
+            start = add_months(current, offset)
+            covered = any(
+                partition["upper"] is not None
+                and (partition["lower"] is None or partition["lower"] <= start)
+                and start < partition["upper"]
+                for partition in existing
+            )
+            if covered:
+                continue
+            self._create_partition(db, partition_name(start), start, add_months(start, 1), has_default)
+            created.append(partition_name(start))
+        return created
+
+    def _create_partition(self, db: Session, name: str, start: datetime, end: datetime, has_default: bool):
+        bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        spilled = has_default and db.execute(
+            text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end LIMIT 1"),
+            {"start": start, "end": end}
+        ).first() is not None
+
+        try:
+            if not spilled:
+                db.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES {bounds}"))
+            else:
+                # The new range must not overlap rows already in the default
+                # partition: build the table, move them over, then attach
+                db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+                moved = db.execute(
+                    text(f"""
+                        WITH moved AS (
+                            DELETE FROM {DEFAULT_PARTITION}
+                            WHERE timestamp >= :start AND timestamp < :end
+                            RETURNING *
+                        )
+                        INSERT INTO {name} SELECT * FROM moved
+                    """),
+                    {"start": start, "end": end}
+                ).rowcount
+                db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+                logger.info(f"Moved {moved} audit rows from {DEFAULT_PARTITION} into {name}")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        logger.info(f"Created audit partition {name}")
+
+    # Archival
+
+    def online_since(self, now: datetime = None) -> datetime:
+        """
+        Start of the online window; partitions ending before it are archived
+        """
+        now = now or datetime.now(timezone.utc)
+        return add_months(month_start(now), -settings.audit_log_online_months)
+
+    def archives(self) -> List[Tuple[str, str]]:
+        """
+        (month, key) of each archive in storage, oldest first; month is
+        "YYYY-MM" of the partition's end
+        """
+        archives = []
+        for obj in s3_storage_service.backend.list_objects(ARCHIVE_KEY_PREFIX):
+            match = _ARCHIVE_MONTH_RE.search(obj["Key"])
+            if match:
+                archives.append((f"{match.group(1)}-{match.group(2)}", obj["Key"]))
+        return sorted(archives)
+
+    def archived_until(self, archives: List[Tuple[str, str]]) -> Optional[datetime]:
+        """
+        End of the newest archived partition: rows before it are in the
+        archives, rows from it onwards in the table
+        """
+        if not archives:
+            return None
+        year, month = archives[-1][0].split("-")
+        return datetime(int(year), int(month), 1, tzinfo=timezone.utc)
+
+    def read_archived_rows(self, key: str, user_id: str) -> Iterator[Dict[str, Optional[str]]]:
+        """
+        Stream one user's rows out of an archive (blocking - worker only)
+
+        Values are the CSV text; NULLs come back as None (COPY writes them,
+        like empty strings, as empty fields)
+        """
+        body = s3_storage_service.backend.get_object(key)
+        try:
+            with gzip.GzipFile(fileobj=body) as archive:
+                for row in csv.DictReader(io.TextIOWrapper(archive, encoding="utf-8", newline="")):
+                    if row["user_id"] == user_id:
+                        yield {column: value if value != "" else None for column, value in row.items()}
+        finally:
+            body.close()
+
+    def archive_expired(self, db: Session, now: datetime = None) -> List[str]:
+        """
+        Archive and drop partitions that ended before the online window
+        """
+        cutoff = self.online_since(now)
+
+        archived = []
+        for partition in self.partitions(db):
+            if partition["upper"] is None or partition["upper"] > cutoff:
+                continue
+            self._archive(db, partition)
+            archived.append(partition["name"])
+        return archived
+
+    def _archive(self, db: Session, partition: Dict[str, Any]):
+        name = partition["name"]
+        key = f"{ARCHIVE_KEY_PREFIX}{partition['upper']:%Y-%m}/{name}.csv.gz"
+        backend = s3_storage_service.backend
+
+        fd, path = tempfile.mkstemp(suffix=".csv.gz")
+        os.close(fd)
+        try:
+            # Held until the partition is dropped: nothing (e.g. the account
+            # purge anonymizing old rows) can change it after the dump
+            db.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+            cursor = db.connection().connection.cursor()
+            with gzip.open(path, "wb") as archive:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+            rows = cursor.rowcount
+
+            size = os.path.getsize(path)
+            with open(path, "rb") as f:
+                backend.put_object(key, f, "application/gzip", {
+                    "partition": name,
+                    "rows": str(rows),
+                    "from": partition["lower"].isoformat() if partition["lower"] else "",
+                    "to": partition["upper"].isoformat()
+                })
+            if backend.head_object(key)["ContentLength"] != size:
+                raise StorageError(f"Archive {key} does not match the local dump")
+
+            db.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+            db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+        except Exception:
+            # The archive may already be uploaded; the next run overwrites it
+            db.rollback()
+            raise
+        finally:
+            os.remove(path)
+
+        logger.info(f"Archived audit partition {name} ({rows} rows, {size} bytes) to {key}")
+
+    def prune_archives(self, now: datetime = None) -> int:
+        """
+        Delete archives whose rows are past the retention period
+        """
+        now = now or datetime.now(timezone.utc)
+        current = month_start(now)
+        cutoff = current.replace(year=current.year - settings.audit_log_retention_years)
+
+        backend = s3_storage_service.backend
+        deleted = 0
+        for obj in backend.list_objects(ARCHIVE_KEY_PREFIX):
+            match = _ARCHIVE_MONTH_RE.search(obj["Key"])
+            if not match:
+                continue
+            ended = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+            if ended <= cutoff:
+                backend.delete_object(obj["Key"])
+                deleted += 1
+        return deleted
+
+    def maintain(self, db: Session) -> Dict[str, Any]:
+        """
+        Create upcoming partitions, archive expired ones, prune old archives
+        (blocking - worker only)
+        """
+        created = self.ensure_partitions(db)
+        archived = self.archive_expired(db)
+        pruned = self.prune_archives()
+        logger.info(
+            f"Audit partitions: {len(created)} created, {len(archived)} archived, "
+            f"{pruned} archives past retention deleted"
+        )
+        return {"created": created, "archived": archived, "archives_deleted": pruned}
+
+
+# Global instance
+audit_partition_service = AuditPartitionService()
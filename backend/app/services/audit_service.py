@@ -106,13 +106,19 @@ class AuditService:
     def get_user_activity(
         db: Session,
         user_id: str,
-        limit: int = 100
+        limit: int = 100,
+        days: int = 90
     ):
         """
         Get recent activity for a specific user
+        The time bound keeps the scan to the last few monthly partitions
         """
+        from datetime import datetime, timedelta, timezone
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        
         return db.query(AuditLog).filter(
-            AuditLog.user_id == user_id
+            AuditLog.user_id == user_id,
+            AuditLog.timestamp >= since
         ).order_by(
             AuditLog.timestamp.desc()
         ).limit(limit).all()
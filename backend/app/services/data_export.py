@@ -0,0 +1,251 @@
+from sqlalchemy import select, or_
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import os
+import tempfile
+import uuid
+import zipfile
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.user import User, Company, POC, RFQ, RFQResponse, Message
+from app.models.audit_log import AuditLog
+from app.services.audit_partitions import audit_partition_service
+from app.services.storage import s3_storage_service
+
+logger = logging.getLogger(__name__)
+
+JOB_PREFIX = "data_export:"
+USER_JOB_PREFIX = "data_export:user:"
+EXPORT_KEY_PREFIX = "exports/"
+
+# Rows fetched per server-side cursor round trip
+EXPORT_YIELD_PER = 1000
+
+FORMAT_VERSION = "2.0"
+
+# "retrying": the last attempt failed and the task will run again
+IN_PROGRESS_STATUSES = ("pending", "running", "retrying")
+
+# Never exported: credentials and security state
+USER_EXCLUDED_COLUMNS = {"hashed_password", "failed_login_attempts", "locked_until"}
+
+
+def _columns(model, exclude=()):
+    return [column for column in model.__table__.columns if column.name not in exclude]
+
+
+class DataExportService:
+    """
+    GDPR/CCPA data export as a background job
+
+    The worker writes a zip of NDJSON files (one per record type) to a temp
+    file, reading every table with a server-side cursor, then uploads it
+    to storage. The user downloads it through a presigned URL. Memory use
+    does not depend on how much data the user has.
+    """
+
+    # Job state (Redis hashes, expire with the archive)
+
+    def create_job(self, user_id: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Start an export, or return the user's export that is still in progress
+        Returns (job, created)
+        """
+        client = get_redis()
+        existing_id = client.get(f"{USER_JOB_PREFIX}{user_id}")
+        if existing_id:
+            existing = self.get_job(existing_id)
+            if existing and existing["status"] in IN_PROGRESS_STATUSES:
+                return existing, False
+
+        export_id = uuid.uuid4().hex
+        job = {
+            "export_id": export_id,
+            "user_id": str(user_id),
+            "status": "pending",
+            "created_at": datetime.utcnow().isoformat()
+        }
+        ttl = settings.data_export_retention_hours * 3600
+        pipe = client.pipeline()
+        pipe.hset(f"{JOB_PREFIX}{export_id}", mapping=job)
+        pipe.expire(f"{JOB_PREFIX}{export_id}", ttl)
+        pipe.set(f"{USER_JOB_PREFIX}{user_id}", export_id, ex=ttl)
+        pipe.execute()
+        return job, True
+
+    def get_job(self, export_id: str) -> Optional[Dict[str, Any]]:
+        job = get_redis().hgetall(f"{JOB_PREFIX}{export_id}")
+        return job or None
+
+    def _update_job(self, export_id: str, **fields):
+        get_redis().hset(f"{JOB_PREFIX}{export_id}", mapping={k: str(v) for k, v in fields.items()})
+
+    # Archive
+
+    def _write_ndjson(self, archive: zipfile.ZipFile, name: str, db: Session, stmt) -> int:
+        count = 0
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+        try:
+            with archive.open(name, "w", force_zip64=True) as entry:
+                for row in result:
+                    entry.write(json.dumps(dict(row._mapping), default=str).encode("utf-8"))
+                    entry.write(b"\n")
+                    count += 1
+        finally:
+            result.close()
+        return count
+
+    def _write_audit_logs(self, archive: zipfile.ZipFile, db: Session, user_id: str) -> Tuple[int, Dict[str, Any]]:
+        """
+        Audit entries from the monthly archives in storage (all users mixed,
+        so each is streamed and filtered), then from the table - only past
+        the newest archive, which keeps the query on the online partitions.
+        A missing or unreadable archive fails the export rather than
+        leaving a silent gap.
+        """
+        archives = audit_partition_service.archives()
+        archived_until = audit_partition_service.archived_until(archives)
+
+        stmt = select(*_columns(AuditLog)).where(AuditLog.user_id == user_id)
+        if archived_until:
+            stmt = stmt.where(AuditLog.timestamp >= archived_until)
+
+        archived = count = 0
+        with archive.open("audit_logs.ndjson", "w", force_zip64=True) as entry:
+            for _, key in archives:
+                for row in audit_partition_service.read_archived_rows(key, user_id):
+                    entry.write(json.dumps(row).encode("utf-8"))
+                    entry.write(b"\n")
+                    archived += 1
+            result = db.execute(stmt.order_by(AuditLog.timestamp).execution_options(yield_per=EXPORT_YIELD_PER))
+            try:
+                for row in result:
+                    entry.write(json.dumps(dict(row._mapping), default=str).encode("utf-8"))
+                    entry.write(b"\n")
+                    count += 1
+            finally:
+                result.close()
+
+        return archived + count, {
+            "archived_months": [month for month, _ in archives],
+            "archived_until": archived_until.isoformat() if archived_until else None,
+            "from_archives": archived
+        }
+
+    def write_archive(self, db: Session, user_id: uuid.UUID, path: str) -> Dict[str, int]:
+        """
+        Write the full export for a user to a zip file; returns row counts
+        """
+        poc_ids = select(POC.id).where(POC.user_id == user_id)
+
+        sections = {
+            "user.ndjson": select(*_columns(User, USER_EXCLUDED_COLUMNS)).where(User.id == user_id),
+            "companies.ndjson": select(
+                *_columns(Company),
+                POC.id.label("poc_id"),
+                POC.role.label("poc_role"),
+                POC.is_primary.label("poc_is_primary"),
+                POC.created_at.label("poc_created_at")
+            ).join(POC, POC.company_id == Company.id).where(POC.user_id == user_id),
+            "rfqs.ndjson": select(*_columns(RFQ)).where(RFQ.buyer_id == user_id).order_by(RFQ.created_at),
+            "responses.ndjson": select(*_columns(RFQResponse)).where(
+                RFQResponse.responding_poc_id.in_(poc_ids)
+            ).order_by(RFQResponse.created_at),
+            "messages.ndjson": select(*_columns(Message)).where(
+                or_(Message.sender_id == user_id, Message.recipient_id == user_id)
+            ).order_by(Message.created_at),
+        }
+
+        counts = {}
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, stmt in sections.items():
+                counts[name.rsplit(".", 1)[0]] = self._write_ndjson(archive, name, db, stmt)
+            counts["audit_logs"], audit_manifest = self._write_audit_logs(archive, db, str(user_id))
+
+            archive.writestr("manifest.json", json.dumps({
+                "user_id": str(user_id),
+                "export_date": datetime.utcnow().isoformat(),
+                "format_version": FORMAT_VERSION,
+                "counts": counts,
+                "audit_logs": audit_manifest
+            }, indent=2))
+
+        return counts
+
+    def run(self, db: Session, export_id: str) -> Dict[str, Any]:
+        """
+        Build and upload the archive for a pending job (blocking - worker only)
+        """
+        job = self.get_job(export_id)
+        if not job:
+            raise ValueError(f"Unknown export {export_id}")
+
+        user_id = uuid.UUID(job["user_id"])
+        key = f"{EXPORT_KEY_PREFIX}{user_id}/{export_id}.zip"
+        self._update_job(export_id, status="running", started_at=datetime.utcnow().isoformat())
+
+        fd, path = tempfile.mkstemp(suffix=".zip")
+        os.close(fd)
+        try:
+            counts = self.write_archive(db, user_id, path)
+            size = os.path.getsize(path)
+            with open(path, "rb") as f:
+                s3_storage_service.backend.put_object(
+                    key, f, "application/zip", {"user_id": str(user_id), "export_id": export_id}
+                )
+        except Exception as e:
+            # The task retries; mark_failed runs once it gives up
+            self._update_job(export_id, status="retrying", error=str(e))
+            raise
+        finally:
+            os.remove(path)
+
+        self._update_job(
+            export_id,
+            status="ready",
+            file_key=key,
+            size=size,
+            completed_at=datetime.utcnow().isoformat(),
+            counts=json.dumps(counts)
+        )
+        logger.info(f"Data export {export_id} ready ({size} bytes)")
+        return {"export_id": export_id, "size": size, "counts": counts}
+
+    def mark_failed(self, export_id: str, error: str):
+        """
+        Final failure (retries exhausted); the user can start a new export
+        """
+        if self.get_job(export_id):
+            # Expired jobs stay gone (hset would recreate them without a TTL)
+            self._update_job(export_id, status="failed", error=error)
+
+    async def get_download_url(self, job: Dict[str, Any]) -> Optional[str]:
+        if job.get("status") != "ready" or not job.get("file_key"):
+            return None
+        stamp = job.get("completed_at", "")[:10]
+        return await s3_storage_service.generate_presigned_download_url(
+            job["file_key"],
+            expiration=settings.data_export_url_ttl_seconds,
+            download_filename=f"linkedprocurement-data-export-{stamp}.zip"
+        )
+
+    def cleanup_expired(self) -> int:
+        """
+        Delete archives older than the retention window (blocking)
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.data_export_retention_hours)
+        backend = s3_storage_service.backend
+        deleted = 0
+        for obj in backend.list_objects(EXPORT_KEY_PREFIX):
+            if obj["LastModified"] < cutoff:
+                backend.delete_object(obj["Key"])
+                deleted += 1
+        return deleted
+
+
+# Global instance
+data_export_service = DataExportService()
@@ -0,0 +1,166 @@
+from sqlalchemy import func, select, union_all, distinct
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import datetime, timedelta
+import logging
+import uuid
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.user import User, RFQ, RFQResponse, Message
+from app.services.email import email_service, MAX_PERSONALIZATIONS
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PREFIX = "digest:checkpoint:"
+CHECKPOINT_DONE = "done"
+CHECKPOINT_TTL_SECONDS = 8 * 24 * 3600
+
+
+class WeeklyDigestService:
+    """
+    Builds and sends the weekly activity digest for all users
+
+    Users are walked in id order in batches of up to 1000. Each batch costs
+    three grouped aggregate queries and one SendGrid request. The last
+    batch sent is checkpointed in Redis so a failed run resumes where it
+    stopped; each batch has a stable idempotency key, so re-sending the
+    batch in flight at the time of a crash does not email anyone twice.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = min(batch_size or settings.digest_batch_size, MAX_PERSONALIZATIONS)
+
+    @staticmethod
+    def period_for(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+        """
+        The last full Monday-to-Monday week before `now` (UTC)
+        """
+        now = now or datetime.utcnow()
+        period_end = datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+        return period_end - timedelta(days=7), period_end
+
+    def collect_stats(
+        self,
+        db: Session,
+        user_ids: List[uuid.UUID],
+        period_start: datetime,
+        period_end: datetime,
+        total_new_rfqs: int
+    ) -> Dict[uuid.UUID, Dict[str, int]]:
+        """
+        Digest counts for a batch of users (three grouped queries)
+
+        - new_rfqs: public RFQs posted during the week by someone else
+        - responses_received: responses to the user's RFQs during the week
+        - active_conversations: RFQ threads the user sent or received
+          messages in during the week
+        """
+        stats = {
+            user_id: {"new_rfqs": total_new_rfqs, "responses_received": 0, "active_conversations": 0}
+            for user_id in user_ids
+        }
+
+        own_rfqs = db.query(RFQ.buyer_id, func.count(RFQ.id)).filter(
+            RFQ.buyer_id.in_(user_ids),
+            RFQ.visibility == "public",
+            RFQ.created_at >= period_start,
+            RFQ.created_at < period_end
+        ).group_by(RFQ.buyer_id)
+        for user_id, count in own_rfqs:
+            stats[user_id]["new_rfqs"] = max(total_new_rfqs - count, 0)
+
+        responses = db.query(RFQ.buyer_id, func.count(RFQResponse.id)).join(
+            RFQResponse, RFQResponse.rfq_id == RFQ.id
+        ).filter(
+            RFQ.buyer_id.in_(user_ids),
+            RFQResponse.created_at >= period_start,
+            RFQResponse.created_at < period_end
+        ).group_by(RFQ.buyer_id)
+        for user_id, count in responses:
+            stats[user_id]["responses_received"] = count
+
+        in_period = (Message.created_at >= period_start, Message.created_at < period_end)
+        participants = union_all(
+            select(Message.sender_id.label("user_id"), Message.rfq_id).where(
+                Message.sender_id.in_(user_ids), *in_period
+            ),
+            select(Message.recipient_id.label("user_id"), Message.rfq_id).where(
+                Message.recipient_id.in_(user_ids), *in_period
+            )
+        ).subquery()
+        conversations = db.query(
+            participants.c.user_id, func.count(distinct(participants.c.rfq_id))
+        ).group_by(participants.c.user_id)
+        for user_id, count in conversations:
+            stats[user_id]["active_conversations"] = count
+
+        return stats
+
+    def run(self, db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Send this week's digest to every active user, resuming from the
+        checkpoint of an earlier interrupted run
+        """
+        period_start, period_end = self.period_for(now)
+        checkpoint_key = f"{CHECKPOINT_PREFIX}{period_start.date().isoformat()}"
+        redis_client = get_redis()
+
+        checkpoint = redis_client.get(checkpoint_key)
+        if checkpoint == CHECKPOINT_DONE:
+            logger.info(f"Weekly digest for {period_start.date()} already sent")
+            return {"period_start": period_start.isoformat(), "batches": 0, "recipients": 0, "resumed": False}
+
+        last_user_id = uuid.UUID(checkpoint) if checkpoint else None
+
+        total_new_rfqs = db.query(func.count(RFQ.id)).filter(
+            RFQ.visibility == "public",
+            RFQ.created_at >= period_start,
+            RFQ.created_at < period_end
+        ).scalar() or 0
+
+        batches = 0
+        recipients_sent = 0
+
+        while True:
+            query = db.query(User.id, User.email, User.name).filter(
+                User.is_active == True,
+                User.deletion_scheduled_at.is_(None)
+            )
+            if last_user_id:
+                query = query.filter(User.id > last_user_id)
+            users = query.order_by(User.id).limit(self.batch_size).all()
+            if not users:
+                break
+
+            stats = self.collect_stats(db, [u.id for u in users], period_start, period_end, total_new_rfqs)
+            recipients = [
+                {"email": u.email, "name": u.name, **stats[u.id]}
+                for u in users
+                if any(stats[u.id].values())
+            ]
+
+            if recipients:
+                email_service.enqueue_weekly_digest_batch(
+                    recipients,
+                    idempotency_key=f"digest:{period_start.date().isoformat()}:{users[0].id}"
+                )
+                batches += 1
+                recipients_sent += len(recipients)
+
+            last_user_id = users[-1].id
+            redis_client.set(checkpoint_key, str(last_user_id), ex=CHECKPOINT_TTL_SECONDS)
+
+        redis_client.set(checkpoint_key, CHECKPOINT_DONE, ex=CHECKPOINT_TTL_SECONDS)
+        logger.info(f"Weekly digest for {period_start.date()}: {recipients_sent} recipients in {batches} requests")
+
+        return {
+            "period_start": period_start.isoformat(),
+            "batches": batches,
+            "recipients": recipients_sent,
+            "resumed": checkpoint is not None
+        }
+
+
+# Global instance
+weekly_digest_service = WeeklyDigestService()
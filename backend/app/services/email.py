@@ -1,21 +1,58 @@
+import html
 import httpx
 from typing import Dict, List, Optional, Any
-from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, From, To, Subject, PlainTextContent, HtmlContent
+from starlette.concurrency import run_in_threadpool
 import json
 
 from app.core.config import settings
+from app.services.email_templates import email_templates, RenderedEmail
+from app.tasks.notifications import send_email, payload_key
+
+# SendGrid limit on personalizations (recipients) per request
+MAX_PERSONALIZATIONS = 1000
+
+DIGEST_FIELDS = ("user_name", "new_rfqs", "responses_received", "active_conversations")
 
 
 class EmailService:
     """
     Service for email operations using SendGrid API
     Handles RFQ notifications, verification emails, and communications
+    Messages are rendered from precompiled templates (HTML + plain text)
+    and queued for delivery by the Celery worker
     """
     
     def __init__(self):
-        self.client = SendGridAPIClient(api_key=settings.sendgrid_api_key)
         self.from_email = settings.from_email
+    
+    async def _enqueue(self, message: Mail) -> bool:
+        """
+        Queue a message for delivery (retried with backoff, dead-lettered on
+        repeated failure). Identical messages are only sent once.
+        The broker call runs in the threadpool.
+        """
+        payload = message.get()
+        await run_in_threadpool(
+            send_email.apply_async,
+            args=[payload],
+            kwargs={"idempotency_key": payload_key("email", payload)}
+        )
+        return True
+    
+    async def _send_template(self, to_email: str, template: str, **context) -> bool:
+        """
+        Render a template and queue it for one recipient
+        """
+        rendered: RenderedEmail = email_templates.render(template, **context)
+        message = Mail(
+            from_email=From(self.from_email, "LinkedProcurement Platform"),
+            to_emails=To(to_email),
+            subject=Subject(rendered.subject),
+            plain_text_content=PlainTextContent(rendered.text),
+            html_content=HtmlContent(rendered.html)
+        )
+        return await self._enqueue(message)
         
     async def send_rfq_notification(
         self,
@@ -31,39 +68,16 @@ class EmailService:
         Send RFQ notification to supplier POC
         """
         try:
-            message = Mail(
-                from_email=From(self.from_email, "LinkedProcurement Platform"),
-                to_emails=To(to_email),
-                subject=Subject(f"New RFQ Match: {material}"),
-                html_content=HtmlContent(f"""
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2>New RFQ Opportunity</h2>
-                    <p>Hello {supplier_name},</p>
-                    <p>A new RFQ has been posted that matches your capabilities:</p>
-                    
-                    <div style="background-color: #f5f5f5; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <h3>RFQ Details</h3>
-                        <p><strong>Buyer:</strong> {buyer_company}</p>
-                        <p><strong>Material:</strong> {material}</p>
-                        <p><strong>Quantity:</strong> {quantity}</p>
-                    </div>
-                    
-                    <p>
-                        <a href="{rfq_link}" 
-                           style="background-color: #007bff; color: white; padding: 12px 24px; 
-                                  text-decoration: none; border-radius: 4px; display: inline-block;">
-                            View RFQ & Respond
-                        </a>
-                    </p>
-                    
-                    <p>Best regards,<br>LinkedProcurement Team</p>
-                </div>
-                """)
+            return await self._send_template(
+                to_email,
+                template_id,
+                supplier_name=supplier_name,
+                buyer_company=buyer_company,
+                material=material,
+                quantity=quantity,
+                rfq_link=rfq_link
             )
             
-            response = self.client.send(message)
-            return response.status_code in [200, 202]
-            
         except Exception as e:
             print(f"Error sending RFQ notification: {e}")
             return False
@@ -80,37 +94,15 @@ class EmailService:
         Send notification when supplier responds to RFQ
         """
         try:
-            message = Mail(
-                from_email=From(self.from_email, "LinkedProcurement Platform"),
-                to_emails=To(to_email),
-                subject=Subject(f"New Response: {rfq_title}"),
-                html_content=HtmlContent(f"""
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2>New RFQ Response</h2>
-                    <p>Hello {buyer_name},</p>
-                    <p>You have received a new response to your RFQ:</p>
-                    
-                    <div style="background-color: #f5f5f5; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <h3>{rfq_title}</h3>
-                        <p><strong>Response from:</strong> {supplier_company}</p>
-                    </div>
-                    
-                    <p>
-                        <a href="{rfq_link}" 
-                           style="background-color: #28a745; color: white; padding: 12px 24px; 
-                                  text-decoration: none; border-radius: 4px; display: inline-block;">
-                            View Response
-                        </a>
-                    </p>
-                    
-                    <p>Best regards,<br>LinkedProcurement Team</p>
-                </div>
-                """)
+            return await self._send_template(
+                to_email,
+                "response_notification",
+                buyer_name=buyer_name,
+                supplier_company=supplier_company,
+                rfq_title=rfq_title,
+                rfq_link=rfq_link
             )
             
-            response = self.client.send(message)
-            return response.status_code in [200, 202]
-            
         except Exception as e:
             print(f"Error sending response notification: {e}")
             return False
@@ -125,34 +117,13 @@ class EmailService:
         Send email verification to new users
         """
         try:
-            message = Mail(
-                from_email=From(self.from_email, "LinkedProcurement Platform"),
-                to_emails=To(to_email),
-                subject=Subject("Verify Your LinkedProcurement Account"),
-                html_content=HtmlContent(f"""
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2>Welcome to LinkedProcurement!</h2>
-                    <p>Hello {user_name},</p>
-                    <p>Please verify your email address to complete your registration:</p>
-                    
-                    <p>
-                        <a href="{verification_link}" 
-                           style="background-color: #007bff; color: white; padding: 12px 24px; 
-                                  text-decoration: none; border-radius: 4px; display: inline-block;">
-                            Verify Email Address
-                        </a>
-                    </p>
-                    
-                    <p>If you didn't create this account, please ignore this email.</p>
-                    
-                    <p>Best regards,<br>SSCN Team</p>
-                </div>
-                """)
+            return await self._send_template(
+                to_email,
+                "verification",
+                user_name=user_name,
+                verification_link=verification_link
             )
             
-            response = self.client.send(message)
-            return response.status_code in [200, 202]
-            
         except Exception as e:
             print(f"Error sending verification email: {e}")
             return False
@@ -167,29 +138,40 @@ class EmailService:
         Send alert when POC availability status changes
         """
         try:
-            message = Mail(
-                from_email=From(self.from_email, "LinkedProcurement Platform"),
-                to_emails=To(to_email),
-                subject=Subject("POC Status Update"),
-                html_content=HtmlContent(f"""
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2>POC Availability Update</h2>
-                    <p>POC {poc_name} from {company_name} has updated their availability status.</p>
-                    
-                    <p>Check the platform for current availability and response times.</p>
-                    
-                    <p>Best regards,<br>LinkedProcurement Team</p>
-                </div>
-                """)
+            return await self._send_template(
+                to_email,
+                "poc_availability_alert",
+                poc_name=poc_name,
+                company_name=company_name
             )
             
-            response = self.client.send(message)
-            return response.status_code in [200, 202]
-            
         except Exception as e:
             print(f"Error sending POC alert: {e}")
             return False
     
+    async def send_account_deletion_notice(
+        self,
+        to_email: str,
+        user_name: str,
+        scheduled_for: str,
+        cancel_link: str
+    ) -> bool:
+        """
+        Confirm an account deletion request and how to cancel it
+        """
+        try:
+            return await self._send_template(
+                to_email,
+                "account_deletion_notice",
+                user_name=user_name,
+                scheduled_for=scheduled_for,
+                cancel_link=cancel_link
+            )
+            
+        except Exception as e:
+            print(f"Error sending account deletion notice: {e}")
+            return False
+    
     async def send_weekly_digest(
         self,
         to_email: str,
@@ -200,40 +182,94 @@ class EmailService:
         Send weekly digest with platform activity
         """
         try:
-            new_rfqs = digest_data.get("new_rfqs", 0)
-            responses_received = digest_data.get("responses_received", 0)
-            active_conversations = digest_data.get("active_conversations", 0)
-            
-            message = Mail(
-                from_email=From(self.from_email, "LinkedProcurement Platform"),
-                to_emails=To(to_email),
-                subject=Subject("Your Weekly LinkedProcurement Digest"),
-                html_content=HtmlContent(f"""
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2>Weekly Activity Summary</h2>
-                    <p>Hello {user_name},</p>
-                    <p>Here's your activity summary for this week:</p>
-                    
-                    <div style="background-color: #f5f5f5; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <h3>This Week's Activity</h3>
-                        <p><strong>New RFQs:</strong> {new_rfqs}</p>
-                        <p><strong>Responses Received:</strong> {responses_received}</p>
-                        <p><strong>Active Conversations:</strong> {active_conversations}</p>
-                    </div>
-                    
-                    <p>Stay active to maximize your sourcing opportunities!</p>
-                    
-                    <p>Best regards,<br>LinkedProcurement Team</p>
-                </div>
-                """)
+            return await self._send_template(
+                to_email,
+                "weekly_digest",
+                user_name=user_name,
+                new_rfqs=digest_data.get("new_rfqs", 0),
+                responses_received=digest_data.get("responses_received", 0),
+                active_conversations=digest_data.get("active_conversations", 0)
             )
             
-            response = self.client.send(message)
-            return response.status_code in [200, 202]
-            
         except Exception as e:
             print(f"Error sending weekly digest: {e}")
             return False
+    
+    async def send_weekly_digest_batch(
+        self,
+        recipients: List[Dict[str, Any]],
+        idempotency_key: str
+    ) -> bool:
+        """
+        Queue one SendGrid request for up to 1000 digest recipients
+        (rendering and the broker call run in the threadpool)
+        """
+        return await run_in_threadpool(self.enqueue_weekly_digest_batch, recipients, idempotency_key)
+    
+    def enqueue_weekly_digest_batch(
+        self,
+        recipients: List[Dict[str, Any]],
+        idempotency_key: str
+    ) -> bool:
+        """
+        Blocking form of send_weekly_digest_batch (worker code, e.g. the
+        weekly digest task)
+        
+        Each recipient is {"email", "name", "new_rfqs", "responses_received",
+        "active_conversations"}. Uses the dynamic template when configured,
+        otherwise the weekly_digest template rendered with -field- (text)
+        and -field_html- (HTML, values escaped) substitution tags that
+        SendGrid fills in per recipient.
+        """
+        if not recipients:
+            return False
+        if len(recipients) > MAX_PERSONALIZATIONS:
+            raise ValueError(f"At most {MAX_PERSONALIZATIONS} recipients per request")
+        
+        payload: Dict[str, Any] = {
+            "from": {"email": self.from_email, "name": "LinkedProcurement Platform"},
+            "personalizations": []
+        }
+        template_id = settings.sendgrid_digest_template_id
+        
+        for recipient in recipients:
+            data = {
+                "user_name": recipient["name"],
+                "new_rfqs": recipient["new_rfqs"],
+                "responses_received": recipient["responses_received"],
+                "active_conversations": recipient["active_conversations"]
+            }
+            personalization: Dict[str, Any] = {"to": [{"email": recipient["email"], "name": recipient["name"]}]}
+            if template_id:
+                personalization["dynamic_template_data"] = data
+            else:
+                # Substitutions bypass template autoescaping: the HTML part
+                # gets its own tags with escaped values
+                personalization["substitutions"] = {
+                    **{f"-{k}-": str(v) for k, v in data.items()},
+                    **{f"-{k}_html-": html.escape(str(v)) for k, v in data.items()}
+                }
+            payload["personalizations"].append(personalization)
+        
+        if template_id:
+            payload["template_id"] = template_id
+        else:
+            rendered = email_templates.render_cached(
+                "weekly_digest",
+                **{field: f"-{field}-" for field in DIGEST_FIELDS}
+            )
+            rendered_html = email_templates.render_cached(
+                "weekly_digest",
+                **{field: f"-{field}_html-" for field in DIGEST_FIELDS}
+            )
+            payload["subject"] = rendered.subject
+            payload["content"] = [
+                {"type": "text/plain", "value": rendered.text},
+                {"type": "text/html", "value": rendered_html.html}
+            ]
+        
+        send_email.apply_async(args=[payload], kwargs={"idempotency_key": idempotency_key})
+        return True
 
 
 class EmailVerificationService:
@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import os
+import threading
+
+try:
+    from jinja2 import FileSystemLoader, StrictUndefined, select_autoescape
+    from jinja2.sandbox import SandboxedEnvironment
+    from markupsafe import Markup
+except ImportError:
+    SandboxedEnvironment = None
+    print("⚠️ WARNING: Jinja2 not installed. Email templates disabled.")
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "email")
+
+# Subject line per template (rendered with the same context as the body)
+EMAIL_SUBJECTS = {
+    "rfq_notification": "New RFQ Match: {{ material }}",
+    "response_notification": "New Response: {{ rfq_title }}",
+    "verification": "Verify Your LinkedProcurement Account",
+    "poc_availability_alert": "POC Status Update",
+    "weekly_digest": "Your Weekly LinkedProcurement Digest",
+    "account_deletion_notice": "Your LinkedProcurement account is scheduled for deletion",
+}
+
+# Upper bound on cached renders (render_cached); static layouts only, so small
+RENDER_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    html: str
+    text: str
+
+
+class EmailTemplateRenderer:
+    """
+    Renders transactional emails from the templates in app/templates/email
+
+    Every template (HTML body, plain-text alternate and subject) is compiled
+    once when the renderer is created, so a send only executes compiled
+    code. Templates run in a sandbox with HTML autoescaping; context-free
+    partials are rendered once and reused via static_fragment().
+    """
+
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        if SandboxedEnvironment is None:
+            raise RuntimeError("Jinja2 is required for email templates")
+
+        self.env = SandboxedEnvironment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False,
+            cache_size=-1
+        )
+        self.env.globals["static_fragment"] = self.static_fragment
+
+        self._fragments: Dict[str, Markup] = {}
+        self._rendered: Dict[Any, RenderedEmail] = {}
+        self._lock = threading.Lock()
+
+        self.compile_all()
+
+    def compile_all(self):
+        """
+        Compile every template up front so the first send pays nothing
+        """
+        self._templates = {name: self.env.get_template(name) for name in self.env.list_templates()}
+        self._subjects = {name: self.env.from_string(subject) for name, subject in EMAIL_SUBJECTS.items()}
+
+        missing = [
+            f"{name}.{ext}" for name in EMAIL_SUBJECTS for ext in ("html", "txt")
+            if f"{name}.{ext}" not in self._templates
+        ]
+        if missing:
+            raise RuntimeError(f"Missing email templates: {', '.join(missing)}")
+
+    def static_fragment(self, name: str) -> "Markup":
+        """
+        Render a context-free partial once and reuse the result
+        """
+        fragment = self._fragments.get(name)
+        if fragment is None:
+            fragment = Markup(self._templates[name].render())
+            self._fragments[name] = fragment
+        return fragment
+
+    def render(self, name: str, **context) -> RenderedEmail:
+        """
+        Render the subject, HTML body and plain-text alternate for a template
+        """
+        return RenderedEmail(
+            subject=self._subjects[name].render(**context).strip(),
+            html=self._templates[f"{name}.html"].render(**context),
+            text=self._templates[f"{name}.txt"].render(**context)
+        )
+
+    def render_cached(self, name: str, **context) -> RenderedEmail:
+        """
+        render() memoized on the context - for layouts whose values are fixed,
+        e.g. SendGrid substitution tags filled in per recipient
+        """
+        key = (name, tuple(sorted(context.items())))
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = self.render(name, **context)
+            with self._lock:
+                if len(self._rendered) >= RENDER_CACHE_SIZE:
+                    self._rendered.pop(next(iter(self._rendered)))
+                self._rendered[key] = rendered
+        return rendered
+
+
+# Global instance
+email_templates: Optional[EmailTemplateRenderer] = (
+    EmailTemplateRenderer() if SandboxedEnvironment is not None else None
+)
@@ -0,0 +1,225 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+from typing import Any, Iterator, List, Optional
+from datetime import datetime
+import csv
+import io
+import json
+import os
+import tempfile
+import uuid
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+from app.models.user import User, Company, POC, RFQ, RFQResponse
+
+# Rows fetched per server-side cursor round trip
+EXPORT_YIELD_PER = 1000
+
+# Rows buffered before a chunk is sent to the client
+EXPORT_FLUSH_ROWS = 500
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+RFQ_EXPORT_COLUMNS = [
+    ("id", RFQ.id),
+    ("title", RFQ.title),
+    ("status", RFQ.status),
+    ("visibility", RFQ.visibility),
+    ("material_category", RFQ.material_category),
+    ("commodity", RFQ.commodity),
+    ("part_number", RFQ.part_number),
+    ("part_number_description", RFQ.part_number_description),
+    ("quantity", RFQ.quantity),
+    ("yearly_quantity", RFQ.yearly_quantity),
+    ("moq_required", RFQ.moq_required),
+    ("unit_of_measure", RFQ.unit_of_measure),
+    ("target_price", RFQ.target_price),
+    ("price_unit", RFQ.price_unit),
+    ("currency", RFQ.currency),
+    ("incoterm", RFQ.incoterm),
+    ("delivery_plant", RFQ.delivery_plant),
+    ("delivery_location", RFQ.delivery_location),
+    ("delivery_deadline", RFQ.delivery_deadline),
+    ("expires_at", RFQ.expires_at),
+    ("view_count", RFQ.view_count),
+    ("response_count", RFQ.response_count),
+    ("created_at", RFQ.created_at),
+]
+
+_responding_user = aliased(User)
+
+QUOTE_EXPORT_COLUMNS = [
+    ("rfq_id", RFQ.id),
+    ("rfq_title", RFQ.title),
+    ("part_number", RFQ.part_number),
+    ("yearly_quantity", RFQ.yearly_quantity),
+    ("currency", RFQ.currency),
+    ("incoterm", RFQ.incoterm),
+    ("response_id", RFQResponse.id),
+    ("status", RFQResponse.status),
+    ("supplier_company_id", RFQResponse.supplier_company_id),
+    ("supplier_company_name", Company.name),
+    ("responding_poc_name", _responding_user.name),
+    ("price_quote", RFQResponse.price_quote),
+    ("lead_time_days", RFQResponse.lead_time_days),
+    ("minimum_order_quantity", RFQResponse.minimum_order_quantity),
+    ("supplier_part_number", RFQResponse.supplier_part_number),
+    ("production_batch_size", RFQResponse.production_batch_size),
+    ("supplier_moq", RFQResponse.supplier_moq),
+    ("supplier_unit_of_measure", RFQResponse.supplier_unit_of_measure),
+    ("production_lead_time_days", RFQResponse.production_lead_time_days),
+    ("raw_material_type", RFQResponse.raw_material_type),
+    ("raw_material_cost", RFQResponse.raw_material_cost),
+    ("certifications_provided", RFQResponse.certifications_provided),
+    ("message", RFQResponse.message),
+    ("is_competitive", RFQResponse.is_competitive),
+    ("buyer_rating", RFQResponse.buyer_rating),
+    ("responded_at", RFQResponse.responded_at),
+    ("created_at", RFQResponse.created_at),
+]
+
+# Leading characters spreadsheets treat as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _spreadsheet_safe(value: Any) -> Any:
+    """
+    Neutralize formula injection in exported cells (CSV/XLSX)
+    """
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        try:
+            float(value)
+            return value  # Negative numbers are fine
+        except ValueError:
+            return "'" + value
+    return value
+
+
+class ExportService:
+    """
+    Streams RFQ and quote exports for buyers
+
+    Rows are read with a server-side cursor (yield_per) and written out in
+    small chunks, so memory stays flat no matter how many rows match.
+    """
+
+    @staticmethod
+    def is_available(export_format: str) -> bool:
+        if export_format == "xlsx":
+            return Workbook is not None
+        return export_format in EXPORT_FORMATS
+
+    def rfq_query(self, buyer_id: uuid.UUID, status: Optional[str] = None):
+        stmt = select(*[column for _, column in RFQ_EXPORT_COLUMNS]).where(RFQ.buyer_id == buyer_id)
+        if status:
+            stmt = stmt.where(RFQ.status == status)
+        return stmt.order_by(RFQ.created_at.desc())
+
+    def quote_query(self, buyer_id: uuid.UUID, rfq_id: Optional[uuid.UUID] = None):
+        stmt = select(*[column for _, column in QUOTE_EXPORT_COLUMNS]).select_from(RFQResponse).join(
+            RFQ, RFQ.id == RFQResponse.rfq_id
+        ).join(
+            Company, Company.id == RFQResponse.supplier_company_id
+        ).outerjoin(
+            POC, POC.id == RFQResponse.responding_poc_id
+        ).outerjoin(
+            _responding_user, _responding_user.id == POC.user_id
+        ).where(RFQ.buyer_id == buyer_id)
+        if rfq_id:
+            stmt = stmt.where(RFQ.id == rfq_id)
+        return stmt.order_by(RFQ.created_at.desc(), RFQResponse.created_at)
+
+    def iter_rows(self, db: Session, stmt) -> Iterator[tuple]:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+        try:
+            for row in result:
+                yield tuple(row)
+        finally:
+            result.close()
+
+    def stream(self, db: Session, stmt, columns: List[str], export_format: str) -> Iterator[bytes]:
+        rows = self.iter_rows(db, stmt)
+        if export_format == "csv":
+            return self._csv(rows, columns)
+        if export_format == "ndjson":
+            return self._ndjson(rows, columns)
+        if export_format == "xlsx":
+            return self._xlsx(rows, columns)
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    def _csv(self, rows: Iterator[tuple], columns: List[str]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM so Excel opens UTF-8 correctly
+        buffer.write("\ufeff")
+        writer.writerow(columns)
+
+        for count, row in enumerate(rows, start=1):
+            writer.writerow([_spreadsheet_safe(_text(value)) for value in row])
+            if count % EXPORT_FLUSH_ROWS == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue().encode("utf-8")
+
+    def _ndjson(self, rows: Iterator[tuple], columns: List[str]) -> Iterator[bytes]:
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(dict(zip(columns, row)), default=str))
+            if len(lines) >= EXPORT_FLUSH_ROWS:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                lines = []
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _xlsx(self, rows: Iterator[tuple], columns: List[str]) -> Iterator[bytes]:
+        """
+        XLSX is a zip, so it can only be sent once complete. The write-only
+        workbook spools rows to disk and the finished file is streamed back
+        in chunks - memory stays flat, the first byte just comes later.
+        """
+        if Workbook is None:
+            raise RuntimeError("XLSX export is not available")
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Export")
+        sheet.append(columns)
+        for row in rows:
+            sheet.append([
+                _spreadsheet_safe(value if not isinstance(value, uuid.UUID) else str(value))
+                for value in row
+            ])
+
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            workbook.save(path)
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(256 * 1024)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(path)
+
+
+# Global instance
+export_service = ExportService()
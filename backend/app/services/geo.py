@@ -0,0 +1,203 @@
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from typing import Any, List, Optional, Tuple, Union
+from datetime import datetime, timedelta
+import logging
+import math
+import re
+import threading
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.models.geo import GeocodeCache
+from app.models.user import Company
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# earthdistance's sphere (earth()) is slightly larger than the haversine
+# one; widen the index box so it never cuts off points inside the radius
+BOX_MARGIN = 1.01
+
+_DISTANCE_RE = re.compile(r"^\s*([\d.]+)\s*(km|mi|m)?\s*$", re.IGNORECASE)
+_KM_PER_UNIT = {"km": 1.0, "mi": 1.609344, "m": 0.001}
+
+Coordinates = Tuple[float, float]
+
+
+def normalize_location(location: str) -> str:
+    return " ".join(location.lower().split())[:500]
+
+
+def parse_distance_km(distance: Union[str, int, float, None]) -> Optional[float]:
+    """
+    "50km", "30mi", "2000m" or a bare number of kilometres
+    """
+    if distance is None:
+        return None
+    if isinstance(distance, (int, float)):
+        return float(distance)
+    match = _DISTANCE_RE.match(distance)
+    if not match:
+        return None
+    return float(match.group(1)) * _KM_PER_UNIT[(match.group(2) or "km").lower()]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in km between two points
+    """
+    return _haversine(math, min, lat1, lon1, lat2, lon2)
+
+
+def _haversine(m, least, lat1, lon1, lat2, lon2):
+    dlat = m.radians(lat2 - lat1)
+    dlon = m.radians(lon2 - lon1)
+    a = (
+        m.pow(m.sin(dlat / 2), 2)
+        + m.cos(m.radians(lat1)) * m.cos(m.radians(lat2)) * m.pow(m.sin(dlon / 2), 2)
+    )
+    # Rounding can push sqrt(a) just past 1, outside asin's domain
+    return 2 * EARTH_RADIUS_KM * m.asin(least(1.0, m.sqrt(a)))
+
+
+def company_distance_km(origin: Coordinates):
+    """
+    SQL expression: haversine distance from origin to each company
+    """
+    return _haversine(func, func.least, origin[0], origin[1], Company.latitude, Company.longitude)
+
+
+class GeoService:
+    """
+    Geocoding (cached in geocode_cache) and radius filters over company
+    coordinates
+
+    A radius filter is two clauses: an earth_box containment test served
+    by the GiST index on ll_to_earth(latitude, longitude), which narrows
+    the candidates to a bounding box, and an exact haversine check on
+    what is left.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+
+    # Geocoding
+
+    def _lookup(self, location: str) -> Optional[dict]:
+        """
+        Ask the provider for one location (blocking, rate limited)
+        """
+        with self._lock:
+            wait = settings.geocoding_min_interval_seconds - (time.monotonic() - self._last_request)
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request = time.monotonic()
+
+        response = httpx.get(
+            settings.geocoding_url,
+            params={"q": location, "format": "jsonv2", "limit": 1},
+            headers={"User-Agent": settings.geocoding_user_agent},
+            timeout=10
+        )
+        response.raise_for_status()
+        results = response.json()
+        return results[0] if results else None
+
+    def geocode(self, db: Session, location: Optional[str], strict: bool = False) -> Optional[Coordinates]:
+        """
+        Coordinates for a free-text location; each distinct (normalized)
+        string is looked up once. Provider errors are not cached - they
+        return None, or raise when strict.
+        """
+        if not location or not location.strip():
+            return None
+        key = normalize_location(location)
+
+        cached = db.get(GeocodeCache, key)
+        negative_cutoff = datetime.utcnow() - timedelta(days=settings.geocoding_negative_cache_days)
+        if cached and (cached.latitude is not None or cached.created_at > negative_cutoff):
+            return (cached.latitude, cached.longitude) if cached.latitude is not None else None
+
+        try:
+            result = self._lookup(location)
+        except (httpx.HTTPError, ValueError) as e:
+            if strict:
+                raise
+            logger.warning(f"Geocoding failed for {location!r}: {e}")
+            return None
+
+        values = {
+            "latitude": float(result["lat"]) if result else None,
+            "longitude": float(result["lon"]) if result else None,
+            "display_name": result.get("display_name") if result else None,
+            "provider": "nominatim",
+            "created_at": datetime.utcnow()
+        }
+        db.execute(
+            insert(GeocodeCache)
+            .values(query=key, **values)
+            .on_conflict_do_update(index_elements=["query"], set_=values)
+        )
+        db.commit()
+        return (values["latitude"], values["longitude"]) if result else None
+
+    def geocode_companies(self, db: Session, limit: int = None) -> dict:
+        """
+        Fill in coordinates for companies with a location but none yet
+        """
+        limit = limit or settings.geocoding_batch_size
+        companies = db.execute(
+            select(Company.id, Company.headquarters_location).where(
+                Company.geocoded_at.is_(None),
+                Company.headquarters_location.isnot(None)
+            ).limit(limit)
+        ).all()
+
+        located = 0
+        processed = 0
+        for company_id, location in companies:
+            try:
+                coordinates = self.geocode(db, location, strict=True)
+            except (httpx.HTTPError, ValueError) as e:
+                # Provider trouble: leave the rest for the next run
+                logger.warning(f"Geocoding backfill stopped: {e}")
+                break
+            db.execute(
+                update(Company)
+                .where(Company.id == company_id)
+                .values(
+                    latitude=coordinates[0] if coordinates else None,
+                    longitude=coordinates[1] if coordinates else None,
+                    geocoded_at=datetime.utcnow()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            processed += 1
+            located += 1 if coordinates else 0
+
+        return {"processed": processed, "located": located}
+
+    # Radius filters
+
+    def within_radius(self, origin: Coordinates, radius_km: float) -> List[Any]:
+        """
+        WHERE clauses for companies within radius_km of origin
+        """
+        box = func.earth_box(func.ll_to_earth(origin[0], origin[1]), radius_km * 1000 * BOX_MARGIN)
+        return [
+            Company.latitude.isnot(None),
+            Company.longitude.isnot(None),
+            box.op("@>")(func.ll_to_earth(Company.latitude, Company.longitude)),
+            company_distance_km(origin) <= radius_km
+        ]
+
+
+# Global instance
+geo_service = GeoService()
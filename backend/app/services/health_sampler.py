@@ -0,0 +1,187 @@
+"""
+Background health sampling for /health/detailed
+
+Each check (system resources, database, replicas, Redis, Elasticsearch,
+object storage) runs every health_sample_interval_seconds on the app's
+event loop, with blocking checks in the threadpool. The endpoint only
+reads the cached results, so a probe never waits on a dependency or on
+a CPU sample.
+"""
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+
+import psutil
+
+from app.core.config import settings
+from app.core.database import engine, replica_router
+
+logger = logging.getLogger(__name__)
+
+# Results older than this many intervals are reported as stale
+STALE_AFTER_INTERVALS = 3
+
+# Resource utilization (percent) reported as a warning
+RESOURCE_WARNING_PERCENT = 90
+
+
+class HealthSampler:
+    """
+    Refreshes health checks in the background and serves the cached results
+    """
+
+    def __init__(self):
+        # name -> (wall clock time of the sample, result)
+        self._results: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # Blocking checks still running after their timeout; not started again until done
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def checks(self) -> Dict[str, Callable]:
+        checks = {
+            "system": self._check_system,
+            "database": self._check_database,
+            "redis": self._check_redis,
+            "storage": self._check_storage,
+        }
+        if replica_router:
+            checks["database_replicas"] = self._check_replicas
+        if settings.search_backend == "elasticsearch":
+            checks["elasticsearch"] = self._check_elasticsearch
+        return checks
+
+    # Checks (blocking ones run in the threadpool)
+
+    def _check_system(self) -> Dict[str, Any]:
+        # Non-blocking: utilization since the previous call, i.e. over the last interval
+        cpu_percent = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        result = {
+            "status": "healthy",
+            "metrics": {
+                "cpu_percent": cpu_percent,
+                "memory_percent": memory.percent,
+                "memory_available_mb": memory.available / (1024 * 1024),
+                "disk_percent": disk.percent,
+                "disk_free_gb": disk.free / (1024 * 1024 * 1024)
+            }
+        }
+        if max(cpu_percent, memory.percent, disk.percent) > RESOURCE_WARNING_PERCENT:
+            result["status"] = "warning"
+            result["message"] = "High resource utilization"
+        return result
+
+    def _check_database(self) -> Dict[str, Any]:
+        if not engine:
+            return {"status": "unhealthy", "message": "Database not configured"}
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {"status": "healthy", "message": "Database connection successful"}
+
+    def _check_replicas(self) -> Dict[str, Any]:
+        replicas = replica_router.status()
+        return {
+            "status": "healthy" if all(r["in_rotation"] for r in replicas) else "warning",
+            "replicas": replicas
+        }
+
+    def _check_redis(self) -> Dict[str, Any]:
+        from app.core.redis import get_redis
+        get_redis().ping()
+        return {"status": "healthy"}
+
+    def _check_storage(self) -> Dict[str, Any]:
+        from app.services.storage import s3_storage_service
+        backend = s3_storage_service.backend
+        backend.head_bucket()
+        return {"status": "healthy", "backend": backend.name}
+
+    async def _check_elasticsearch(self) -> Dict[str, Any]:
+        from app.services.search import search_service
+        if await search_service.client.ping():
+            return {"status": "healthy"}
+        return {"status": "unhealthy", "message": "Cluster did not answer ping"}
+
+    # Sampling
+
+    async def _run_check(self, name: str, check: Callable[[], Any]) -> Dict[str, Any]:
+        timeout = settings.health_check_timeout_seconds
+        if asyncio.iscoroutinefunction(check):
+            return await asyncio.wait_for(check(), timeout)
+
+        pending = self._pending.get(name)
+        if pending and not pending.done():
+            return {"status": "unhealthy", "message": "Previous check still running"}
+        future = asyncio.ensure_future(run_in_threadpool(check))
+        self._pending[name] = future
+        # A timed-out thread can't be cancelled; shield it and skip this check until it returns
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def _sample(self, name: str, check: Callable[[], Any]):
+        started = time.perf_counter()
+        try:
+            result = await self._run_check(name, check)
+        except asyncio.TimeoutError:
+            result = {"status": "unhealthy", "message": f"Timed out after {settings.health_check_timeout_seconds}s"}
+        except Exception as e:
+            result = {"status": "unhealthy", "message": str(e)}
+        result["checked_at"] = datetime.now(timezone.utc).isoformat()
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self._results[name] = (time.time(), result)
+
+    async def sample_once(self):
+        await asyncio.gather(*(self._sample(name, check) for name, check in self.checks().items()))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sample_once()
+            except Exception as e:
+                logger.warning(f"Health sampling failed: {e}")
+            await asyncio.sleep(settings.health_sample_interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            # The first cpu_percent call only sets the baseline
+            psutil.cpu_percent(interval=None)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest result of each check with its age; stale or missing results
+        have status "unknown"
+        """
+        now = time.time()
+        stale_after = settings.health_sample_interval_seconds * STALE_AFTER_INTERVALS
+        checks = {}
+        for name in self.checks():
+            sampled = self._results.get(name)
+            if not sampled:
+                checks[name] = {"status": "unknown", "message": "Not sampled yet", "stale": True}
+                continue
+            sampled_at, result = sampled
+            age = now - sampled_at
+            entry = {**result, "age_seconds": round(age, 1), "stale": age > stale_after}
+            if entry["stale"]:
+                entry["last_status"] = entry["status"]
+                entry["status"] = "unknown"
+            checks[name] = entry
+        return checks
+
+
+# Global instance
+health_sampler = HealthSampler()
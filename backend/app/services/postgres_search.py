@@ -0,0 +1,267 @@
+from sqlalchemy import select, func, literal, literal_column, or_, tuple_, union_all, null, String
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+
+from app.models.user import Company
+from app.services.geo import geo_service, company_distance_km, parse_distance_km
+from app.services.supplier_filters import supplier_filter_service
+
+# Facet buckets returned per dimension (same sizes as the Elasticsearch aggs)
+FACET_SIZES = {
+    "materials": 50,
+    "certifications": 50,
+    "locations": 50,
+    "industries": 20,
+}
+
+# Name matches outrank description matches (Elasticsearch boosts name^3)
+NAME_WEIGHT = 3.0
+
+_ENGLISH = literal_column("'english'::regconfig")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class PostgresSearchService:
+    """
+    Supplier search over the companies table, for deployments without
+    Elasticsearch (and as the fallback when the cluster is unreachable)
+
+    Text matching uses the pg_trgm index on name (fuzzy and substring)
+    and the full-text index on description; filters hit the btree/GIN
+    indexes and radius filters the GiST earth index. Facet counts for
+    the whole result set come from a single GROUPING SETS query. Results have the same shape as
+    SearchService.search_suppliers.
+    """
+
+    @staticmethod
+    def description_vector():
+        # Must match ix_companies_description_fts
+        return func.to_tsvector(_ENGLISH, func.coalesce(Company.description, literal_column("''")))
+
+    def _filters(
+        self,
+        query: Optional[str],
+        materials: Optional[List[str]],
+        certifications: Optional[List[str]],
+        industry: Optional[str],
+        min_response_rate: Optional[int],
+        max_response_time_hours: Optional[int],
+        employee_count_range: Optional[str],
+        verified_only: bool
+    ) -> List[Any]:
+        clauses = supplier_filter_service.company_filters(certifications=certifications, materials=materials)
+
+        if query:
+            clauses.append(or_(
+                Company.name.op("%")(query),
+                Company.name.ilike(f"%{_escape_like(query)}%", escape="\\"),
+                self.description_vector().op("@@")(func.websearch_to_tsquery(_ENGLISH, query))
+            ))
+        if industry:
+            clauses.append(Company.industry == industry)
+        if min_response_rate is not None:
+            clauses.append(Company.response_rate >= min_response_rate)
+        if max_response_time_hours is not None:
+            clauses.append(Company.avg_response_time_hours <= max_response_time_hours)
+        if employee_count_range:
+            clauses.append(Company.employee_count == employee_count_range)
+        if verified_only:
+            clauses.append(Company.is_verified.is_(True))
+        return clauses
+
+    def _score(self, query: Optional[str]):
+        if not query:
+            return literal(0.0)
+        return (
+            func.similarity(Company.name, query) * NAME_WEIGHT
+            + func.ts_rank_cd(self.description_vector(), func.websearch_to_tsquery(_ENGLISH, query))
+        )
+
+    def _facets(self, db: Session, filters: List[Any]) -> Dict[str, Any]:
+        """
+        Total plus industry, location, material and certification counts in
+        one pass: array values are unnested into (kind, value) tag rows and
+        every dimension is a grouping set over the matching companies
+        """
+        def rows(kind, value):
+            return select(
+                Company.id.label("id"),
+                Company.industry.label("industry"),
+                Company.headquarters_location.label("location"),
+                kind.label("kind"),
+                value.label("value")
+            ).where(*filters)
+
+        tags = union_all(
+            rows(null().cast(String), null().cast(String)),
+            rows(literal("materials"), func.unnest(Company.materials)),
+            rows(literal("certifications"), func.unnest(Company.certifications))
+        ).subquery("tags")
+
+        stmt = select(
+            func.grouping(tags.c.industry).label("by_industry"),
+            func.grouping(tags.c.location).label("by_location"),
+            func.grouping(tags.c.kind, tags.c.value).label("by_tag"),
+            tags.c.industry,
+            tags.c.location,
+            tags.c.kind,
+            tags.c.value,
+            func.count(tags.c.id.distinct()).label("count")
+        ).group_by(
+            func.grouping_sets(
+                tuple_(tags.c.industry),
+                tuple_(tags.c.location),
+                tuple_(tags.c.kind, tags.c.value),
+                literal_column("()")  # Grand total
+            )
+        )
+
+        total = 0
+        buckets: Dict[str, List[Dict[str, Any]]] = {name: [] for name in FACET_SIZES}
+        for row in db.execute(stmt):
+            if row.by_industry == 0:
+                name, facet = row.industry, "industries"
+            elif row.by_location == 0:
+                name, facet = row.location, "locations"
+            elif row.by_tag == 0:
+                name, facet = row.value, row.kind
+            else:
+                total = row.count
+                continue
+            if name is not None and facet in buckets:
+                buckets[facet].append({"name": name, "count": row.count})
+
+        facets = {
+            facet: sorted(values, key=lambda bucket: (-bucket["count"], bucket["name"]))[:FACET_SIZES[facet]]
+            for facet, values in buckets.items()
+        }
+        return {"total": total, "facets": facets}
+
+    @staticmethod
+    def _radius(location: Optional[Dict[str, Any]]):
+        """
+        (origin, radius_km) from an Elasticsearch-style location filter:
+        {"coordinates": [lat, lon], "distance": "50km"}
+        """
+        if not location or not location.get("coordinates") or not location.get("distance"):
+            return None
+        radius_km = parse_distance_km(location["distance"])
+        if radius_km is None:
+            return None
+        lat, lon = location["coordinates"][:2]
+        return (float(lat), float(lon)), radius_km
+
+    @staticmethod
+    def _document(row) -> Dict[str, Any]:
+        """
+        A companies row in the shape of a suppliers index document
+        """
+        coordinates = [row.latitude, row.longitude] if row.latitude is not None else None
+        document = {
+            "id": str(row.id),
+            "score": float(row.score or 0),
+            "company_id": str(row.id),
+            "name": row.name,
+            "materials": row.materials or [],
+            "certifications": row.certifications or [],
+            "location": {
+                "city": None,
+                "state": None,
+                "country": None,
+                "coordinates": coordinates
+            },
+            "headquarters_location": row.headquarters_location,
+            "capabilities": row.capabilities or [],
+            "naics_codes": row.naics_codes or [],
+            "response_rate": row.response_rate or 0,
+            "avg_response_time_hours": row.avg_response_time_hours,
+            "rating": None,  # Ratings only exist in the search index
+            "employee_count": row.employee_count,
+            "founded_year": row.founded_year,
+            "verified": bool(row.is_verified),
+            "industry": row.industry,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at
+        }
+        if row.distance_km is not None:
+            document["distance_km"] = round(float(row.distance_km), 1)
+        return document
+
+    def search_suppliers(
+        self,
+        db: Session,
+        query: str = None,
+        materials: List[str] = None,
+        certifications: List[str] = None,
+        location: Dict[str, Any] = None,
+        industry: str = None,
+        min_response_rate: int = None,
+        max_response_time_hours: int = None,
+        employee_count_range: str = None,
+        verified_only: bool = False,
+        page: int = 1,
+        per_page: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Supplier search with filters and facets (blocking)
+        """
+        query = query.strip() if query else None
+        filters = self._filters(
+            query, materials, certifications, industry, min_response_rate,
+            max_response_time_hours, employee_count_range, verified_only
+        )
+        score = self._score(query).label("score")
+
+        radius = self._radius(location)
+        if radius:
+            origin, radius_km = radius
+            filters.extend(geo_service.within_radius(origin, radius_km))
+            distance = company_distance_km(origin)
+        else:
+            distance = literal(None)
+
+        stmt = select(
+            Company.id,
+            Company.name,
+            Company.materials,
+            Company.certifications,
+            Company.capabilities,
+            Company.naics_codes,
+            Company.headquarters_location,
+            Company.response_rate,
+            Company.avg_response_time_hours,
+            Company.employee_count,
+            Company.founded_year,
+            Company.is_verified,
+            Company.industry,
+            Company.created_at,
+            Company.updated_at,
+            Company.latitude,
+            Company.longitude,
+            distance.label("distance_km"),
+            score
+        ).where(*filters).order_by(
+            score.desc(),
+            *([distance] if radius else []),
+            Company.response_rate.desc().nullslast(),
+            Company.name
+        ).offset((page - 1) * per_page).limit(per_page)
+
+        suppliers = [self._document(row) for row in db.execute(stmt)]
+        counts = self._facets(db, filters)
+
+        return {
+            "total": counts["total"],
+            "page": page,
+            "per_page": per_page,
+            "total_pages": (counts["total"] + per_page - 1) // per_page,
+            "suppliers": suppliers,
+            "facets": counts["facets"]
+        }
+
+
+# Global instance
+postgres_search_service = PostgresSearchService()
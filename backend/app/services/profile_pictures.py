@@ -0,0 +1,141 @@
+from typing import Dict, Optional, BinaryIO
+from datetime import datetime
+import asyncio
+import io
+import uuid
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+    print("⚠️ WARNING: Pillow not installed. Profile picture uploads disabled.")
+
+from app.services.storage import s3_storage_service
+
+
+# Rendered square sizes (px); the stored key is a prefix shared by all sizes
+PROFILE_PICTURE_SIZES = {
+    "large": 512,
+    "small": 128,
+}
+
+# Refuse decompression bombs (a 5 MB PNG can decode to gigabytes)
+MAX_SOURCE_PIXELS = 40_000_000
+
+
+class ProfilePictureError(Exception):
+    """
+    Raised when an uploaded file is not a usable image
+    """
+    pass
+
+
+class ProfilePictureService:
+    """
+    Stores user profile pictures in object storage as fixed-size JPEG
+    renditions. Only the key prefix is kept on the users row.
+    """
+
+    def render_sizes(self, source: BinaryIO) -> Dict[str, bytes]:
+        """
+        Decode an image once and render every configured size (blocking)
+        """
+        if Image is None:
+            raise ProfilePictureError("Image processing is not available")
+
+        try:
+            image = Image.open(source)
+            if image.width * image.height > MAX_SOURCE_PIXELS:
+                raise ProfilePictureError("Image dimensions are too large")
+
+            # Let the JPEG decoder downscale while decoding - much cheaper for big photos
+            largest = max(PROFILE_PICTURE_SIZES.values())
+            image.draft("RGB", (largest, largest))
+            image.load()
+            image = ImageOps.exif_transpose(image)
+
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.split()[-1])
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+        except ProfilePictureError:
+            raise
+        except Exception as e:
+            raise ProfilePictureError(f"Invalid image: {e}")
+
+        renditions = {}
+        for name, size in sorted(PROFILE_PICTURE_SIZES.items(), key=lambda item: -item[1]):
+            resized = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format="JPEG", quality=85, optimize=True, progressive=True)
+            renditions[name] = buffer.getvalue()
+
+        return renditions
+
+    @staticmethod
+    def generate_key(user_id: str) -> str:
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        return f"profile/{user_id}/{timestamp}_{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def rendition_key(key: str, size: str = "large") -> str:
+        return f"{key}_{size}.jpg"
+
+    def store_sync(self, user_id: str, source: BinaryIO) -> str:
+        """
+        Render and upload all sizes; returns the key prefix to store on the user
+        Blocking - used directly by the backfill migration
+        """
+        renditions = self.render_sizes(source)
+        key = self.generate_key(user_id)
+        backend = s3_storage_service.backend
+
+        for name, data in renditions.items():
+            backend.put_object(
+                self.rendition_key(key, name),
+                io.BytesIO(data),
+                "image/jpeg",
+                {"user_id": str(user_id), "size": name}
+            )
+
+        return key
+
+    async def store(self, user_id: str, source: BinaryIO) -> str:
+        """
+        Render and upload a new profile picture off the event loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.store_sync, str(user_id), source)
+
+    async def delete(self, key: str):
+        """
+        Remove every rendition for a key prefix
+        """
+        for name in PROFILE_PICTURE_SIZES:
+            await s3_storage_service.delete_file(self.rendition_key(key, name))
+
+    async def get_url(
+        self,
+        key: Optional[str],
+        fallback_url: Optional[str] = None,
+        size: str = "large"
+    ) -> Optional[str]:
+        """
+        Presigned URL for a stored picture, or the external URL (e.g. LinkedIn)
+        """
+        if not key:
+            return fallback_url
+
+        url = await s3_storage_service.generate_presigned_download_url(
+            self.rendition_key(key, size),
+            expiration=86400
+        )
+        return url or fallback_url
+
+
+# Global instance
+profile_picture_service = ProfilePictureService()
@@ -0,0 +1,132 @@
+from sqlalchemy import select, update, exists, and_
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Any, Dict, List
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.models.user import POC, RFQ, RFQDistribution, RFQResponse
+from app.services.websocket import pusher_service
+
+logger = logging.getLogger(__name__)
+
+
+class RFQExpiryService:
+    """
+    Moves RFQs past their expiry to status "expired" and warns suppliers
+    shortly before an RFQ closes
+
+    Both passes walk the partial index on expires_at WHERE status = 'active'
+    in batches of rfq_expiry_batch_size, one short transaction per batch.
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so overlapping sweeps
+    never block each other or handle the same RFQ twice.
+    """
+
+    def _claim(self, db: Session, condition, values: Dict[str, Any], *returning):
+        batch = select(RFQ.id).where(
+            RFQ.status == "active",
+            condition
+        ).order_by(RFQ.expires_at).limit(settings.rfq_expiry_batch_size).with_for_update(skip_locked=True)
+
+        return db.execute(
+            update(RFQ)
+            .where(RFQ.id.in_(batch.scalar_subquery()))
+            .values(**values)
+            .returning(RFQ.id, *returning)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+    def expire_due(self, db: Session, now: datetime = None) -> int:
+        """
+        Expire every active RFQ whose expires_at has passed
+        """
+        now = now or datetime.utcnow()
+        expired = 0
+        while True:
+            rows = self._claim(db, RFQ.expires_at <= now, {"status": "expired", "updated_at": now})
+            db.commit()
+            expired += len(rows)
+            if len(rows) < settings.rfq_expiry_batch_size:
+                return expired
+
+    def interested_suppliers(self, db: Session, rfq_ids: List[Any]) -> Dict[Any, List[str]]:
+        """
+        Users at supplier companies that received each RFQ but have not responded
+        """
+        responded = exists().where(and_(
+            RFQResponse.rfq_id == RFQDistribution.rfq_id,
+            RFQResponse.supplier_company_id == RFQDistribution.company_id
+        ))
+        rows = db.execute(
+            select(RFQDistribution.rfq_id, POC.user_id).distinct()
+            .join(POC, POC.company_id == RFQDistribution.company_id)
+            .where(RFQDistribution.rfq_id.in_(rfq_ids), ~responded)
+        ).all()
+
+        suppliers = defaultdict(list)
+        for rfq_id, user_id in rows:
+            suppliers[rfq_id].append(str(user_id))
+        return suppliers
+
+    def notify_expiring_soon(self, db: Session, now: datetime = None) -> int:
+        """
+        Warn suppliers about RFQs closing within rfq_expiring_soon_hours
+        Each RFQ is notified once; returns the number of RFQs notified.
+        Raises if a batch can't be queued, after releasing it for the next sweep
+        """
+        now = now or datetime.utcnow()
+        horizon = now + timedelta(hours=settings.rfq_expiring_soon_hours)
+        notified = 0
+        while True:
+            rows = self._claim(
+                db,
+                and_(RFQ.expires_at > now, RFQ.expires_at <= horizon, RFQ.expiry_notified_at.is_(None)),
+                {"expiry_notified_at": now},
+                RFQ.title,
+                RFQ.expires_at
+            )
+            suppliers = self.interested_suppliers(db, [row.id for row in rows]) if rows else {}
+            db.commit()
+
+            # Queued after the commit, so a rolled-back claim never notifies;
+            # the send_pusher_events task then retries delivery
+            notifications = [
+                {
+                    "rfq_id": str(row.id),
+                    "rfq_title": row.title,
+                    "expires_in_hours": max(int((row.expires_at - now).total_seconds() // 3600), 0),
+                    "interested_suppliers": suppliers[row.id]
+                }
+                for row in rows if suppliers.get(row.id)
+            ]
+            if notifications and not asyncio.run(pusher_service.notify_rfqs_expiring_soon(notifications)):
+                # Not queued (broker down): release the claim so the next
+                # sweep warns these suppliers instead of skipping them
+                db.execute(
+                    update(RFQ)
+                    .where(RFQ.id.in_([row.id for row in rows]), RFQ.expiry_notified_at == now)
+                    .values(expiry_notified_at=None)
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+                raise RuntimeError(f"Could not queue expiring-soon notifications for {len(rows)} RFQs")
+
+            notified += len(rows)
+            if len(rows) < settings.rfq_expiry_batch_size:
+                return notified
+
+    def sweep(self, db: Session) -> Dict[str, int]:
+        now = datetime.utcnow()
+        result = {
+            "expired": self.expire_due(db, now),
+            "expiring_soon_notified": self.notify_expiring_soon(db, now)
+        }
+        if result["expired"] or result["expiring_soon_notified"]:
+            logger.info(f"RFQ expiry sweep: {result}")
+        return result
+
+
+# Global instance
+rfq_expiry_service = RFQExpiryService()
@@ -0,0 +1,231 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+from datetime import datetime, timedelta
+import codecs
+import csv
+import uuid
+
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+    print("⚠️ WARNING: openpyxl not installed. XLSX RFQ imports disabled.")
+
+from app.core.sanitizer import sanitize_rfq_rows
+from app.models.user import RFQ
+from app.schemas.rfq import RFQCreate
+from app.services.supplier_metrics import supplier_metrics_service
+
+# Rows per INSERT batch (one executemany round trip each)
+IMPORT_CHUNK_SIZE = 500
+
+# Largest BOM accepted in one upload
+IMPORT_MAX_ROWS = 10000
+
+# Row errors returned in the report (the counts are always complete)
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+RFQ_FIELDS = set(RFQCreate.model_fields)
+
+
+class RFQImportError(Exception):
+    """
+    Raised when an upload cannot be read at all (bad format, no header)
+    """
+    pass
+
+
+def _normalize_header(name: Any) -> str:
+    return str(name or "").strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def _cell(value: Any) -> Any:
+    """
+    Spreadsheet cell to the value RFQCreate expects (str fields stay strings)
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _iter_csv(file: BinaryIO) -> Iterator[List[Any]]:
+    reader = csv.reader(codecs.getreader("utf-8-sig")(file))
+    for row in reader:
+        yield row
+
+
+def _iter_xlsx(file: BinaryIO) -> Iterator[List[Any]]:
+    if load_workbook is None:
+        raise RFQImportError("XLSX import is not available")
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise RFQImportError(f"Could not read workbook: {e}")
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def iter_rows(file: BinaryIO, filename: str) -> Tuple[List[str], Iterator[Tuple[int, Dict[str, Any]]]]:
+    """
+    Stream (row_number, {field: value}) from a CSV or XLSX upload
+    Returns the ignored (unknown) columns and the row iterator
+    """
+    extension = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
+    if extension == "csv":
+        rows = _iter_csv(file)
+    elif extension == "xlsx":
+        rows = _iter_xlsx(file)
+    else:
+        raise RFQImportError("Upload a .csv or .xlsx file")
+
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise RFQImportError("The file is empty")
+    except UnicodeDecodeError:
+        raise RFQImportError("CSV files must be UTF-8 encoded")
+
+    columns = [_normalize_header(name) for name in header]
+    if "title" not in columns:
+        raise RFQImportError("A 'title' column is required")
+    ignored = [name for name in columns if name and name not in RFQ_FIELDS]
+
+    def generate():
+        # Row numbers match the spreadsheet (header is row 1)
+        for row_number, row in enumerate(rows, start=2):
+            values = {
+                column: _cell(value)
+                for column, value in zip(columns, row)
+                if column in RFQ_FIELDS
+            }
+            if any(value is not None for value in values.values()):
+                yield row_number, values
+
+    return ignored, generate()
+
+
+class RFQImportService:
+    """
+    Bulk-creates RFQs from a BOM upload (CSV or XLSX)
+
+    Rows are streamed, validated against RFQCreate, sanitized a chunk at a
+    time and inserted with one executemany per chunk. Invalid rows are
+    reported and skipped; valid rows are created.
+    """
+
+    def import_rfqs(
+        self,
+        db: Session,
+        file: BinaryIO,
+        filename: str,
+        buyer_id: uuid.UUID,
+        buyer_company_id: uuid.UUID,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        ignored_columns, rows = iter_rows(file, filename)
+
+        total_rows = 0
+        failed = 0
+        errors: List[Dict[str, Any]] = []
+        rfq_ids: List[str] = []
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+
+        try:
+            for row_number, values in rows:
+                total_rows += 1
+                if total_rows > IMPORT_MAX_ROWS:
+                    raise RFQImportError(f"At most {IMPORT_MAX_ROWS} rows per import")
+
+                try:
+                    rfq_data = RFQCreate(**values)
+                except ValidationError as e:
+                    failed += 1
+                    if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                        errors.append({
+                            "row": row_number,
+                            "errors": [
+                                {"field": ".".join(str(loc) for loc in err["loc"]), "message": err["msg"]}
+                                for err in e.errors()
+                            ]
+                        })
+                    continue
+
+                chunk.append((row_number, rfq_data.model_dump()))
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    rfq_ids.extend(self._insert_chunk(db, chunk, buyer_id, buyer_company_id, dry_run))
+                    chunk = []
+        except UnicodeDecodeError:
+            raise RFQImportError("CSV files must be UTF-8 encoded")
+        except csv.Error as e:
+            raise RFQImportError(f"Malformed CSV: {e}")
+
+        if chunk:
+            rfq_ids.extend(self._insert_chunk(db, chunk, buyer_id, buyer_company_id, dry_run))
+
+        if not dry_run:
+            db.commit()
+
+        return {
+            "total_rows": total_rows,
+            "created": 0 if dry_run else len(rfq_ids),
+            "valid": len(rfq_ids),
+            "failed": failed,
+            "dry_run": dry_run,
+            "rfq_ids": [] if dry_run else rfq_ids,
+            "errors": errors,
+            "ignored_columns": ignored_columns
+        }
+
+    def _insert_chunk(
+        self,
+        db: Session,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        buyer_id: uuid.UUID,
+        buyer_company_id: uuid.UUID,
+        dry_run: bool
+    ) -> List[str]:
+        """
+        Sanitize and insert one chunk; returns the new RFQ ids
+        """
+        sanitized = sanitize_rfq_rows([data for _, data in chunk])
+        now = datetime.utcnow()
+        default_expiry = now + timedelta(days=30)
+
+        records = []
+        for data in sanitized:
+            data["id"] = uuid.uuid4()
+            data["buyer_id"] = buyer_id
+            data["buyer_company_id"] = buyer_company_id
+            data["expires_at"] = data.get("expires_at") or default_expiry
+            data["status"] = "active"
+            data["view_count"] = 0
+            data["response_count"] = 0
+            data["created_at"] = now
+            data["updated_at"] = now
+            records.append(data)
+
+        if dry_run:
+            return [str(record["id"]) for record in records]
+
+        db.execute(insert(RFQ), records)
+
+        for record in records:
+            company_ids = supplier_metrics_service.parse_company_ids(record.get("preferred_suppliers"))
+            if company_ids:
+                supplier_metrics_service.record_distribution(db, record["id"], company_ids)
+
+        return [str(record["id"]) for record in records]
+
+
+# Global instance
+rfq_import_service = RFQImportService()
@@ -1,9 +1,13 @@
 from elasticsearch import AsyncElasticsearch
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, List, Optional, Any
 import json
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.database import read_session
+from app.core.metrics import track_outbound
+from app.services.postgres_search import postgres_search_service
 
 
 class SearchService:
@@ -118,11 +122,12 @@ class SearchService:
                 "updated_at": datetime.utcnow()
             }
             
-            result = await self.client.index(
-                index=self.suppliers_index,
-                id=supplier_data.get("id"),
-                body=doc
-            )
+            with track_outbound("elasticsearch", "index"):
+                result = await self.client.index(
+                    index=self.suppliers_index,
+                    id=supplier_data.get("id"),
+                    body=doc
+                )
             
             return result.get("result") in ["created", "updated"]
             
@@ -142,11 +147,32 @@ class SearchService:
         employee_count_range: str = None,
         verified_only: bool = False,
         page: int = 1,
-        per_page: int = 20
+        per_page: int = 20,
+        industry: str = None
     ) -> Dict[str, Any]:
         """
         Advanced supplier search with filters matching the specification
+        Served from Postgres when search_backend is "postgres" or the
+        cluster cannot be reached. Ratings only exist in the index, so
+        Postgres results ignore min_rating and list it in "unapplied_filters".
         """
+        sql_filters = {
+            "query": query,
+            "materials": materials,
+            "certifications": certifications,
+            "location": location,
+            "industry": industry,
+            "min_response_rate": min_response_rate,
+            "max_response_time_hours": max_response_time_hours,
+            "employee_count_range": employee_count_range,
+            "verified_only": verified_only,
+            "page": page,
+            "per_page": per_page
+        }
+        unapplied = ["min_rating"] if min_rating is not None else []
+        if settings.search_backend == "postgres":
+            return await self._search_suppliers_postgres(unapplied, **sql_filters)
+        
         try:
             # Build the search query
             search_body = {
@@ -192,6 +218,12 @@ class SearchService:
                     "terms": {"certifications": certifications}
                 })
             
+            # Industry filter
+            if industry:
+                search_body["query"]["bool"]["filter"].append({
+                    "term": {"industry": industry}
+                })
+            
             # Response rate filter
             if min_response_rate is not None:
                 search_body["query"]["bool"]["filter"].append({
@@ -236,10 +268,11 @@ class SearchService:
             ]
             
             # Execute search
-            result = await self.client.search(
-                index=self.suppliers_index,
-                body=search_body
-            )
+            with track_outbound("elasticsearch", "search"):
+                result = await self.client.search(
+                    index=self.suppliers_index,
+                    body=search_body
+                )
             
             # Format response
             return {
@@ -276,7 +309,11 @@ class SearchService:
             }
             
         except Exception as e:
-            print(f"Error searching suppliers: {e}")
+            print(f"Error searching suppliers, falling back to Postgres: {e}")
+            try:
+                return await self._search_suppliers_postgres(unapplied, **sql_filters)
+            except Exception as e:
+                print(f"Error searching suppliers in Postgres: {e}")
             return {
                 "total": 0,
                 "page": page,
@@ -286,6 +323,24 @@ class SearchService:
                 "facets": {}
             }
     
+    async def _search_suppliers_postgres(self, unapplied: List[str], **filters) -> Dict[str, Any]:
+        """
+        Run the SQL supplier search off the event loop
+        unapplied: requested filters the SQL search can't apply, reported
+        back so callers don't mistake the results for filtered ones
+        """
+        def run():
+            db = read_session()
+            try:
+                return postgres_search_service.search_suppliers(db, **filters)
+            finally:
+                db.close()
+        
+        result = await run_in_threadpool(run)
+        if unapplied:
+            result["unapplied_filters"] = unapplied
+        return result
+    
     async def get_supplier_recommendations(
         self,
         rfq_data: Dict[str, Any],
@@ -361,10 +416,11 @@ class SearchService:
                 "size": limit
             }
             
-            result = await self.client.search(
-                index=self.suppliers_index,
-                body=search_body
-            )
+            with track_outbound("elasticsearch", "search"):
+                result = await self.client.search(
+                    index=self.suppliers_index,
+                    body=search_body
+                )
             
             return [
                 {
@@ -438,10 +494,11 @@ class SearchService:
                 "size": 50
             }
             
-            result = await self.client.search(
-                index=self.materials_index,
-                body=search_body
-            )
+            with track_outbound("elasticsearch", "search"):
+                result = await self.client.search(
+                    index=self.materials_index,
+                    body=search_body
+                )
             
             return [
                 {
@@ -1,28 +1,112 @@
-import boto3
-from botocore.exceptions import ClientError
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Set, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import threading
+import time
 import uuid
 from datetime import datetime, timedelta
 import mimetypes
 import os
 
 from app.core.config import settings
+from app.services.storage_backends import StorageBackend, StorageError, get_storage_backend
+
+# S3 multipart limits
+MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024  # 5 MiB (except the last part)
+MULTIPART_MAX_PARTS = 10000
+
+# Largest attachment accepted (declared size on upload, stored size on completion)
+MAX_FILE_SIZE = 100 * 1024 * 1024  # 100 MB
 
 
 class S3StorageService:
     """
     Service for AWS S3 file storage and management
     Handles RFQ documents, specs, CAD files with presigned URLs
+    Objects live in the backend selected by settings.storage_backend
+    (S3 / S3-compatible, or local disk)
     """
     
-    def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region
+    def __init__(self, backend: StorageBackend = None):
+        self.max_concurrency = settings.s3_max_concurrency
+        # Keep enough pooled connections for the worker threads below
+        self.backend = backend or get_storage_backend(max_pool_connections=self.max_concurrency)
+        
+        # Backends are blocking - run storage calls on a dedicated pool instead of the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="s3"
         )
-        self.bucket_name = settings.s3_bucket_name
+        
+        # head_object results per key (LRU). Keys embed a timestamp + uuid and
+        # are never overwritten, so entries stay valid until the object is deleted.
+        self._metadata_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._metadata_cache_size = settings.s3_metadata_cache_size
+        self._metadata_lock = threading.Lock()
+        
+        # Presigned download URLs keyed by (key, disposition, expiration).
+        # Entries are reused while at least (expiration - presign_cache_ttl_seconds)
+        # of validity remains, so callers never get a nearly-expired URL.
+        self._presign_cache: "OrderedDict[Tuple[str, Optional[str], int], Tuple[str, float]]" = OrderedDict()
+        self._presign_cache_size = settings.presign_cache_size
+        # Cache keys per file key, so a deleted file's URLs are dropped without a scan
+        self._presign_keys: Dict[str, Set[Tuple[str, Optional[str], int]]] = {}
+        self._presign_lock = threading.Lock()
+    
+    async def _run(self, func, *args, **kwargs):
+        """
+        Run a blocking backend call on the storage thread pool
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    def _get_cached_metadata(self, file_key: str) -> Optional[Dict[str, Any]]:
+        with self._metadata_lock:
+            cached = self._metadata_cache.get(file_key)
+            if cached is not None:
+                self._metadata_cache.move_to_end(file_key)
+            return cached
+    
+    def _cache_metadata(self, file_key: str, head_response: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {
+            "content_type": head_response.get('ContentType'),
+            "metadata": head_response.get('Metadata', {}),
+            "etag": head_response.get('ETag')
+        }
+        with self._metadata_lock:
+            self._metadata_cache[file_key] = entry
+            self._metadata_cache.move_to_end(file_key)
+            while len(self._metadata_cache) > self._metadata_cache_size:
+                self._metadata_cache.popitem(last=False)
+        return entry
+    
+    def _evict_metadata(self, file_key: str):
+        with self._metadata_lock:
+            self._metadata_cache.pop(file_key, None)
+    
+    async def _head_object_cached(
+        self,
+        file_key: str,
+        semaphore: asyncio.Semaphore
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetch object metadata, using the per-key cache when possible
+        """
+        cached = self._get_cached_metadata(file_key)
+        if cached is not None:
+            return cached
+        
+        async with semaphore:
+            try:
+                head_response = await self._run(self.backend.head_object, file_key)
+            except StorageError as e:
+                # Object may have been deleted between list and head
+                print(f"Error getting metadata for {file_key}: {e}")
+                return None
+        
+        return self._cache_metadata(file_key, head_response)
         
     def generate_file_key(self, rfq_id: str, filename: str, file_type: str = "document") -> str:
         """
@@ -59,20 +143,16 @@ class S3StorageService:
             file_key = self.generate_file_key(rfq_id, filename, file_type)
             
             # Generate presigned URL for PUT operation
-            presigned_url = self.s3_client.generate_presigned_url(
-                'put_object',
-                Params={
-                    'Bucket': self.bucket_name,
-                    'Key': file_key,
-                    'ContentType': content_type,
-                    'Metadata': {
-                        'rfq_id': rfq_id,
-                        'original_filename': filename,
-                        'upload_timestamp': datetime.utcnow().isoformat(),
-                        'file_type': file_type
-                    }
+            presigned_url = self.backend.presign_put(
+                file_key,
+                content_type,
+                {
+                    'rfq_id': rfq_id,
+                    'original_filename': filename,
+                    'upload_timestamp': datetime.utcnow().isoformat(),
+                    'file_type': file_type
                 },
-                ExpiresIn=expiration
+                expiration
             )
             
             return {
@@ -82,10 +162,255 @@ class S3StorageService:
                 "expires_in": expiration
             }
             
-        except ClientError as e:
+        except StorageError as e:
             print(f"Error generating presigned URL: {e}")
             return {"error": str(e)}
     
+    def calculate_part_size(self, file_size: int) -> int:
+        """
+        Pick a multipart part size for a file
+        Aims for ~s3_multipart_target_parts parts so browsers can upload in
+        parallel, within S3's 5 MiB minimum and 10,000 part maximum
+        """
+        target = -(-file_size // max(1, settings.s3_multipart_target_parts))
+        part_size = max(MULTIPART_MIN_PART_SIZE, target)
+        part_size = max(part_size, -(-file_size // MULTIPART_MAX_PARTS))
+        
+        # Round up to a whole MiB to keep part boundaries simple for clients
+        mib = 1024 * 1024
+        return -(-part_size // mib) * mib
+    
+    def part_count(self, file_size: int) -> int:
+        return max(1, -(-file_size // self.calculate_part_size(file_size)))
+    
+    def max_part_count(self) -> int:
+        """
+        Most parts create_multipart_upload hands out for an allowed file
+        Part sizes aim for s3_multipart_target_parts parts of at least 5 MiB,
+        so no valid upload needs more than either bound
+        """
+        return min(
+            max(1, settings.s3_multipart_target_parts),
+            -(-MAX_FILE_SIZE // MULTIPART_MIN_PART_SIZE)
+        )
+    
+    async def create_multipart_upload(
+        self,
+        rfq_id: str,
+        filename: str,
+        file_size: int,
+        content_type: str = None,
+        file_type: str = "document",
+        expiration: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        Start an S3 multipart upload and presign a URL for every part
+        The browser PUTs parts in parallel, then calls complete_multipart_upload
+        with the returned ETags
+        """
+        try:
+            if not content_type:
+                content_type, _ = mimetypes.guess_type(filename)
+                if not content_type:
+                    content_type = "application/octet-stream"
+            
+            file_key = self.generate_file_key(rfq_id, filename, file_type)
+            
+            upload_id = await self._run(
+                self.backend.create_multipart_upload,
+                file_key,
+                content_type,
+                {
+                    'rfq_id': rfq_id,
+                    'original_filename': filename,
+                    'upload_timestamp': datetime.utcnow().isoformat(),
+                    'file_type': file_type
+                }
+            )
+            
+            part_size = self.calculate_part_size(file_size)
+            part_count = self.part_count(file_size)
+            
+            parts = [
+                {
+                    "part_number": part_number,
+                    "upload_url": self.backend.presign_upload_part(file_key, upload_id, part_number, expiration)
+                }
+                for part_number in range(1, part_count + 1)
+            ]
+            
+            return {
+                "upload_id": upload_id,
+                "file_key": file_key,
+                "content_type": content_type,
+                "part_size": part_size,
+                "part_count": part_count,
+                "parts": parts,
+                "expires_in": expiration
+            }
+            
+        except StorageError as e:
+            print(f"Error creating multipart upload: {e}")
+            return {"error": str(e)}
+    
+    async def presign_upload_parts(
+        self,
+        file_key: str,
+        upload_id: str,
+        part_numbers: List[int],
+        expiration: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        Resume an in-progress multipart upload
+        Returns the parts S3 already has plus fresh URLs for the requested parts
+        """
+        try:
+            uploaded_parts = await self._run(self.backend.list_parts, file_key, upload_id)
+            
+            return {
+                "upload_id": upload_id,
+                "file_key": file_key,
+                "uploaded_parts": uploaded_parts,
+                "parts": [
+                    {
+                        "part_number": part_number,
+                        "upload_url": self.backend.presign_upload_part(file_key, upload_id, part_number, expiration)
+                    }
+                    for part_number in part_numbers
+                ],
+                "expires_in": expiration
+            }
+            
+        except StorageError as e:
+            print(f"Error presigning upload parts: {e}")
+            return {"error": str(e)}
+    
+    async def uploaded_size(
+        self,
+        file_key: str,
+        upload_id: str,
+        part_numbers: List[int]
+    ) -> Optional[int]:
+        """
+        Total size of the given parts as stored, before completing an upload
+        (presigned part URLs don't bind a length, so the declared size
+        proves nothing). None if the upload or any of the parts is missing
+        """
+        try:
+            uploaded = await self._run(self.backend.list_parts, file_key, upload_id)
+        except StorageError as e:
+            print(f"Error listing upload parts: {e}")
+            return None
+        
+        sizes = {part["part_number"]: part["size"] for part in uploaded}
+        if any(part_number not in sizes for part_number in part_numbers):
+            return None
+        return sum(sizes[part_number] for part_number in part_numbers)
+    
+    async def complete_multipart_upload(
+        self,
+        file_key: str,
+        upload_id: str,
+        parts: List[Dict[str, Any]]
+    ) -> bool:
+        """
+        Assemble uploaded parts into the final object
+        parts: [{"part_number": 1, "etag": "..."}, ...]
+        """
+        try:
+            await self._run(self.backend.complete_multipart_upload, file_key, upload_id, parts)
+            return True
+            
+        except StorageError as e:
+            print(f"Error completing multipart upload: {e}")
+            return False
+    
+    async def abort_multipart_upload(self, file_key: str, upload_id: str) -> bool:
+        """
+        Abort a multipart upload and discard any uploaded parts
+        """
+        try:
+            await self._run(self.backend.abort_multipart_upload, file_key, upload_id)
+            return True
+            
+        except StorageError as e:
+            print(f"Error aborting multipart upload: {e}")
+            return False
+    
+    async def cleanup_stale_multipart_uploads(self, max_age_hours: int = None) -> int:
+        """
+        Abort multipart uploads that were started but never completed
+        Uploaded parts are billed as storage until aborted
+        """
+        if max_age_hours is None:
+            max_age_hours = settings.s3_multipart_stale_hours
+        cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+        
+        try:
+            uploads = await self._run(self.backend.list_multipart_uploads)
+        except StorageError as e:
+            print(f"Error listing multipart uploads: {e}")
+            return 0
+        
+        aborted = 0
+        for upload in uploads:
+            initiated = upload['Initiated'].replace(tzinfo=None)
+            if initiated < cutoff:
+                if await self.abort_multipart_upload(upload['Key'], upload['UploadId']):
+                    aborted += 1
+        
+        return aborted
+    
+    def _sign_download_url(
+        self,
+        file_key: str,
+        expiration: int,
+        download_filename: Optional[str]
+    ) -> str:
+        """
+        SigV4-sign a GET URL, reusing a recently signed URL for the same
+        key, disposition and expiration
+        """
+        disposition = f'attachment; filename="{download_filename}"' if download_filename else None
+        cache_key = (file_key, disposition, expiration)
+        ttl = settings.presign_cache_ttl_seconds
+        now = time.monotonic()
+        
+        # Caching only makes sense when the URL outlives the reuse window
+        cacheable = ttl > 0 and expiration > 2 * ttl
+        if cacheable:
+            with self._presign_lock:
+                cached = self._presign_cache.get(cache_key)
+                if cached is not None and now - cached[1] < ttl:
+                    self._presign_cache.move_to_end(cache_key)
+                    return cached[0]
+        
+        presigned_url = self.backend.presign_get(file_key, expiration, disposition)
+        
+        if cacheable:
+            with self._presign_lock:
+                self._presign_cache[cache_key] = (presigned_url, now)
+                self._presign_cache.move_to_end(cache_key)
+                self._presign_keys.setdefault(file_key, set()).add(cache_key)
+                while len(self._presign_cache) > self._presign_cache_size:
+                    evicted, _ = self._presign_cache.popitem(last=False)
+                    self._discard_presign_key(evicted)
+        
+        return presigned_url
+    
+    def _discard_presign_key(self, cache_key: Tuple[str, Optional[str], int]):
+        # Caller holds _presign_lock
+        keys = self._presign_keys.get(cache_key[0])
+        if keys is not None:
+            keys.discard(cache_key)
+            if not keys:
+                del self._presign_keys[cache_key[0]]
+    
+    def _evict_presigned_urls(self, file_key: str):
+        with self._presign_lock:
+            for cache_key in self._presign_keys.pop(file_key, ()):
+                self._presign_cache.pop(cache_key, None)
+    
     async def generate_presigned_download_url(
         self,
         file_key: str,
@@ -96,27 +421,46 @@ class S3StorageService:
         Generate presigned URL for downloading files
         """
         try:
-            params = {
-                'Bucket': self.bucket_name,
-                'Key': file_key
-            }
+            return self._sign_download_url(file_key, expiration, download_filename)
             
-            # Set download filename if provided
-            if download_filename:
-                params['ResponseContentDisposition'] = f'attachment; filename="{download_filename}"'
-            
-            presigned_url = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params=params,
-                ExpiresIn=expiration
-            )
-            
-            return presigned_url
-            
-        except ClientError as e:
+        except StorageError as e:
             print(f"Error generating download URL: {e}")
             return None
     
+    def _sign_download_urls(
+        self,
+        files: List[Dict[str, Any]],
+        expiration: int
+    ) -> List[Optional[str]]:
+        # Each distinct (key, filename) is signed once, even with the cache disabled
+        signed: Dict[Tuple[str, Optional[str]], Optional[str]] = {}
+        urls = []
+        for file in files:
+            request = (file["file_key"], file.get("download_filename"))
+            if request not in signed:
+                try:
+                    signed[request] = self._sign_download_url(request[0], expiration, request[1])
+                except StorageError as e:
+                    print(f"Error generating download URL: {e}")
+                    signed[request] = None
+            urls.append(signed[request])
+        return urls
+    
+    async def generate_presigned_download_urls(
+        self,
+        files: List[Dict[str, Any]],
+        expiration: int = 3600
+    ) -> List[Optional[str]]:
+        """
+        Sign download URLs for many files in one call
+        files: [{"file_key": "...", "download_filename": "..."}, ...]
+        Returns one URL (None on error) per file, in request order
+        Signing runs on the S3 thread pool so large batches don't stall the event loop
+        """
+        if not files:
+            return []
+        return await self._run(self._sign_download_urls, files, expiration)
+    
     async def confirm_upload(
         self,
         file_key: str,
@@ -130,10 +474,8 @@ class S3StorageService:
         """
         try:
             # Verify file exists in S3
-            response = self.s3_client.head_object(
-                Bucket=self.bucket_name,
-                Key=file_key
-            )
+            response = await self._run(self.backend.head_object, file_key)
+            self._cache_metadata(file_key, response)
             
             file_size = response['ContentLength']
             last_modified = response['LastModified']
@@ -158,7 +500,7 @@ class S3StorageService:
                 )
             }
             
-        except ClientError as e:
+        except StorageError as e:
             print(f"Error confirming upload: {e}")
             return {"error": str(e), "status": "failed"}
     
@@ -167,56 +509,61 @@ class S3StorageService:
         Delete file from S3
         """
         try:
-            self.s3_client.delete_object(
-                Bucket=self.bucket_name,
-                Key=file_key
-            )
+            await self._run(self.backend.delete_object, file_key)
+            self._evict_metadata(file_key)
+            self._evict_presigned_urls(file_key)
             return True
             
-        except ClientError as e:
+        except StorageError as e:
             print(f"Error deleting file: {e}")
             return False
     
     async def list_rfq_files(self, rfq_id: str) -> List[Dict[str, Any]]:
         """
         List all files associated with an RFQ
+        Pages through every object and fetches metadata concurrently
+        (bounded by s3_max_concurrency); download URLs are signed locally
         """
         try:
             prefix = f"document/{rfq_id}/"
             
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix
+            objects = await self._run(self.backend.list_objects, prefix)
+            
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            head_results = await asyncio.gather(*[
+                self._head_object_cached(obj['Key'], semaphore)
+                for obj in objects
+            ])
+            
+            listed = []
+            for obj, head in zip(objects, head_results):
+                if head is None:
+                    continue
+                listed.append((obj, head.get('metadata', {}), head.get('content_type')))
+            
+            download_urls = await self.generate_presigned_download_urls(
+                [
+                    {"file_key": obj['Key'], "download_filename": metadata.get('original_filename')}
+                    for obj, metadata, _ in listed
+                ],
+                expiration=3600
             )
             
             files = []
-            for obj in response.get('Contents', []):
+            for (obj, metadata, content_type), download_url in zip(listed, download_urls):
                 file_key = obj['Key']
-                
-                # Get object metadata
-                head_response = self.s3_client.head_object(
-                    Bucket=self.bucket_name,
-                    Key=file_key
-                )
-                
-                metadata = head_response.get('Metadata', {})
-                
                 files.append({
                     "file_key": file_key,
                     "original_filename": metadata.get('original_filename', os.path.basename(file_key)),
                     "file_size": obj['Size'],
                     "last_modified": obj['LastModified'].isoformat(),
-                    "content_type": head_response.get('ContentType'),
-                    "download_url": await self.generate_presigned_download_url(
-                        file_key,
-                        expiration=3600,
-                        download_filename=metadata.get('original_filename')
-                    )
+                    "content_type": content_type,
+                    "download_url": download_url
                 })
             
             return files
             
-        except ClientError as e:
+        except StorageError as e:
             print(f"Error listing RFQ files: {e}")
             return []
     
@@ -225,20 +572,11 @@ class S3StorageService:
         Copy file within S3 bucket
         """
         try:
-            copy_source = {
-                'Bucket': self.bucket_name,
-                'Key': source_key
-            }
-            
-            self.s3_client.copy_object(
-                CopySource=copy_source,
-                Bucket=self.bucket_name,
-                Key=destination_key
-            )
+            await self._run(self.backend.copy_object, source_key, destination_key)
             
             return True
             
-        except ClientError as e:
+        except StorageError as e:
             print(f"Error copying file: {e}")
             return False
     
@@ -247,10 +585,8 @@ class S3StorageService:
         Get file metadata from S3
         """
         try:
-            response = self.s3_client.head_object(
-                Bucket=self.bucket_name,
-                Key=file_key
-            )
+            response = await self._run(self.backend.head_object, file_key)
+            self._cache_metadata(file_key, response)
             
             return {
                 "file_key": file_key,
@@ -261,7 +597,7 @@ class S3StorageService:
                 "etag": response['ETag']
             }
             
-        except ClientError as e:
+        except StorageError as e:
             print(f"Error getting file metadata: {e}")
             return None
     
@@ -293,9 +629,6 @@ class S3StorageService:
         """
         Validate file before upload
         """
-        # File size limits (in bytes)
-        MAX_FILE_SIZE = 100 * 1024 * 1024  # 100 MB
-        
         # Allowed file extensions
         ALLOWED_EXTENSIONS = {
             '.pdf', '.doc', '.docx', '.txt', '.rtf',  # Documents
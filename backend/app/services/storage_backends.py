@@ -0,0 +1,533 @@
+"""
+Storage backends for S3StorageService
+
+S3StorageBackend talks to AWS S3 or any S3-compatible endpoint (MinIO,
+LocalStack) via s3_endpoint_url. LocalStorageBackend keeps objects on disk
+with the same key layout ({file_type}/{rfq_id}/...) and serves them through
+HMAC-signed URLs handled by app.api.storage.
+"""
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, BinaryIO, Callable
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import quote, urlencode
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.metrics import track_outbound
+
+
+class StorageError(Exception):
+    """
+    Raised by storage backends when an operation fails (missing object,
+    permission error, invalid upload id, ...)
+    """
+    pass
+
+
+class StorageBackend(ABC):
+    """
+    Object storage primitives used by S3StorageService
+    All methods are blocking; the service runs them on its thread pool.
+    head_object/list_objects return S3-shaped dicts (ContentLength,
+    ContentType, Metadata, LastModified, ETag / Key, Size, LastModified)
+    """
+    name: str = "base"
+
+    @abstractmethod
+    def put_object(self, key: str, body: BinaryIO, content_type: str, metadata: Dict[str, str] = None):
+        ...
+
+    @abstractmethod
+    def get_object(self, key: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def head_object(self, key: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def list_objects(self, prefix: str) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def delete_object(self, key: str):
+        ...
+
+    @abstractmethod
+    def copy_object(self, source_key: str, destination_key: str):
+        ...
+
+    @abstractmethod
+    def presign_get(self, key: str, expiration: int, disposition: str = None) -> str:
+        ...
+
+    @abstractmethod
+    def presign_put(self, key: str, content_type: str, metadata: Dict[str, str], expiration: int) -> str:
+        ...
+
+    @abstractmethod
+    def create_multipart_upload(self, key: str, content_type: str, metadata: Dict[str, str]) -> str:
+        ...
+
+    @abstractmethod
+    def presign_upload_part(self, key: str, upload_id: str, part_number: int, expiration: int) -> str:
+        ...
+
+    @abstractmethod
+    def list_parts(self, key: str, upload_id: str) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict[str, Any]]):
+        ...
+
+    @abstractmethod
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        ...
+
+    @abstractmethod
+    def list_multipart_uploads(self) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def head_bucket(self):
+        """
+        Raise StorageError when the bucket (or storage root) is unreachable
+        """
+        ...
+
+
+def _translate_client_errors(func: Callable) -> Callable:
+    # Also times each S3 call for the outbound latency metrics
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            with track_outbound("s3", func.__name__):
+                return func(*args, **kwargs)
+        except ClientError as e:
+            raise StorageError(str(e)) from e
+    return wrapper
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    AWS S3 (or S3-compatible endpoint such as MinIO) via boto3
+    """
+    name = "s3"
+
+    def __init__(self, max_pool_connections: int = 10):
+        client_config = Config(
+            max_pool_connections=max_pool_connections,
+            # MinIO and most local stand-ins need path-style addressing
+            s3={'addressing_style': 'path' if settings.s3_force_path_style else 'auto'}
+        )
+        self.client = boto3.client(
+            's3',
+            aws_access_key_id=settings.aws_access_key_id,
+            aws_secret_access_key=settings.aws_secret_access_key,
+            region_name=settings.aws_region,
+            endpoint_url=settings.s3_endpoint_url or None,
+            config=client_config
+        )
+        self.bucket_name = settings.s3_bucket_name
+
+    @_translate_client_errors
+    def put_object(self, key: str, body: BinaryIO, content_type: str, metadata: Dict[str, str] = None):
+        self.client.upload_fileobj(
+            body,
+            self.bucket_name,
+            key,
+            ExtraArgs={'ContentType': content_type, 'Metadata': metadata or {}}
+        )
+
+    @_translate_client_errors
+    def get_object(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket_name, Key=key)['Body']
+
+    @_translate_client_errors
+    def head_object(self, key: str) -> Dict[str, Any]:
+        return self.client.head_object(Bucket=self.bucket_name, Key=key)
+
+    @_translate_client_errors
+    def list_objects(self, prefix: str) -> List[Dict[str, Any]]:
+        # Follow continuation tokens past the 1,000 object page limit
+        paginator = self.client.get_paginator('list_objects_v2')
+        objects = []
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            objects.extend(page.get('Contents', []))
+        return objects
+
+    @_translate_client_errors
+    def delete_object(self, key: str):
+        self.client.delete_object(Bucket=self.bucket_name, Key=key)
+
+    @_translate_client_errors
+    def copy_object(self, source_key: str, destination_key: str):
+        self.client.copy_object(
+            CopySource={'Bucket': self.bucket_name, 'Key': source_key},
+            Bucket=self.bucket_name,
+            Key=destination_key
+        )
+
+    @_translate_client_errors
+    def presign_get(self, key: str, expiration: int, disposition: str = None) -> str:
+        params = {'Bucket': self.bucket_name, 'Key': key}
+        if disposition:
+            params['ResponseContentDisposition'] = disposition
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expiration)
+
+    @_translate_client_errors
+    def presign_put(self, key: str, content_type: str, metadata: Dict[str, str], expiration: int) -> str:
+        return self.client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': self.bucket_name,
+                'Key': key,
+                'ContentType': content_type,
+                'Metadata': metadata
+            },
+            ExpiresIn=expiration
+        )
+
+    @_translate_client_errors
+    def create_multipart_upload(self, key: str, content_type: str, metadata: Dict[str, str]) -> str:
+        response = self.client.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=key,
+            ContentType=content_type,
+            Metadata=metadata
+        )
+        return response['UploadId']
+
+    @_translate_client_errors
+    def presign_upload_part(self, key: str, upload_id: str, part_number: int, expiration: int) -> str:
+        return self.client.generate_presigned_url(
+            'upload_part',
+            Params={
+                'Bucket': self.bucket_name,
+                'Key': key,
+                'UploadId': upload_id,
+                'PartNumber': part_number
+            },
+            ExpiresIn=expiration
+        )
+
+    @_translate_client_errors
+    def list_parts(self, key: str, upload_id: str) -> List[Dict[str, Any]]:
+        paginator = self.client.get_paginator('list_parts')
+        parts = []
+        for page in paginator.paginate(Bucket=self.bucket_name, Key=key, UploadId=upload_id):
+            for part in page.get('Parts', []):
+                parts.append({
+                    "part_number": part['PartNumber'],
+                    "etag": part['ETag'],
+                    "size": part['Size']
+                })
+        return parts
+
+    @_translate_client_errors
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict[str, Any]]):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                'Parts': [
+                    {'PartNumber': part["part_number"], 'ETag': part["etag"]}
+                    for part in sorted(parts, key=lambda p: p["part_number"])
+                ]
+            }
+        )
+
+    @_translate_client_errors
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        self.client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+
+    @_translate_client_errors
+    def list_multipart_uploads(self) -> List[Dict[str, Any]]:
+        paginator = self.client.get_paginator('list_multipart_uploads')
+        uploads = []
+        for page in paginator.paginate(Bucket=self.bucket_name):
+            uploads.extend(page.get('Uploads', []))
+        return uploads
+
+    @_translate_client_errors
+    def head_bucket(self):
+        self.client.head_bucket(Bucket=self.bucket_name)
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Objects stored on local disk under local_storage_path
+    Each object has a "<path>.meta.json" sidecar with content type and
+    metadata. Presigned URLs point at /api/v1/storage and are signed with
+    HMAC-SHA256 over the method, key, expiry and any extra parameters.
+    """
+    name = "local"
+
+    META_SUFFIX = ".meta.json"
+    MULTIPART_DIR = ".multipart"
+
+    def __init__(self, root: str = None, base_url: str = None):
+        self.root = os.path.abspath(root or settings.local_storage_path)
+        self.base_url = (base_url or settings.local_storage_url).rstrip("/")
+        self._secret = settings.secret_key.encode()
+        os.makedirs(self.root, exist_ok=True)
+
+    def head_bucket(self):
+        if not os.path.isdir(self.root) or not os.access(self.root, os.W_OK):
+            raise StorageError(f"Storage root not writable: {self.root}")
+
+    # -- paths -----------------------------------------------------------
+
+    def object_path(self, key: str) -> str:
+        """
+        Absolute path for a key; rejects keys that escape the storage root
+        """
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep) or key.endswith(self.META_SUFFIX):
+            raise StorageError(f"Invalid key: {key}")
+        if path.startswith(os.path.join(self.root, self.MULTIPART_DIR) + os.sep):
+            raise StorageError(f"Invalid key: {key}")
+        return path
+
+    def _upload_dir(self, upload_id: str) -> str:
+        if not upload_id or not all(c.isalnum() or c == "-" for c in upload_id):
+            raise StorageError(f"Invalid upload id: {upload_id}")
+        return os.path.join(self.root, self.MULTIPART_DIR, upload_id)
+
+    def part_path(self, upload_id: str, part_number: int) -> str:
+        upload_dir = self._upload_dir(upload_id)
+        if not os.path.isdir(upload_dir):
+            raise StorageError(f"Upload not found: {upload_id}")
+        return os.path.join(upload_dir, f"part-{part_number:05d}")
+
+    def _read_meta(self, path: str) -> Dict[str, Any]:
+        try:
+            with open(path + self.META_SUFFIX) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_meta(self, path: str, content_type: str, metadata: Dict[str, str]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + self.META_SUFFIX, "w") as f:
+            json.dump({"content_type": content_type, "metadata": metadata or {}}, f)
+
+    @staticmethod
+    def compute_etag(stat: os.stat_result) -> str:
+        return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    # -- signing ---------------------------------------------------------
+
+    def _signature(self, method: str, key: str, expires: int, extra: Dict[str, str]) -> str:
+        payload = "\n".join([method, key, str(expires)] + [f"{k}={extra[k]}" for k in sorted(extra)])
+        return hmac.new(self._secret, payload.encode(), hashlib.sha256).hexdigest()
+
+    def _signed_url(self, method: str, key: str, expiration: int, extra: Dict[str, str] = None) -> str:
+        extra = {k: v for k, v in (extra or {}).items() if v is not None}
+        expires = int(time.time()) + expiration
+        query = {**extra, "expires": expires, "signature": self._signature(method, key, expires, extra)}
+        return f"{self.base_url}/{quote(key)}?{urlencode(query)}"
+
+    def verify_signature(self, method: str, key: str, expires: int, signature: str, extra: Dict[str, str] = None) -> bool:
+        """
+        Check a signed URL produced by presign_get/presign_put/presign_upload_part
+        """
+        if expires < time.time():
+            return False
+        extra = {k: v for k, v in (extra or {}).items() if v is not None}
+        expected = self._signature(method, key, expires, extra)
+        return hmac.compare_digest(expected, signature)
+
+    # -- objects ---------------------------------------------------------
+
+    def put_object(self, key: str, body: BinaryIO, content_type: str, metadata: Dict[str, str] = None):
+        path = self.object_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(body, f, 1024 * 1024)
+        os.replace(tmp_path, path)
+        self._write_meta(path, content_type, metadata)
+
+    def get_object(self, key: str) -> BinaryIO:
+        try:
+            return open(self.object_path(key), "rb")
+        except FileNotFoundError as e:
+            raise StorageError(f"Object not found: {key}") from e
+
+    def head_object(self, key: str) -> Dict[str, Any]:
+        path = self.object_path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError as e:
+            raise StorageError(f"Object not found: {key}") from e
+
+        meta = self._read_meta(path)
+        return {
+            "ContentLength": stat.st_size,
+            "ContentType": meta.get("content_type", "application/octet-stream"),
+            "Metadata": meta.get("metadata", {}),
+            "LastModified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            "ETag": self.compute_etag(stat)
+        }
+
+    def list_objects(self, prefix: str) -> List[Dict[str, Any]]:
+        # Prefixes are always directory-shaped ({file_type}/{rfq_id}/)
+        directory = os.path.abspath(os.path.join(self.root, prefix))
+        if not directory.startswith(self.root) or not os.path.isdir(directory):
+            return []
+
+        objects = []
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if d != self.MULTIPART_DIR]
+            for filename in filenames:
+                if filename.endswith(self.META_SUFFIX) or filename.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                objects.append({
+                    "Key": os.path.relpath(path, self.root).replace(os.sep, "/"),
+                    "Size": stat.st_size,
+                    "LastModified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                    "ETag": self.compute_etag(stat)
+                })
+
+        objects.sort(key=lambda o: o["Key"])
+        return objects
+
+    def delete_object(self, key: str):
+        path = self.object_path(key)
+        for p in (path, path + self.META_SUFFIX):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+    def copy_object(self, source_key: str, destination_key: str):
+        source = self.object_path(source_key)
+        destination = self.object_path(destination_key)
+        if not os.path.exists(source):
+            raise StorageError(f"Object not found: {source_key}")
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copyfile(source, destination)
+        if os.path.exists(source + self.META_SUFFIX):
+            shutil.copyfile(source + self.META_SUFFIX, destination + self.META_SUFFIX)
+
+    def presign_get(self, key: str, expiration: int, disposition: str = None) -> str:
+        self.object_path(key)
+        return self._signed_url("GET", key, expiration, {"disposition": disposition})
+
+    def presign_put(self, key: str, content_type: str, metadata: Dict[str, str], expiration: int) -> str:
+        # Metadata is recorded up front; the object only exists once the PUT lands
+        self._write_meta(self.object_path(key), content_type, metadata)
+        return self._signed_url("PUT", key, expiration)
+
+    # -- multipart -------------------------------------------------------
+
+    def create_multipart_upload(self, key: str, content_type: str, metadata: Dict[str, str]) -> str:
+        self.object_path(key)
+        upload_id = uuid.uuid4().hex
+        upload_dir = self._upload_dir(upload_id)
+        os.makedirs(upload_dir)
+        with open(os.path.join(upload_dir, "upload.json"), "w") as f:
+            json.dump({
+                "key": key,
+                "content_type": content_type,
+                "metadata": metadata or {},
+                "initiated": datetime.now(timezone.utc).isoformat()
+            }, f)
+        return upload_id
+
+    def _read_upload(self, key: str, upload_id: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self._upload_dir(upload_id), "upload.json")) as f:
+                upload = json.load(f)
+        except FileNotFoundError as e:
+            raise StorageError(f"Upload not found: {upload_id}") from e
+        if upload["key"] != key:
+            raise StorageError(f"Upload {upload_id} does not belong to {key}")
+        return upload
+
+    def presign_upload_part(self, key: str, upload_id: str, part_number: int, expiration: int) -> str:
+        return self._signed_url(
+            "PUT", key, expiration,
+            {"upload_id": upload_id, "part_number": str(part_number)}
+        )
+
+    def list_parts(self, key: str, upload_id: str) -> List[Dict[str, Any]]:
+        self._read_upload(key, upload_id)
+        upload_dir = self._upload_dir(upload_id)
+        parts = []
+        for filename in sorted(os.listdir(upload_dir)):
+            if not filename.startswith("part-"):
+                continue
+            stat = os.stat(os.path.join(upload_dir, filename))
+            parts.append({
+                "part_number": int(filename[len("part-"):]),
+                "etag": self.compute_etag(stat),
+                "size": stat.st_size
+            })
+        return parts
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict[str, Any]]):
+        upload = self._read_upload(key, upload_id)
+        stored = {part["part_number"]: part for part in self.list_parts(key, upload_id)}
+
+        for part in parts:
+            if part["part_number"] not in stored or stored[part["part_number"]]["etag"] != part["etag"]:
+                raise StorageError(f"Invalid part {part['part_number']} for upload {upload_id}")
+
+        path = self.object_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{upload_id}.tmp"
+        with open(tmp_path, "wb") as out:
+            for part in sorted(parts, key=lambda p: p["part_number"]):
+                with open(self.part_path(upload_id, part["part_number"]), "rb") as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+        os.replace(tmp_path, path)
+        self._write_meta(path, upload["content_type"], upload["metadata"])
+        shutil.rmtree(self._upload_dir(upload_id), ignore_errors=True)
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        self._read_upload(key, upload_id)
+        shutil.rmtree(self._upload_dir(upload_id), ignore_errors=True)
+
+    def list_multipart_uploads(self) -> List[Dict[str, Any]]:
+        multipart_root = os.path.join(self.root, self.MULTIPART_DIR)
+        if not os.path.isdir(multipart_root):
+            return []
+
+        uploads = []
+        for upload_id in os.listdir(multipart_root):
+            try:
+                with open(os.path.join(multipart_root, upload_id, "upload.json")) as f:
+                    upload = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            uploads.append({
+                "Key": upload["key"],
+                "UploadId": upload_id,
+                "Initiated": datetime.fromisoformat(upload["initiated"])
+            })
+        return uploads
+
+
+def get_storage_backend(max_pool_connections: int = 10) -> StorageBackend:
+    """
+    Build the backend selected by settings.storage_backend ("s3" or "local")
+    """
+    if settings.storage_backend == "local":
+        return LocalStorageBackend()
+    return S3StorageBackend(max_pool_connections=max_pool_connections)
@@ -0,0 +1,111 @@
+from sqlalchemy import select, literal
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.models.user import Company, RFQ
+from app.services.geo import geo_service, company_distance_km
+
+
+def has_all(column, values: Iterable[str]):
+    """
+    Array column holds every value (@>) - served by the column's GIN index
+    """
+    return column.contains(list(values))
+
+
+def has_any(column, values: Iterable[str]):
+    """
+    Array column holds at least one value (&&) - served by the column's GIN index
+    """
+    return column.overlap(list(values))
+
+
+class SupplierFilterService:
+    """
+    SQL-side supplier filters over the companies capability arrays
+
+    Certifications and NAICS codes must all be held (a buyer requiring
+    ISO 9001 and AS9100 needs both); materials, capabilities and
+    categories match on any overlap. Every filter is a GIN-indexed
+    containment test, so nothing is parsed in Python.
+    """
+
+    def company_filters(
+        self,
+        certifications: Optional[List[str]] = None,
+        naics_codes: Optional[List[str]] = None,
+        materials: Optional[List[str]] = None,
+        capabilities: Optional[List[str]] = None,
+        business_categories: Optional[List[str]] = None,
+        raw_materials: Optional[List[str]] = None
+    ) -> List[Any]:
+        clauses = []
+        if certifications:
+            clauses.append(has_all(Company.certifications, certifications))
+        if naics_codes:
+            clauses.append(has_all(Company.naics_codes, naics_codes))
+        if materials:
+            clauses.append(has_any(Company.materials, materials))
+        if capabilities:
+            clauses.append(has_any(Company.capabilities, capabilities))
+        if business_categories:
+            clauses.append(has_any(Company.business_categories, business_categories))
+        if raw_materials:
+            clauses.append(has_any(Company.raw_materials_focus, raw_materials))
+        return clauses
+
+    def qualified_suppliers(
+        self,
+        db: Session,
+        rfq: RFQ,
+        limit: int = 50,
+        radius_km: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Companies holding every certification the RFQ requires, best
+        responders first (the buyer's own company is excluded)
+
+        With radius_km only companies within that distance of the RFQ's
+        delivery location are returned, nearest first. Raises ValueError
+        when the delivery location cannot be geocoded.
+        """
+        filters = [
+            Company.id != rfq.buyer_company_id,
+            *self.company_filters(certifications=rfq.required_certifications)
+        ]
+        order_by = [
+            Company.is_verified.desc(),
+            Company.response_rate.desc().nullslast(),
+            Company.name
+        ]
+        distance = literal(None)
+
+        if radius_km is not None:
+            origin = geo_service.geocode(db, rfq.delivery_location)
+            if not origin:
+                raise ValueError("RFQ delivery location could not be geocoded")
+            filters.extend(geo_service.within_radius(origin, radius_km))
+            distance = company_distance_km(origin)
+            order_by.insert(0, distance)
+
+        stmt = select(
+            Company.id,
+            Company.name,
+            Company.industry,
+            Company.headquarters_location,
+            Company.certifications,
+            Company.materials,
+            Company.is_verified,
+            Company.response_rate,
+            Company.avg_response_time_hours,
+            distance.label("distance_km")
+        ).where(*filters).order_by(*order_by).limit(limit)
+
+        return [
+            {**row._mapping, "id": str(row.id)}
+            for row in db.execute(stmt)
+        ]
+
+
+# Global instance
+supplier_filter_service = SupplierFilterService()
@@ -0,0 +1,252 @@
+from sqlalchemy import update, func, text, select, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Union
+from datetime import datetime
+import json
+import logging
+import uuid
+
+from app.models.user import Company, POC, RFQ, RFQDistribution
+
+logger = logging.getLogger(__name__)
+
+
+# Set-wise recomputation from rfq_distributions / rfq_responses. Rows are
+# only written when a value actually drifted.
+RECONCILE_COMPANIES_SQL = """
+WITH received AS (
+    SELECT company_id, count(*) AS n
+    FROM rfq_distributions
+    GROUP BY company_id
+),
+responded AS (
+    SELECT r.supplier_company_id AS company_id,
+           count(*) AS n,
+           sum(greatest(extract(epoch FROM coalesce(r.responded_at, r.created_at) - q.created_at) / 3600.0, 0)) AS hours
+    FROM rfq_responses r
+    JOIN rfqs q ON q.id = r.rfq_id
+    GROUP BY r.supplier_company_id
+),
+metrics AS (
+    SELECT c.id,
+           coalesce(rc.n, 0) AS received,
+           coalesce(rs.n, 0) AS responded,
+           coalesce(rs.hours, 0) AS hours,
+           CASE WHEN rs.n > 0 THEN round(rs.hours / rs.n)::int END AS avg_hours,
+           CASE WHEN rc.n > 0 THEN least(100, round(100.0 * coalesce(rs.n, 0) / rc.n))::int ELSE 0 END AS rate
+    FROM companies c
+    LEFT JOIN received rc ON rc.company_id = c.id
+    LEFT JOIN responded rs ON rs.company_id = c.id
+)
+UPDATE companies c
+SET total_rfqs_received = m.received,
+    total_rfqs_responded = m.responded,
+    total_response_hours = m.hours,
+    avg_response_time_hours = m.avg_hours,
+    response_rate = m.rate
+FROM metrics m
+WHERE c.id = m.id
+  AND (c.total_rfqs_received IS DISTINCT FROM m.received
+       OR c.total_rfqs_responded IS DISTINCT FROM m.responded
+       OR c.avg_response_time_hours IS DISTINCT FROM m.avg_hours
+       OR c.response_rate IS DISTINCT FROM m.rate
+       OR abs(coalesce(c.total_response_hours, 0) - m.hours) > 0.01)
+"""
+
+RECONCILE_POCS_SQL = """
+WITH handled AS (
+    SELECT r.responding_poc_id AS poc_id,
+           count(*) AS n,
+           sum(greatest(extract(epoch FROM coalesce(r.responded_at, r.created_at) - q.created_at) / 3600.0, 0)) AS hours
+    FROM rfq_responses r
+    JOIN rfqs q ON q.id = r.rfq_id
+    GROUP BY r.responding_poc_id
+),
+metrics AS (
+    SELECT p.id,
+           coalesce(h.n, 0) AS handled,
+           coalesce(h.hours, 0) AS hours,
+           CASE WHEN h.n > 0 THEN round(h.hours / h.n)::int END AS avg_hours,
+           CASE WHEN c.total_rfqs_received > 0
+                THEN least(100, round(100.0 * coalesce(h.n, 0) / c.total_rfqs_received))::int
+                ELSE 0 END AS rate
+    FROM pocs p
+    JOIN companies c ON c.id = p.company_id
+    LEFT JOIN handled h ON h.poc_id = p.id
+)
+UPDATE pocs p
+SET total_rfqs_handled = m.handled,
+    total_response_hours = m.hours,
+    avg_response_time_hours = m.avg_hours,
+    response_rate = m.rate
+FROM metrics m
+WHERE p.id = m.id
+  AND (p.total_rfqs_handled IS DISTINCT FROM m.handled
+       OR p.avg_response_time_hours IS DISTINCT FROM m.avg_hours
+       OR p.response_rate IS DISTINCT FROM m.rate
+       OR abs(coalesce(p.total_response_hours, 0) - m.hours) > 0.01)
+"""
+
+
+def _rate(numerator, denominator):
+    """
+    SQL percentage clamped to 0..100, 0 when nothing was received
+    """
+    return func.least(
+        100,
+        func.round(100.0 * numerator / func.greatest(denominator, 1))
+    )
+
+
+class SupplierMetricsService:
+    """
+    Keeps supplier performance metrics (response rate, average response
+    time, RFQ counts) current for search ranking and match reasons
+
+    Every event is a constant-time UPDATE computed from the row's own
+    counters (running sums, not per-event aggregation). The statements run
+    in the caller's transaction and evaluate against the current row, so
+    concurrent events do not lose updates. reconcile() recomputes all
+    metrics set-wise to repair any drift.
+    """
+
+    @staticmethod
+    def parse_company_ids(raw: Union[None, str, List[str]]) -> List[uuid.UUID]:
+        """
+        Company ids from a list (e.g. RFQ.preferred_suppliers) or a legacy
+        JSON string; entries that are not UUIDs (free-text names) are ignored
+        """
+        if not raw:
+            return []
+        if isinstance(raw, str):
+            try:
+                values = json.loads(raw)
+            except ValueError:
+                return []
+        else:
+            values = raw
+        if not isinstance(values, list):
+            return []
+
+        ids = []
+        for value in values:
+            try:
+                ids.append(uuid.UUID(str(value)))
+            except ValueError:
+                continue
+        return ids
+
+    def record_distribution(
+        self,
+        db: Session,
+        rfq_id: uuid.UUID,
+        company_ids: Iterable[uuid.UUID],
+        channel: str = "invited"
+    ) -> int:
+        """
+        Record that an RFQ was sent to supplier companies and bump their
+        received counters; companies that already had it are skipped.
+        Returns the number of new recipients.
+        """
+        company_ids = list(set(company_ids))
+        if not company_ids:
+            return 0
+
+        now = datetime.utcnow()
+        # Only existing companies, and never the buyer's own company
+        source = select(
+            func.gen_random_uuid(),
+            literal(rfq_id, RFQDistribution.rfq_id.type),
+            Company.id,
+            literal(channel, RFQDistribution.channel.type),
+            literal(now, RFQDistribution.distributed_at.type)
+        ).where(
+            Company.id.in_(company_ids),
+            Company.id != select(RFQ.buyer_company_id).where(RFQ.id == rfq_id).scalar_subquery()
+        )
+        stmt = insert(RFQDistribution).from_select(
+            ["id", "rfq_id", "company_id", "channel", "distributed_at"],
+            source
+        ).on_conflict_do_nothing(
+            index_elements=["rfq_id", "company_id"]
+        ).returning(RFQDistribution.company_id)
+
+        new_company_ids = [row[0] for row in db.execute(stmt)]
+        if not new_company_ids:
+            return 0
+
+        received = func.coalesce(Company.total_rfqs_received, 0) + 1
+        db.execute(
+            update(Company)
+            .where(Company.id.in_(new_company_ids))
+            .values(
+                total_rfqs_received=received,
+                response_rate=_rate(func.coalesce(Company.total_rfqs_responded, 0), received)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return len(new_company_ids)
+
+    def record_response(
+        self,
+        db: Session,
+        rfq: RFQ,
+        company_id: uuid.UUID,
+        poc_id: uuid.UUID,
+        responded_at: datetime
+    ):
+        """
+        Update company and POC metrics for one new response (O(1))
+        A response to an RFQ the company was never sent counts as received
+        """
+        self.record_distribution(db, rfq.id, [company_id], channel="direct")
+
+        hours = max((responded_at - rfq.created_at).total_seconds() / 3600, 0) if rfq.created_at else 0
+
+        responded = func.coalesce(Company.total_rfqs_responded, 0) + 1
+        company_hours = func.coalesce(Company.total_response_hours, 0) + hours
+        db.execute(
+            update(Company)
+            .where(Company.id == company_id)
+            .values(
+                total_rfqs_responded=responded,
+                total_response_hours=company_hours,
+                avg_response_time_hours=func.round(company_hours / responded),
+                response_rate=_rate(responded, func.coalesce(Company.total_rfqs_received, 0))
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        handled = func.coalesce(POC.total_rfqs_handled, 0) + 1
+        poc_hours = func.coalesce(POC.total_response_hours, 0) + hours
+        company_received = select(Company.total_rfqs_received).where(Company.id == company_id).scalar_subquery()
+        db.execute(
+            update(POC)
+            .where(POC.id == poc_id)
+            .values(
+                total_rfqs_handled=handled,
+                total_response_hours=poc_hours,
+                avg_response_time_hours=func.round(poc_hours / handled),
+                response_rate=_rate(handled, func.coalesce(company_received, 0)),
+                last_active_at=responded_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def reconcile(self, db: Session) -> dict:
+        """
+        Recompute every company and POC metric from the source tables
+        """
+        companies = db.execute(text(RECONCILE_COMPANIES_SQL)).rowcount
+        # POC rates depend on the reconciled company counters
+        pocs = db.execute(text(RECONCILE_POCS_SQL)).rowcount
+        db.commit()
+
+        if companies or pocs:
+            logger.warning(f"Supplier metrics drift repaired: {companies} companies, {pocs} POCs")
+        return {"companies_updated": companies, "pocs_updated": pocs}
+
+
+# Global instance
+supplier_metrics_service = SupplierMetricsService()
@@ -1,15 +1,19 @@
 import pusher
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, Any, List, Optional
 import json
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.metrics import track_outbound
+from app.tasks.notifications import send_pusher_events
 
 
 class PusherService:
     """
     Service for real-time messaging and notifications using Pusher WebSockets
     Handles RFQ responses, chat, status updates
+    Notification events are queued and triggered in batches by the Celery worker
     """
     
     def __init__(self):
@@ -21,6 +25,20 @@ class PusherService:
             ssl=True
         )
     
+    @staticmethod
+    def _event(channel: str, name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"channel": channel, "name": name, "data": data}
+    
+    async def _publish(self, events: List[Dict[str, Any]]) -> bool:
+        """
+        Queue events for delivery (retried with backoff, dead-lettered on
+        repeated failure); the broker call runs in the threadpool
+        """
+        if not events:
+            return False
+        await run_in_threadpool(send_pusher_events.delay, events)
+        return True
+    
     async def notify_new_rfq_response(
         self,
         rfq_id: str,
@@ -43,7 +61,7 @@ class PusherService:
             }
             
             # Send to RFQ-specific channel
-            result = self.client.trigger(channel, event, data)
+            events = [self._event(channel, event, data)]
             
             # Also send to buyer's personal channel if specified
             if buyer_user_id:
@@ -53,9 +71,9 @@ class PusherService:
                     "rfq_id": rfq_id,
                     "type": "rfq_response"
                 }
-                self.client.trigger(personal_channel, "notification", personal_data)
+                events.append(self._event(personal_channel, "notification", personal_data))
             
-            return result.get("status_code") == 200
+            return await self._publish(events)
             
         except Exception as e:
             print(f"Error sending RFQ response notification: {e}")
@@ -82,8 +100,6 @@ class PusherService:
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            result1 = self.client.trigger(conversation_channel, "new-message", conversation_data)
-            
             # Send to recipient's personal channel
             personal_channel = f"user-{recipient_user_id}"
             notification_data = {
@@ -94,10 +110,10 @@ class PusherService:
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            result2 = self.client.trigger(personal_channel, "notification", notification_data)
-            
-            return (result1.get("status_code") == 200 and 
-                    result2.get("status_code") == 200)
+            return await self._publish([
+                self._event(conversation_channel, "new-message", conversation_data),
+                self._event(personal_channel, "notification", notification_data)
+            ])
             
         except Exception as e:
             print(f"Error sending message notification: {e}")
@@ -122,19 +138,18 @@ class PusherService:
                 "type": "poc_status_change"
             }
             
-            result = self.client.trigger(channel, "poc-status-update", data)
+            events = [self._event(channel, "poc-status-update", data)]
             
             # Also notify individual company members
             if company_members:
+                user_data = {
+                    **data,
+                    "company_id": company_id
+                }
                 for user_id in company_members:
-                    user_channel = f"user-{user_id}"
-                    user_data = {
-                        **data,
-                        "company_id": company_id
-                    }
-                    self.client.trigger(user_channel, "notification", user_data)
+                    events.append(self._event(f"user-{user_id}", "notification", user_data))
             
-            return result.get("status_code") == 200
+            return await self._publish(events)
             
         except Exception as e:
             print(f"Error sending POC status notification: {e}")
@@ -150,26 +165,37 @@ class PusherService:
         """
         Notify suppliers when RFQ is expiring soon
         """
+        return await self.notify_rfqs_expiring_soon([{
+            "rfq_id": rfq_id,
+            "rfq_title": rfq_title,
+            "expires_in_hours": expires_in_hours,
+            "interested_suppliers": interested_suppliers
+        }])
+    
+    async def notify_rfqs_expiring_soon(self, rfqs: List[Dict[str, Any]]) -> bool:
+        """
+        Expiring-soon notifications for many RFQs, queued as one batch
+        Each item has rfq_id, rfq_title, expires_in_hours and interested_suppliers
+        """
         try:
-            data = {
-                "rfq_id": rfq_id,
-                "rfq_title": rfq_title,
-                "expires_in_hours": expires_in_hours,
-                "timestamp": datetime.utcnow().isoformat(),
-                "type": "rfq_expiring",
-                "urgency": "high" if expires_in_hours <= 6 else "medium"
-            }
-            
-            success_count = 0
-            
-            # Send to each interested supplier
-            for supplier_user_id in interested_suppliers:
-                channel = f"user-{supplier_user_id}"
-                result = self.client.trigger(channel, "rfq-expiring", data)
-                if result.get("status_code") == 200:
-                    success_count += 1
+            timestamp = datetime.utcnow().isoformat()
+            events = []
+            for rfq in rfqs:
+                data = {
+                    "rfq_id": rfq["rfq_id"],
+                    "rfq_title": rfq["rfq_title"],
+                    "expires_in_hours": rfq["expires_in_hours"],
+                    "timestamp": timestamp,
+                    "type": "rfq_expiring",
+                    "urgency": "high" if rfq["expires_in_hours"] <= 6 else "medium"
+                }
+                # Send to each interested supplier
+                events.extend(
+                    self._event(f"user-{supplier_user_id}", "rfq-expiring", data)
+                    for supplier_user_id in rfq["interested_suppliers"]
+                )
             
-            return success_count > 0
+            return await self._publish(events)
             
         except Exception as e:
             print(f"Error sending RFQ expiring notifications: {e}")
@@ -194,22 +220,12 @@ class PusherService:
                 "type": "deal_milestone"
             }
             
-            success_count = 0
-            
-            # Send to RFQ channel
-            rfq_channel = f"rfq-{rfq_id}"
-            result = self.client.trigger(rfq_channel, "deal-milestone", data)
-            if result.get("status_code") == 200:
-                success_count += 1
-            
-            # Send to all participants
+            # Send to RFQ channel and all participants
+            events = [self._event(f"rfq-{rfq_id}", "deal-milestone", data)]
             for user_id in participants:
-                user_channel = f"user-{user_id}"
-                result = self.client.trigger(user_channel, "notification", data)
-                if result.get("status_code") == 200:
-                    success_count += 1
+                events.append(self._event(f"user-{user_id}", "notification", data))
             
-            return success_count > 0
+            return await self._publish(events)
             
         except Exception as e:
             print(f"Error sending deal milestone notification: {e}")
@@ -224,6 +240,7 @@ class PusherService:
     ) -> bool:
         """
         Send typing indicator for chat
+        Sent directly - ephemeral, a late or retried indicator is worse than none
         """
         try:
             channel = f"rfq-{rfq_id}-chat"
@@ -234,7 +251,8 @@ class PusherService:
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            result = self.client.trigger(channel, event, data)
+            with track_outbound("pusher", "trigger"):
+                result = self.client.trigger(channel, event, data)
             return result.get("status_code") == 200
             
         except Exception as e:
@@ -260,9 +278,7 @@ class PusherService:
             
             # Send to general announcement channel
             channel = f"system-{target_audience}"
-            result = self.client.trigger(channel, "announcement", data)
-            
-            return result.get("status_code") == 200
+            return await self._publish([self._event(channel, "announcement", data)])
             
         except Exception as e:
             print(f"Error sending system announcement: {e}")
@@ -278,7 +294,7 @@ class PusherService:
         Notify multiple suppliers about RFQ match
         """
         try:
-            success_count = 0
+            events = []
             
             for supplier in matched_suppliers:
                 user_id = supplier.get("user_id")
@@ -297,13 +313,9 @@ class PusherService:
                     "priority": "high" if match_score > 0.8 else "medium"
                 }
                 
-                channel = f"user-{user_id}"
-                result = self.client.trigger(channel, "rfq-match", data)
-                
-                if result.get("status_code") == 200:
-                    success_count += 1
+                events.append(self._event(f"user-{user_id}", "rfq-match", data))
             
-            return success_count > 0
+            return await self._publish(events)
             
         except Exception as e:
             print(f"Error sending bulk RFQ match notifications: {e}")
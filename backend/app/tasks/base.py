@@ -0,0 +1,137 @@
+"""
+Base task with idempotency keys, exponential-backoff retries and dead-lettering
+"""
+from celery import Task
+from celery.utils.time import get_exponential_backoff_interval
+from datetime import datetime
+from typing import Any, Dict, Optional
+import json
+import logging
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_PREFIX = "tasks:idempotency:"
+DONE = "done"
+
+
+class ReliableTask(Task):
+    """
+    Celery task base class
+
+    - Retries any exception with exponential backoff + jitter
+      (up to settings.task_max_retries)
+    - Tasks called with an ``idempotency_key`` kwarg run at most once per key
+      within settings.task_idempotency_ttl_seconds; retries of the same task
+      id may re-claim the key
+    - Tasks that exhaust their retries are pushed to the dead-letter list
+      (settings.task_dead_letter_key) for inspection and replay
+    """
+    abstract = True
+    autoretry_for = (Exception,)
+    retry_backoff = True
+    retry_backoff_max = settings.task_retry_backoff_max_seconds
+    retry_jitter = True
+    max_retries = settings.task_max_retries
+
+    def __call__(self, *args, **kwargs):
+        idempotency_key = kwargs.pop("idempotency_key", None)
+        if idempotency_key and not self._claim(idempotency_key):
+            logger.info(f"Skipping duplicate {self.name} ({idempotency_key})")
+            return None
+
+        result = super().__call__(*args, **kwargs)
+
+        if idempotency_key:
+            get_redis().set(
+                IDEMPOTENCY_PREFIX + idempotency_key,
+                DONE,
+                ex=settings.task_idempotency_ttl_seconds
+            )
+        return result
+
+    def _claim(self, idempotency_key: str) -> bool:
+        """
+        Claim the key for this task id; False if another run owns or finished it
+        """
+        redis_key = IDEMPOTENCY_PREFIX + idempotency_key
+        task_id = self.request.id or "eager"
+        client = get_redis()
+
+        if client.set(redis_key, task_id, nx=True, ex=settings.task_idempotency_ttl_seconds):
+            return True
+        # A retry of the same task keeps its claim
+        return client.get(redis_key) == task_id
+
+    def retry_from(self, exc: Exception, **kwargs):
+        """
+        Retry with autoretry's backoff, overriding some kwargs - e.g. a
+        progress marker, so the retry resumes where this attempt failed:
+
+            raise self.retry_from(e, sent=i)
+        """
+        countdown = get_exponential_backoff_interval(
+            factor=int(self.retry_backoff),
+            retries=self.request.retries,
+            maximum=self.retry_backoff_max,
+            full_jitter=self.retry_jitter
+        )
+        return self.retry(exc=exc, kwargs={**self.request.kwargs, **kwargs}, countdown=countdown)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        """
+        Retries exhausted (or non-retryable error): dead-letter the task
+        """
+        idempotency_key = kwargs.get("idempotency_key")
+        entry = {
+            "task": self.name,
+            "task_id": task_id,
+            "args": args,
+            "kwargs": kwargs,
+            "exception": repr(exc),
+            "retries": self.request.retries,
+            "failed_at": datetime.utcnow().isoformat()
+        }
+        logger.error(f"Task {self.name} [{task_id}] dead-lettered: {exc!r}")
+
+        try:
+            client = get_redis()
+            pipe = client.pipeline()
+            pipe.lpush(settings.task_dead_letter_key, json.dumps(entry, default=str))
+            pipe.ltrim(settings.task_dead_letter_key, 0, settings.task_dead_letter_max_length - 1)
+            if idempotency_key:
+                # Release the key so a manual replay can run
+                pipe.delete(IDEMPOTENCY_PREFIX + idempotency_key)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Could not dead-letter task {task_id}: {e}")
+
+
+def replay_dead_letters(limit: int = 100) -> int:
+    """
+    Re-enqueue dead-lettered tasks (oldest first); returns the number replayed
+    """
+    from app.core.celery_app import celery_app
+
+    client = get_redis()
+    replayed = 0
+    for _ in range(limit):
+        raw = client.rpop(settings.task_dead_letter_key)
+        if raw is None:
+            break
+        entry: Dict[str, Any] = json.loads(raw)
+        celery_app.send_task(entry["task"], args=entry["args"], kwargs=entry["kwargs"])
+        replayed += 1
+    return replayed
+
+
+def get_dead_letter_count() -> Optional[int]:
+    """
+    Number of dead-lettered tasks (None if Redis is unavailable)
+    """
+    try:
+        return get_redis().llen(settings.task_dead_letter_key)
+    except Exception:
+        return None
@@ -0,0 +1,40 @@
+"""
+GDPR/CCPA data export task
+"""
+from typing import Any, Dict
+import logging
+
+from app.core.celery_app import celery_app
+from app.core.database import read_session
+from app.tasks.base import ReliableTask
+
+logger = logging.getLogger(__name__)
+
+
+class DataExportTask(ReliableTask):
+    """
+    Marks the export failed only once retries are exhausted, so polling
+    clients don't see "failed" for an attempt that is about to be retried
+    """
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        super().on_failure(exc, task_id, args, kwargs, einfo)
+        from app.services.data_export import data_export_service
+        try:
+            data_export_service.mark_failed(args[0], repr(exc))
+        except Exception as e:
+            logger.error(f"Could not mark data export {args[0]} failed: {e}")
+
+
+@celery_app.task(base=DataExportTask, name="app.tasks.data_export.export_user_data")
+def export_user_data(export_id: str) -> Dict[str, Any]:
+    """
+    Build a user's data archive and upload it to storage
+    """
+    from app.services.data_export import data_export_service
+
+    db = read_session()  # Read-only job
+    try:
+        return data_export_service.run(db, export_id)
+    finally:
+        db.close()
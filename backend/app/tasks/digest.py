@@ -0,0 +1,22 @@
+"""
+Weekly digest task (scheduled by celery beat)
+"""
+from typing import Any, Dict
+
+from app.core.celery_app import celery_app
+from app.core.database import read_session
+from app.tasks.base import ReliableTask
+
+
+@celery_app.task(base=ReliableTask, name="app.tasks.digest.send_weekly_digests")
+def send_weekly_digests() -> Dict[str, Any]:
+    """
+    Send the weekly digest to all users; a retry resumes from the checkpoint
+    """
+    from app.services.digest import weekly_digest_service
+
+    db = read_session()  # Read-only job
+    try:
+        return weekly_digest_service.run(db)
+    finally:
+        db.close()
@@ -0,0 +1,98 @@
+"""
+Periodic maintenance tasks (scheduled by celery beat)
+"""
+import asyncio
+
+from app.core.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.tasks.base import ReliableTask
+
+
+@celery_app.task(base=ReliableTask, name="app.tasks.maintenance.cleanup_stale_uploads")
+def cleanup_stale_uploads() -> int:
+    """
+    Abort multipart uploads that were never completed
+    """
+    from app.services.storage import s3_storage_service
+
+    return asyncio.run(s3_storage_service.cleanup_stale_multipart_uploads())
+
+
+@celery_app.task(base=ReliableTask, name="app.tasks.maintenance.reconcile_supplier_metrics")
+def reconcile_supplier_metrics() -> dict:
+    """
+    Recompute supplier metrics set-wise to repair drift in the incremental counters
+    """
+    from app.services.supplier_metrics import supplier_metrics_service
+
+    db = SessionLocal()
+    try:
+        return supplier_metrics_service.reconcile(db)
+    finally:
+        db.close()
+
+
+@celery_app.task(base=ReliableTask, name="app.tasks.maintenance.cleanup_data_exports")
+def cleanup_data_exports() -> int:
+    """
+    Delete data export archives past their retention window
+    """
+    from app.services.data_export import data_export_service
+
+    return data_export_service.cleanup_expired()
+
+
+@celery_app.task(base=ReliableTask, name="app.tasks.maintenance.purge_deleted_accounts")
+def purge_deleted_accounts() -> dict:
+    """
+    Permanently remove accounts whose deletion grace period has passed
+    """
+    from app.services.account_purge import account_purge_service
+
+    db = SessionLocal()
+    try:
+        return account_purge_service.run(db)
+    finally:
+        db.close()
+
+
+@celery_app.task(base=ReliableTask, name="app.tasks.maintenance.sweep_rfq_expiry")
+def sweep_rfq_expiry() -> dict:
+    """
+    Expire RFQs past their deadline and warn suppliers about ones closing soon
+    """
+    from app.services.rfq_expiry import rfq_expiry_service
+
+    db = SessionLocal()
+    try:
+        return rfq_expiry_service.sweep(db)
+    finally:
+        db.close()
+
+
+@celery_app.task(base=ReliableTask, name="app.tasks.maintenance.geocode_companies")
+def geocode_companies() -> dict:
+    """
+    Geocode company headquarters that have no coordinates yet
+    """
+    from app.services.geo import geo_service
+
+    db = SessionLocal()
+    try:
+        return geo_service.geocode_companies(db)
+    finally:
+        db.close()
+
+
+@celery_app.task(base=ReliableTask, name="app.tasks.maintenance.maintain_audit_partitions")
+def maintain_audit_partitions() -> dict:
+    """
+    Create upcoming audit_logs partitions and archive expired ones
+    """
+    from app.services.audit_partitions import audit_partition_service
+
+    db = SessionLocal()
+    try:
+        return audit_partition_service.maintain(db)
+    finally:
+        db.close()
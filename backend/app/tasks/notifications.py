@@ -0,0 +1,77 @@
+"""
+Outbound notification tasks: SendGrid emails and Pusher events
+Payloads are plain JSON so services never block a request on a provider call
+"""
+from typing import Any, Dict, List
+from functools import lru_cache
+import hashlib
+import json
+import logging
+
+import pusher
+from sendgrid import SendGridAPIClient
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.metrics import track_outbound
+from app.tasks.base import ReliableTask
+
+logger = logging.getLogger(__name__)
+
+# Pusher accepts at most 10 events per batch trigger
+PUSHER_BATCH_SIZE = 10
+
+
+@lru_cache()
+def get_sendgrid_client() -> SendGridAPIClient:
+    return SendGridAPIClient(api_key=settings.sendgrid_api_key)
+
+
+@lru_cache()
+def get_pusher_client() -> pusher.Pusher:
+    return pusher.Pusher(
+        app_id=settings.pusher_app_id,
+        key=settings.pusher_key,
+        secret=settings.pusher_secret,
+        cluster=settings.pusher_cluster,
+        ssl=True
+    )
+
+
+def payload_key(prefix: str, payload: Any) -> str:
+    """
+    Idempotency key derived from the payload, so enqueuing the same
+    notification twice (e.g. a retried request) sends it once
+    """
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+@celery_app.task(base=ReliableTask, name="app.tasks.notifications.send_email")
+def send_email(payload: Dict[str, Any]) -> int:
+    """
+    Send a SendGrid v3 mail payload (Mail(...).get())
+    Raises on non-2xx so the task is retried with backoff
+    """
+    with track_outbound("sendgrid", "send"):
+        response = get_sendgrid_client().client.mail.send.post(request_body=payload)
+    if response.status_code not in (200, 202):
+        raise RuntimeError(f"SendGrid returned {response.status_code}: {response.body}")
+    return response.status_code
+
+
+@celery_app.task(base=ReliableTask, bind=True, name="app.tasks.notifications.send_pusher_events")
+def send_pusher_events(self, events: List[Dict[str, Any]], sent: int = 0) -> int:
+    """
+    Trigger Pusher events ({"channel", "name", "data"}) in batches of 10
+    A retry starts at the failed batch (sent), so delivered batches aren't
+    published twice
+    """
+    client = get_pusher_client()
+    for i in range(sent, len(events), PUSHER_BATCH_SIZE):
+        try:
+            with track_outbound("pusher", "trigger_batch"):
+                client.trigger_batch(events[i:i + PUSHER_BATCH_SIZE])
+        except Exception as e:
+            raise self.retry_from(e, sent=i)
+    return len(events)
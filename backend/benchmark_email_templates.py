@@ -0,0 +1,36 @@
+"""
+Measure email template rendering throughput.
+Usage: python benchmark_email_templates.py [iterations]
+"""
+import sys
+import os
+import time
+
+# Add the backend directory to the python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.email_templates import email_templates
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    context = {
+        "supplier_name": "Acme Metals",
+        "buyer_company": "Example Manufacturing",
+        "material": "6061-T6 Aluminum",
+        "quantity": "5000 kg",
+        "rfq_link": "https://example.com/rfqs/123",
+    }
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        email_templates.render("rfq_notification", **context)
+    elapsed = time.perf_counter() - start
+
+    print(f"Rendered {iterations} RFQ notifications (HTML + text + subject) in {elapsed:.3f}s")
+    print(f"{iterations / elapsed:,.0f} emails/sec, {elapsed / iterations * 1e6:.1f} µs/email")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Abort S3 multipart uploads that were started but never completed.
+Run periodically (e.g. a Railway cron job): python cleanup_stale_uploads.py
+"""
+import sys
+import os
+import asyncio
+
+# Add the backend directory to the python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.storage import s3_storage_service
+
+
+def main():
+    aborted = asyncio.run(s3_storage_service.cleanup_stale_multipart_uploads())
+    print(f"Aborted {aborted} stale multipart uploads")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+/metrics must fail closed: outside development it is only served with
+METRICS_TOKEN set, and then only to scrapers presenting that token.
+"""
+import pytest
+
+from app.core import metrics
+from app.core.config import settings
+
+
+@pytest.fixture
+def metrics_settings(monkeypatch):
+    def configure(environment, token=None, enabled=True):
+        monkeypatch.setattr(settings, "environment", environment)
+        monkeypatch.setattr(settings, "metrics_token", token)
+        monkeypatch.setattr(settings, "metrics_enabled", enabled)
+    return configure
+
+
+@pytest.mark.parametrize("environment", ["production", "staging"])
+def test_not_exposed_without_token_outside_development(metrics_settings, environment):
+    metrics_settings(environment)
+    assert metrics.scrape_status(None) == 404
+    assert metrics.scrape_status("Bearer anything") == 404
+
+
+def test_open_in_development_without_token(metrics_settings):
+    metrics_settings("development")
+    assert metrics.scrape_status(None) == 200
+
+
+def test_token_required_when_configured(metrics_settings):
+    metrics_settings("production", token="s3cret")
+    assert metrics.scrape_status(None) == 401
+    assert metrics.scrape_status("Bearer wrong") == 401
+    assert metrics.scrape_status("Bearer s3cret") == 200
+
+
+def test_disabled_hides_endpoint(metrics_settings):
+    metrics_settings("development", token="s3cret", enabled=False)
+    assert metrics.scrape_status("Bearer s3cret") == 404
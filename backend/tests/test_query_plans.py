@@ -0,0 +1,226 @@
+"""
+Check that hot queries are served by their indexes as tables grow.
+
+Seeds a realistic volume of users, companies, RFQs and audit logs into the
+test database (DATABASE_URL_TEST - its tables are TRUNCATED), runs
+EXPLAIN on each query below and asserts the expected index is used and
+no sort is needed (and that audit queries are pruned to a few monthly
+partitions). Skipped when DATABASE_URL_TEST is not set.
+
+    DATABASE_URL_TEST=postgresql://... pytest tests/test_query_plans.py
+    QUERY_PLAN_SCALE=0.1 to seed fewer rows, QUERY_PLAN_NO_SEED=1 to reuse the data
+"""
+import json
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select, func, text
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.user import RFQ
+from app.models.audit_log import AuditLog
+from app.services.audit_partitions import month_start, add_months, partition_name
+import app.models  # noqa: F401 - register every table for create_all
+
+pytestmark = pytest.mark.skipif(
+    not settings.database_url_test,
+    reason="DATABASE_URL_TEST is not set - refusing to seed a non-test database"
+)
+
+# Rows per table at QUERY_PLAN_SCALE=1.0
+VOLUMES = {
+    "users": 5000,
+    "companies": 2000,
+    "rfqs": 200000,
+    "audit_logs": 1000000,
+}
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, email, name, is_active, is_verified, created_at, updated_at)
+    SELECT gen_random_uuid(), 'user' || g || '@example.com', 'User ' || g, true, true,
+           timezone('utc', now()), timezone('utc', now())
+    FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO companies (id, name, is_verified, response_rate, created_at, updated_at)
+    SELECT gen_random_uuid(), 'Company ' || g, g % 3 = 0, g % 101,
+           timezone('utc', now()), timezone('utc', now())
+    FROM generate_series(1, :companies) g
+    """,
+    # ~20% active (open, expiring in the future - the sweeper keeps it that
+    # way), 90% public, created over two years
+    """
+    INSERT INTO rfqs (id, buyer_id, buyer_company_id, title, status, visibility,
+                      expires_at, created_at, updated_at)
+    SELECT gen_random_uuid(),
+           u.ids[1 + g % array_length(u.ids, 1)],
+           c.ids[1 + g % array_length(c.ids, 1)],
+           'RFQ ' || g,
+           t.status,
+           CASE WHEN g % 10 = 0 THEN 'private' ELSE 'public' END,
+           CASE WHEN t.status = 'active'
+                THEN timezone('utc', now()) + (1 + g % 60) * interval '1 day'
+                ELSE t.created + interval '30 days' END,
+           t.created,
+           t.created
+    FROM generate_series(1, :rfqs) g,
+         (SELECT array_agg(id) AS ids FROM users) u,
+         (SELECT array_agg(id) AS ids FROM companies) c,
+         LATERAL (
+             SELECT (ARRAY['active', 'closed', 'expired', 'expired', 'closed'])[1 + g % 5] AS status,
+                    timezone('utc', now()) - (g * 7919 % 1051200) * interval '1 minute' AS created
+         ) t
+    """,
+    """
+    INSERT INTO audit_logs (id, user_id, user_email, action, status, timestamp)
+    SELECT gen_random_uuid()::text,
+           u.ids[1 + g % array_length(u.ids, 1)]::text,
+           'user' || (1 + g % :users) || '@example.com',
+           (ARRAY['user.login', 'rfq.view', 'rfq.view', 'rfq.create', 'user.login.failed', 'data.access'])[1 + g % 6],
+           'success',
+           now() - (g * 7919 % 525600) * interval '1 minute'
+    FROM generate_series(1, :audit_logs) g,
+         (SELECT array_agg(id) AS ids FROM users) u
+    """,
+]
+
+
+def sample_user_id(conn) -> uuid.UUID:
+    return conn.execute(text("SELECT id FROM users ORDER BY email LIMIT 1")).scalar()
+
+
+def create_audit_partitions(conn, months_back: int = 13):
+    """
+    Monthly audit partitions for the seeded year (the maintenance task only
+    creates current and future months)
+    """
+    current = month_start(datetime.now(timezone.utc))
+    for offset in range(-months_back, 2):
+        start = add_months(current, offset)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+        ))
+
+
+# (name, statement builder, expected index, max audit partitions scanned) -
+# statements mirror the application queries
+CHECKS = [
+    (
+        "RFQ listing (list_rfqs)",
+        lambda user_id, now: select(RFQ.id, RFQ.title).where(RFQ.status == "active", RFQ.visibility == "public")
+        .order_by(RFQ.created_at.desc()).offset(0).limit(50),
+        "ix_rfqs_public_status_created_at",
+        None,
+    ),
+    (
+        "Buyer RFQ export (ExportService)",
+        lambda user_id, now: select(RFQ.id, RFQ.title).where(RFQ.buyer_id == user_id).order_by(RFQ.created_at.desc()),
+        "ix_rfqs_buyer_created_at",
+        None,
+    ),
+    (
+        "Expiry sweep (RFQExpiryService)",
+        lambda user_id, now: select(RFQ.id).where(RFQ.status == "active", RFQ.expires_at <= now).limit(500),
+        "ix_rfqs_active_expires_at",
+        None,
+    ),
+    (
+        "User activity (AuditService.get_user_activity)",
+        lambda user_id, now: select(AuditLog.id, AuditLog.action).where(
+            AuditLog.user_id == str(user_id),
+            AuditLog.timestamp >= now - timedelta(days=90)
+        ).order_by(AuditLog.timestamp.desc()).limit(100),
+        "ix_audit_logs_user_timestamp",
+        5,
+    ),
+    (
+        "Failed logins (AuditService.get_failed_login_attempts)",
+        lambda user_id, now: select(func.count(AuditLog.id)).where(
+            AuditLog.action == "user.login.failed",
+            AuditLog.user_email == "user1@example.com",
+            AuditLog.timestamp >= now - timedelta(minutes=15)
+        ),
+        "ix_audit_logs_action_email_timestamp",
+        2,
+    ),
+]
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def index_family(conn, index: str) -> set:
+    """
+    The index plus its per-partition children (plans name the children)
+    """
+    children = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:index)
+    """), {"index": index}).scalars().all()
+    return {index, *children}
+
+
+def explain(conn, stmt) -> dict:
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    row = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    return (json.loads(row) if isinstance(row, str) else row)[0]["Plan"]
+
+
+def seed(conn, scale: float):
+    volumes = {table: max(int(rows * scale), 1) for table, rows in VOLUMES.items()}
+    conn.execute(text("TRUNCATE users, companies, rfqs, audit_logs CASCADE"))
+    create_audit_partitions(conn)
+    for sql in SEED_SQL:
+        conn.execute(text(sql), volumes)
+    conn.execute(text("ANALYZE"))
+    conn.commit()
+
+
+@pytest.fixture(scope="session")
+def seeded_conn():
+    """
+    Connection to the seeded test database (seeded once per session)
+    """
+    engine = create_engine(settings.database_url_test)
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        if not os.getenv("QUERY_PLAN_NO_SEED"):
+            seed(conn, float(os.getenv("QUERY_PLAN_SCALE", "1.0")))
+        yield conn
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "build, index, max_partitions",
+    [check[1:] for check in CHECKS],
+    ids=[check[0] for check in CHECKS]
+)
+def test_query_uses_index(seeded_conn, build, index, max_partitions):
+    stmt = build(sample_user_id(seeded_conn), datetime.now(timezone.utc))
+    plan = explain(seeded_conn, stmt)
+    nodes = list(plan_nodes(plan))
+    used = {node["Index Name"] for node in nodes if "Index Name" in node}
+    sorts = [node["Node Type"] for node in nodes if node["Node Type"] in ("Sort", "Incremental Sort")]
+    partitions = {
+        node["Relation Name"] for node in nodes
+        if node.get("Relation Name", "").startswith("audit_logs_")
+    }
+
+    problems = []
+    if not used & index_family(seeded_conn, index):
+        problems.append(f"expected {index}, used {sorted(used) or 'no index'}")
+    if sorts:
+        problems.append(f"plan sorts ({', '.join(sorts)})")
+    if max_partitions is not None and len(partitions) > max_partitions:
+        problems.append(f"scans {len(partitions)} audit partitions (expected at most {max_partitions})")
+
+    assert not problems, f"{'; '.join(problems)}\n{json.dumps(plan, indent=2)}"
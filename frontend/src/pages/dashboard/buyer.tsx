@@ -572,7 +572,7 @@ const RFQModal: React.FC<RFQModalProps> = ({ supplier, onClose }) => {
         ...formData,
         title: formData.title || `RFQ for ${formData.material_category}`,
         visibility: 'private',
-        preferred_suppliers: JSON.stringify([supplier.id])
+        preferred_suppliers: [supplier.id]
       };
 
       const response = await axios.post('/api/rfqs', rfqData, {
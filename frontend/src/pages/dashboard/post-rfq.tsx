@@ -224,7 +224,7 @@ const PostRFQPlatform = () => {
         specifications: formData.specifications,
         delivery_deadline: formData.delivery_deadline || undefined,
         delivery_location: formData.delivery_location,
-        required_certifications: JSON.stringify(formData.required_certifications),
+        required_certifications: formData.required_certifications,
         visibility: 'public',
         // Enhanced RFQ fields
         part_number: formData.part_number || undefined,
@@ -14,7 +14,7 @@ interface RFQOpportunity {
   specifications?: string;
   delivery_deadline?: string;
   delivery_location?: string;
-  required_certifications?: string;
+  required_certifications?: string[];
   status: 'active' | 'closed' | 'expired';
   view_count: number;
   response_count: number;
@@ -428,14 +428,14 @@ const SupplierDashboard = () => {
                     </div>
                   )}
 
-                  {rfq.required_certifications && (
+                  {rfq.required_certifications && rfq.required_certifications.length > 0 && (
                     <div className="mb-6">
                       <div className="text-sm font-semibold text-secondary-900 mb-2">Required Certifications:</div>
                       <div className="flex gap-2 flex-wrap">
-                        {rfq.required_certifications.split(',').map((cert, idx) => (
+                        {rfq.required_certifications.map((cert, idx) => (
                           <span key={idx} className={dashboardTheme.badges.info + " flex items-center gap-1"}>
                             <Award size={14} />
-                            {cert.trim()}
+                            {cert}
                           </span>
                         ))}
                       </div>
@@ -24,10 +24,10 @@ export interface Company {
   duns_number?: string;
   is_verified: boolean;
   verification_source?: string;
-  certifications?: string;
-  capabilities?: string;
-  materials?: string;
-  naics_codes?: string;
+  certifications?: string[];
+  capabilities?: string[];
+  materials?: string[];
+  naics_codes?: string[];
   response_rate: number;
   avg_response_time_hours?: number;
   total_rfqs_received: number;
@@ -65,9 +65,9 @@ export interface RFQ {
   specifications?: string;
   delivery_deadline?: string;
   delivery_location?: string;
-  required_certifications?: string;
-  preferred_suppliers?: string;
-  attachments?: string;
+  required_certifications?: string[];
+  preferred_suppliers?: string[];
+  attachments?: unknown[];
   status: 'active' | 'closed' | 'expired' | 'cancelled';
   visibility: 'public' | 'private' | 'invited_only';
   expires_at?: string;